@@ -0,0 +1,159 @@
+"""
+Multi-process booking stress test: several "kiosks" book the same few rooms at once.
+
+Every worker process opens the same SQLite file and calls
+db_manager.create_booking_with_students for random slots of a handful of rooms
+on one day, so most attempts collide. Reports bookings/second, the conflict
+rate, SQLITE_BUSY retries and, most importantly, whether any two 'booked'
+bookings ended up overlapping (must be 0).
+
+Run from the project root:
+    python -m benchmarks.bench_booking_contention                  # tiny generated DB
+    python -m benchmarks.bench_booking_contention --procs 8 --attempts 500 --rooms 2
+    python -m benchmarks.bench_booking_contention --db /tmp/bench.db --out contention.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from database import db_manager as db
+from database.migrations import migrate
+from benchmarks.generate_dataset import BENCH_USER, SCALES, generate
+
+SLOTS = 20  # half-hour starts 08:00 .. 17:30
+
+
+def _hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _worker(path, rooms, day, attempts, seed, start_event, results):
+    """One kiosk: book random slots until attempts run out; report counts."""
+    db.configure_connection(db_path=path)
+    rng = random.Random(seed)
+    counts = {"ok": 0, "conflict": 0, "busy": 0, "error": 0}
+    latencies = []
+    start_event.wait()
+    t0 = time.perf_counter()
+    for _ in range(attempts):
+        slot = rng.randrange(SLOTS)
+        length = rng.randint(1, min(4, SLOTS - slot))
+        start = db.OCCUPANCY_DAY_START + slot * 30
+        t = time.perf_counter()
+        try:
+            db.create_booking_with_students(BENCH_USER, rng.choice(rooms), day,
+                                            _hhmm(start), _hhmm(start + length * 30), [BENCH_USER])
+            counts["ok"] += 1
+        except db.BookingConflict:
+            counts["conflict"] += 1
+        except db.sqlite3.OperationalError as e:
+            counts["busy" if db._is_busy(e) else "error"] += 1
+        except db.sqlite3.Error:
+            counts["error"] += 1
+        latencies.append((time.perf_counter() - t) * 1000.0)
+    counts["seconds"] = time.perf_counter() - t0
+    counts["latencies"] = latencies
+    counts.update(db.busy_retry_stats())
+    db.close_all_connections()
+    results.put(counts)
+
+
+def _overlaps(path, day):
+    """Pairs of 'booked' bookings on day that overlap in the same room."""
+    conn = db.sqlite3.connect(path)
+    try:
+        return conn.execute("""
+            SELECT COUNT(*) FROM bookings a JOIN bookings b
+              ON a.room_id = b.room_id AND a.date = b.date AND a.id < b.id
+             AND a.start_time < b.end_time AND b.start_time < a.end_time
+            WHERE a.date = ? AND a.status = 'booked' AND b.status = 'booked'
+        """, (day,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run(path, procs=4, attempts=200, n_rooms=4, seed=1):
+    conn = db.sqlite3.connect(path)
+    migrate(conn)
+    rooms = [r[0] for r in conn.execute("SELECT id FROM rooms ORDER BY id LIMIT ?", (n_rooms,))]
+    conn.close()
+    day = (date.today() + timedelta(days=1000)).isoformat()  # a day nobody has booked
+
+    ctx = multiprocessing.get_context("spawn")
+    start_event, results = ctx.Event(), ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(path, rooms, day, attempts, seed + i, start_event, results))
+               for i in range(procs)]
+    for w in workers:
+        w.start()
+    time.sleep(0.5)  # let every process import and open its connection
+    t0 = time.perf_counter()
+    start_event.set()
+    per_proc = [results.get() for _ in workers]
+    wall = time.perf_counter() - t0
+    for w in workers:
+        w.join()
+
+    total = {k: sum(p[k] for p in per_proc) for k in ("ok", "conflict", "busy", "error", "retries", "gave_up")}
+    latencies = sorted(ms for p in per_proc for ms in p["latencies"])
+    tried = procs * attempts
+
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else None
+
+    return {
+        "processes": procs,
+        "attempts": tried,
+        "rooms": len(rooms),
+        "seconds": round(wall, 3),
+        "bookings": total["ok"],
+        "bookings_per_s": round(total["ok"] / wall, 1) if wall else None,
+        "attempts_per_s": round(tried / wall, 1) if wall else None,
+        "conflicts": total["conflict"],
+        "conflict_rate": round(total["conflict"] / tried, 4) if tried else 0.0,
+        "busy_retries": total["retries"],
+        "busy_gave_up": total["gave_up"],
+        "errors": total["error"],
+        "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": pct(1.0)},
+        "overlapping_pairs": _overlaps(path, day),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--db", help="database to copy (default: generate a tiny one)")
+    ap.add_argument("--procs", type=int, default=4, help="concurrent processes")
+    ap.add_argument("--attempts", type=int, default=200, help="booking attempts per process")
+    ap.add_argument("--rooms", type=int, default=4, help="rooms competed for")
+    ap.add_argument("--out", help="write the report as JSON")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_contention_")
+    try:
+        path = os.path.join(tmp, "contention.db")
+        if args.db:
+            shutil.copy(args.db, path)
+        else:
+            generate(path, seed=1, log=lambda *a: None, **SCALES["tiny"])
+        report = run(path, args.procs, args.attempts, args.rooms)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for key, value in report.items():
+        print(f"{key:20} {value}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.out}")
+    if report["overlapping_pairs"]:
+        sys.exit("double bookings found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Before/after latency of the hot db_manager calls with and without the
+persistent per-thread connection.
+
+Run from the project root (works on a temporary copy of the database):
+    python -m benchmarks.bench_connection [--repeat 2000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from database import db_manager as db
+from database.migrations import migrate
+
+SOURCE_DB = os.path.join("database", "student_app.db")
+USER_ID = "24WMD0188"
+
+
+def _seed(path, n_bookings=5000, n_notes=300):
+    """Add enough bookings/notes to the copy that the queries do real work."""
+    conn = sqlite3.connect(path)
+    cur = conn.cursor()
+    rooms = [r[0] for r in cur.execute("SELECT id FROM rooms")]
+    users = [u[0] for u in cur.execute("SELECT student_id FROM users")]
+    today = date.today()
+    for i in range(n_bookings):
+        # a distinct (room, day, hour) slot per booking: the schema rejects overlaps
+        slot = i // len(rooms)
+        day = (today + timedelta(days=slot % 30 - 15)).isoformat()
+        hour = 8 + (slot // 30) % 9
+        creator = users[i % len(users)]
+        try:
+            cur.execute(
+                "INSERT INTO bookings (room_id, date, start_time, end_time, status, created_by) "
+                "VALUES (?, ?, ?, ?, 'booked', ?)",
+                (rooms[i % len(rooms)], day, f"{hour:02d}:00", f"{hour + 1:02d}:00", creator)
+            )
+        except sqlite3.IntegrityError:
+            continue  # clashes with a booking already in the copied database
+        cur.execute(
+            "INSERT INTO booking_students (booking_id, student_id, student_name) VALUES (?, ?, '')",
+            (cur.lastrowid, creator)
+        )
+    for i in range(n_notes):
+        cur.execute(
+            "INSERT INTO notes (title, content, user_id) VALUES (?, ?, ?)",
+            (f"Bench note {i}", "lorem ipsum " * 40, USER_ID)
+        )
+    conn.commit()
+    conn.close()
+
+
+def _hot_calls():
+    note_id = db.list_notes(USER_ID, limit=1)[0]["id"]
+    day = date.today().isoformat()
+    return {
+        "list_notes": lambda: db.list_notes(USER_ID, limit=10),
+        "get_note": lambda: db.get_note(note_id, USER_ID),
+        "find_available_rooms": lambda: db.find_available_rooms(1, "F01", 1, day, "10:00", "12:00"),
+        "get_bookings_by_user": lambda: db.get_bookings_by_user(USER_ID),
+    }
+
+
+def _time(fn, repeat):
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_conn_")
+    path = os.path.join(tmp, "student_app.db")
+    shutil.copy(SOURCE_DB, path)
+    conn = sqlite3.connect(path)
+    migrate(conn)   # the checked-in database may predate note_overlays
+    conn.close()
+    _seed(path)
+
+    results = {}
+    try:
+        for label, persistent in (("before", False), ("after", True)):
+            db.PERSISTENT_CONNECTIONS = persistent
+            db.configure_connection(db_path=path)
+            for name, fn in _hot_calls().items():
+                results.setdefault(name, {})[label] = _time(fn, args.repeat)
+            db.close_connection()
+    finally:
+        db.PERSISTENT_CONNECTIONS = True
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{'call':<24}{'before mean/p50/p95 (us)':>30}{'after mean/p50/p95 (us)':>30}{'speedup':>10}")
+    for name, r in results.items():
+        b, a = r["before"], r["after"]
+        fmt = lambda t: f"{t[0]:.0f}/{t[1]:.0f}/{t[2]:.0f}"
+        print(f"{name:<24}{fmt(b):>30}{fmt(a):>30}{b[0] / a[0]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
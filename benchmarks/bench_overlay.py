@@ -0,0 +1,195 @@
+"""
+Cost of a note's ink overlay in memory, in serialize time and on disk: legacy
+JSON (points as [x, y] lists) against overlay_codec's binary form.
+
+For synthetic overlays of STROKE_COUNTS strokes it reports
+  - memory: Python-side bytes (tracemalloc) of the stroke points held as
+    JSON-decoded [x, y] lists, as QPoints (when PyQt5 is importable; wrappers
+    only, so a lower bound) and as the flat array('i') strokes now keep;
+  - time: encode/decode medians, JSON decode including the conversion to arrays;
+  - size: stored bytes as JSON, binary and binary + zlib.
+With --db it also re-encodes every overlay stored in that (migrated) database
+and reports the totals. No Qt needed.
+
+Run from the project root:
+    python -m benchmarks.bench_overlay
+    python -m benchmarks.bench_overlay --db /tmp/bench.db --out overlay_results.json
+    python -m benchmarks.bench_overlay --compare overlay_baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from notes_organizer_function import overlay_codec
+from benchmarks.bench_suite import _git_commit
+
+STROKE_COUNTS = (100, 1000, 5000)
+POINTS_PER_STROKE = 40
+
+
+def _overlay(n_strokes, seed=7):
+    """n_strokes random-walk strokes down a tall page, as JSON-shaped dicts."""
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(n_strokes):
+        x, y = rng.randint(0, 760), rng.randint(0, 3000)
+        pts = []
+        for _ in range(POINTS_PER_STROKE):
+            x += rng.randint(-5, 5)
+            y += rng.randint(-5, 5)
+            pts.append((x, y))
+        strokes.append({"points": pts, "color": (rng.randrange(256), 0, 0), "width": 3,
+                        "alpha": 255, "mode": "pen"})
+    return {"strokes": strokes, "images": []}
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return round(statistics.median(samples), 3)
+
+
+def _allocated_kb(build):
+    """KiB still allocated by what build() returns (kept alive until measured)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return round((after - before) / 1024, 1)
+
+
+def _memory(overlay):
+    pairs = [[tuple(p) for p in s["points"]] for s in overlay["strokes"]]
+    text = json.dumps(pairs)
+    out = {
+        "lists_kb": _allocated_kb(lambda: json.loads(text)),
+        "array_kb": _allocated_kb(lambda: [overlay_codec.stroke_xy({"points": pts}) for pts in pairs]),
+    }
+    try:
+        from PyQt5.QtCore import QPoint
+    except ImportError:
+        return out
+    out["qpoints_kb"] = _allocated_kb(lambda: [[QPoint(x, y) for x, y in pts] for pts in pairs])
+    return out
+
+
+def bench_synthetic(repeat, log=print):
+    results, sizes, memory = {}, {}, {}
+    for n in STROKE_COUNTS:
+        overlay = _overlay(n)
+        text = json.dumps(overlay)
+        decoded = overlay_codec.decode(text)          # strokes as arrays, what the editor saves
+        blob = overlay_codec.encode(decoded, compress=False)
+        packed = overlay_codec.encode(decoded, compress=True)
+        steps = {
+            f"json.encode({n} strokes)": lambda: json.dumps(overlay),
+            f"json.decode({n} strokes)": lambda: overlay_codec.decode(text),
+            f"binary.encode({n} strokes)": lambda: overlay_codec.encode(decoded, compress=False),
+            f"binary.decode({n} strokes)": lambda: overlay_codec.decode(blob),
+            f"binary_zlib.encode({n} strokes)": lambda: overlay_codec.encode(decoded, compress=True),
+            f"binary_zlib.decode({n} strokes)": lambda: overlay_codec.decode(packed),
+        }
+        for name, fn in steps.items():
+            results[name] = {"median_ms": _median_ms(fn, repeat)}
+            log(f"{name:40} {results[name]['median_ms']:>10.2f}")
+        sizes[f"{n} strokes"] = {"json": len(text.encode("utf-8")), "binary": len(blob), "binary_zlib": len(packed)}
+        memory[f"{n} strokes"] = _memory(overlay)
+    return results, sizes, memory
+
+
+def bench_stored(path):
+    """Re-encode every overlay stored in the database at path; byte totals."""
+    conn = sqlite3.connect(path)
+    totals = {"notes": 0, "unreadable": 0, "stored": 0, "binary": 0}
+    for (raw,) in conn.execute("SELECT overlay FROM note_overlays"):
+        totals["notes"] += 1
+        totals["stored"] += len(raw.encode("utf-8") if isinstance(raw, str) else raw)
+        try:
+            totals["binary"] += len(overlay_codec.encode(overlay_codec.decode(raw)))
+        except (ValueError, OverflowError):
+            totals["unreadable"] += 1
+    conn.close()
+    return totals
+
+
+def _print_tables(report):
+    print(f"\n{'stored bytes':16} {'json':>12} {'binary':>12} {'binary+zlib':>12}")
+    for name, s in report["sizes"].items():
+        print(f"{name:16} {s['json']:>12} {s['binary']:>12} {s['binary_zlib']:>12}")
+    print(f"\n{'points KiB':16} {'lists':>12} {'QPoints':>12} {'array(i)':>12}")
+    for name, m in report["memory"].items():
+        print(f"{name:16} {m['lists_kb']:>12} {m.get('qpoints_kb', '-'):>12} {m['array_kb']:>12}")
+    stored = report.get("stored")
+    if stored:
+        print(f"\n{stored['notes']} stored overlays: {stored['stored']} bytes now, "
+              f"{stored['binary']} bytes re-encoded ({stored['unreadable']} unreadable)")
+
+
+def compare(current, baseline, threshold=1.2):
+    """Print median ratios against a baseline; return names slower than threshold."""
+    slower = []
+    print(f"\n{'step':40} {'base ms':>10} {'now ms':>10} {'ratio':>8}")
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["median_ms"]:
+            continue
+        ratio = now["median_ms"] / base["median_ms"]
+        flag = "  <-- slower" if ratio > threshold else ""
+        print(f"{name:40} {base['median_ms']:>10.2f} {now['median_ms']:>10.2f} {ratio:>7.2f}x{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--db", help="also re-encode the overlays stored in this database (read only)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", default="overlay_results.json")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2)
+    args = ap.parse_args(argv)
+
+    print(f"{'step':40} {'median ms':>10}")
+    results, sizes, memory = bench_synthetic(args.repeat)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "points_per_stroke": POINTS_PER_STROKE,
+        },
+        "results": results,
+        "sizes": sizes,
+        "memory": memory,
+    }
+    if args.db:
+        report["meta"]["database"] = args.db
+        report["stored"] = bench_stored(args.db)
+    _print_tables(report)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Cold-start report: time from interpreter launch to the login screen being painted.
+
+Each run starts a fresh `python -X importtime` subprocess (offscreen Qt) that
+imports main, builds MainWindow and paints it once. The report gives wall
+clock per phase, the slowest imports and which feature packages were already
+loaded when the login screen appeared (ideally none).
+
+Run from the project root (check out an older commit to get the "before"):
+    python -m benchmarks.bench_startup --out startup.json
+    python -m benchmarks.bench_startup --compare startup_before.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from database.db_manager import DB_PATH
+
+FEATURE_PACKAGES = ("room_booking_function", "gpa_calculator_function", "notes_organizer_function")
+
+# Runs in the child process; prints one JSON line on stdout.
+_CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from database import db_manager
+db_manager.configure_connection(db_path=sys.argv[1])
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv[:1])
+t_qt = time.perf_counter()
+import main
+t_import = time.perf_counter()
+app.setStyleSheet(main.load_stylesheet())
+app.setFont(QFont("Segoe UI", 10))
+w = main.MainWindow()
+t_window = time.perf_counter()
+w.show()
+app.processEvents()
+w.grab()
+t_paint = time.perf_counter()
+print(json.dumps({
+    "qt_ms": (t_qt - t0) * 1000,
+    "import_main_ms": (t_import - t_qt) * 1000,
+    "construct_ms": (t_window - t_import) * 1000,
+    "first_paint_ms": (t_paint - t_window) * 1000,
+    "in_process_ms": (t_paint - t0) * 1000,
+    "feature_modules": sorted(m for m in sys.modules if m.split(".")[0] in %r),
+}))
+""" % (FEATURE_PACKAGES,)
+
+
+def _parse_importtime(stderr):
+    """Return {top-level package: cumulative us} from -X importtime output."""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _self, cumulative, name = line[len("import time:"):].split("|")
+            cumulative = int(cumulative)
+        except ValueError:
+            continue  # header line
+        if not name.startswith("  "):  # only modules imported directly from the top
+            totals[name.strip().split(".")[0]] += cumulative
+    return totals
+
+
+def run_once(db_path):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _CHILD, db_path],
+                          capture_output=True, text=True, env=env)
+    wall = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_wall_ms"] = wall
+    result["imports_us"] = _parse_importtime(proc.stderr)
+    return result
+
+
+def run(db_path, repeat=5, top=15):
+    runs = [run_once(db_path) for _ in range(repeat)]
+    phases = ("qt_ms", "import_main_ms", "construct_ms", "first_paint_ms", "in_process_ms", "process_wall_ms")
+    summary = {p: round(statistics.median(r[p] for r in runs), 2) for p in phases}
+    imports = defaultdict(list)
+    for r in runs:
+        for name, us in r["imports_us"].items():
+            imports[name].append(us)
+    slowest = sorted(((round(statistics.median(v) / 1000, 2), k) for k, v in imports.items()), reverse=True)[:top]
+    return {
+        "meta": {"python": sys.version.split()[0], "repeat": repeat,
+                 "qpa": os.environ.get("QT_QPA_PLATFORM", "offscreen")},
+        "summary": summary,
+        "slowest_imports_ms": {name: ms for ms, name in slowest},
+        "feature_modules_at_login": runs[-1]["feature_modules"],
+    }
+
+
+def _print(report):
+    print(f"{'phase':24} {'median ms':>10}")
+    for phase, ms in report["summary"].items():
+        print(f"{phase:24} {ms:>10.2f}")
+    print(f"\n{'import (cumulative)':40} {'ms':>10}")
+    for name, ms in report["slowest_imports_ms"].items():
+        print(f"{name:40} {ms:>10.2f}")
+    loaded = report["feature_modules_at_login"]
+    print(f"\nfeature modules loaded at login screen: {len(loaded)}")
+    for m in loaded:
+        print(f"  {m}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--db", default=DB_PATH, help="database to start against (a copy is used)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--out", default="startup.json")
+    ap.add_argument("--compare", help="earlier report to compare time-to-login-screen against")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        path = os.path.join(tmp, "startup.db")
+        shutil.copy(args.db, path)  # MainWindow runs migrations; keep the real DB untouched
+        report = run(path, args.repeat)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    _print(report)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            before = json.load(f)["summary"]
+        print(f"\n{'phase':24} {'before ms':>10} {'after ms':>10} {'ratio':>8}")
+        for phase, ms in report["summary"].items():
+            if before.get(phase):
+                print(f"{phase:24} {before[phase]:>10.2f} {ms:>10.2f} {ms / before[phase]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
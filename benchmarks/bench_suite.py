@@ -0,0 +1,349 @@
+"""
+Time every public db_manager function plus the page query paths and write
+the results as JSON.
+
+Run from the project root:
+    python -m benchmarks.bench_suite                          # generates a small DB in a temp dir
+    python -m benchmarks.bench_suite --db /tmp/full.db --out results.json
+    python -m benchmarks.bench_suite --db /tmp/full.db --compare baseline.json
+
+A database given with --db is copied first (pass --in-place to skip the copy
+for very large files; the write benchmarks then modify it). Public functions
+without a case are listed under "uncovered" so new APIs get noticed.
+"""
+import argparse
+import fnmatch
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from database import db_manager as db
+from benchmarks.generate_dataset import BENCH_USER, PASSWORD, SCALES, generate
+
+# Connection/cache plumbing rather than data access.
+NOT_BENCHMARKED = {"hash_password", "verify_password", "get_connection", "configure_connection",
+                   "close_connection", "close_all_connections", "invalidate_reference_cache",
+                   "reference_cache_stats", "session", "slot_mask",
+                   "add_booking_listener", "remove_booking_listener",
+                   "busy_retry_stats", "series_dates", "data_version"}
+
+
+def _fixtures(path):
+    """Ids the cases need, read straight from the benchmark database."""
+    conn = sqlite3.connect(path)
+    one = lambda sql, *a: (conn.execute(sql, a).fetchone() or (None,))[0]
+    fx = {
+        "user": BENCH_USER if one("SELECT 1 FROM users WHERE student_id=?", BENCH_USER)
+                else one("SELECT student_id FROM users LIMIT 1"),
+    }
+    fx["other_users"] = [r[0] for r in conn.execute(
+        "SELECT student_id FROM users WHERE student_id <> ? LIMIT 4", (fx["user"],))]
+    fx["location"] = one("SELECT location_id FROM rooms GROUP BY location_id ORDER BY COUNT(*) DESC LIMIT 1")
+    fx["room"], fx["feature"] = conn.execute(
+        "SELECT id, feature_id FROM rooms WHERE location_id=? LIMIT 1", (fx["location"],)).fetchone()
+    fx["day"] = one("SELECT date FROM bookings WHERE date >= ? GROUP BY date ORDER BY COUNT(*) DESC LIMIT 1",
+                    date.today().isoformat()) or date.today().isoformat()
+    fx["booking"] = one("SELECT id FROM bookings WHERE created_by=? ORDER BY id DESC LIMIT 1", fx["user"]) or 1
+    fx["note"] = one("SELECT n.id FROM notes n JOIN note_overlays o ON o.note_id = n.id WHERE n.user_id=? LIMIT 1",
+                     fx["user"]) or one("SELECT id FROM notes WHERE user_id=? LIMIT 1", fx["user"])
+    fx["folder"] = one("SELECT id FROM folders WHERE user_id=? AND parent_id IS NULL LIMIT 1", fx["user"])
+    fx["overlay"] = one("SELECT overlay FROM note_overlays LIMIT 1") or '{"strokes": [], "images": []}'
+    conn.close()
+    return fx
+
+
+def _cases(fx):
+    """name -> fn(i). Write cases use i to create fresh rows each iteration."""
+    u, loc, room, feat, day = fx["user"], fx["location"], fx["room"], fx["feature"], fx["day"]
+    others = fx["other_users"]
+    run_id = datetime.now().strftime("%H%M%S")
+    far = date.today() + timedelta(days=400)   # days nobody has booked
+    week_end = (date.fromisoformat(day) + timedelta(days=7)).isoformat()
+    made = {"bookings": [], "folders": [], "series": []}
+    page_ids = [row[0] for row in db.get_bookings_page(u, limit=30)]
+    booking_numbers = itertools.count(1)
+
+    def new_booking(i):
+        # a fresh, non-overlapping 30-minute slot per call (several cases create
+        # bookings with the same i, so number them separately)
+        n = next(booking_numbers)
+        slot = 8 * 60 + (n % 20) * 30
+        day = (far + timedelta(days=n // 20 + 1)).isoformat()
+        bid = db.create_booking_with_students(
+            u, room, day, f"{slot // 60:02d}:{slot % 60:02d}", f"{(slot + 30) // 60:02d}:{(slot + 30) % 60:02d}",
+            [u] + others[:2])
+        made["bookings"].append(bid)
+        return bid
+
+    def new_series(i):
+        # four weekly occurrences on days and slots no other iteration uses
+        slot = 8 * 60 + (i % 20) * 30
+        first = far + timedelta(days=200 + (i // 20) * 28)
+        series_id, _, _ = db.create_booking_series(
+            u, room, [(first + timedelta(weeks=n)).isoformat() for n in range(4)],
+            f"{slot // 60:02d}:{slot % 60:02d}", f"{(slot + 30) // 60:02d}:{(slot + 30) % 60:02d}",
+            [u] + others[:2])
+        made["series"].append(series_id)
+        return series_id
+
+    def pop(kind, factory, i):
+        return made[kind].pop() if made[kind] else factory(i)
+
+    cases = {
+        # users
+        "get_user": lambda i: db.get_user(u, PASSWORD),
+        "create_user": lambda i: db.create_user(f"B{run_id}{i:07d}", "Bench User", PASSWORD),
+        "get_profile_picture": lambda i: db.get_profile_picture(u),
+        # reference data
+        "get_locations": lambda i: db.get_locations(),
+        "get_location_name": lambda i: db.get_location_name(loc),
+        "get_features": lambda i: db.get_features(),
+        "get_rooms_by_location": lambda i: db.get_rooms_by_location(loc),
+        "check_student_exists": lambda i: db.check_student_exists(u),
+        "get_student_name": lambda i: db.get_student_name(u),
+        "resolve_students": lambda i: db.resolve_students([u] + others),
+        # bookings
+        "check_room_availability": lambda i: db.check_room_availability(room, day, "10:00", "12:00"),
+        "find_available_rooms": lambda i: db.find_available_rooms(loc, feat, 1, day, "10:00", "12:00"),
+        "get_location_occupancy": lambda i: db.get_location_occupancy(loc, day),
+        "get_location_occupancy_range": lambda i: db.get_location_occupancy_range(loc, day, week_end),
+        "get_room_day_mask": lambda i: db.get_room_day_mask(room, day),
+        "get_upcoming_booking_ends": lambda i: db.get_upcoming_booking_ends(day, "10:00"),
+        "get_bookings_for_timetable": lambda i: db.get_bookings_for_timetable(room, day),
+        "get_location_day_schedule": lambda i: db.get_location_day_schedule(loc, day),
+        "get_bookings_by_user": lambda i: db.get_bookings_by_user(u, loc),
+        "get_bookings_by_user_all_locations": lambda i: db.get_bookings_by_user_all_locations(u),
+        "get_booking_creator": lambda i: db.get_booking_creator(fx["booking"]),
+        "get_students_in_booking": lambda i: db.get_students_in_booking(fx["booking"]),
+        "get_students_for_bookings": lambda i: db.get_students_for_bookings(page_ids),
+        "get_bookings_page": lambda i: db.get_bookings_page(u, limit=30),
+        "create_booking_with_students": new_booking,
+        "add_booking_student": lambda i: db.add_booking_student(pop("bookings", new_booking, i), others[-1]),
+        "update_booking_status": lambda i: db.update_booking_status(fx["booking"], "booked"),
+        "delete_booking": lambda i: db.delete_booking(pop("bookings", new_booking, i)),
+        "update_expired_bookings": lambda i: db.update_expired_bookings(),
+        "find_series_conflicts": lambda i: db.find_series_conflicts(room, [day, week_end], "10:00", "12:00"),
+        "create_booking_series": new_series,
+        "cancel_booking_series": lambda i: db.cancel_booking_series(pop("series", new_series, i), far.isoformat()),
+        "get_booking_series_id": lambda i: db.get_booking_series_id(fx["booking"]),
+        # room utilization (usage aggregates)
+        "get_location_usage_heatmap": lambda i: db.get_location_usage_heatmap(loc),
+        "get_location_room_usage": lambda i: db.get_location_room_usage(loc, day, week_end),
+        "get_location_group_sizes": lambda i: db.get_location_group_sizes(loc),
+        # gpa
+        "save_gpa_calculation": lambda i: db.save_gpa_calculation(
+            u, 12, 3.5, 90, 3.4, [{"name": "Bench", "credits": 3, "grade": "A"}] * 4, 3.4, 90),
+        "get_gpa_history": lambda i: db.get_gpa_history(u),
+        # notes
+        "create_folder": lambda i: made["folders"].append(db.create_folder(f"Bench {i}", None, u)),
+        "get_folder": lambda i: db.get_folder(fx["folder"], u),
+        "list_folders": lambda i: db.list_folders(None, u),
+        "update_folder": lambda i: db.update_folder(fx["folder"], "Folder 0", None, u),
+        "delete_folder": lambda i: db.delete_folder(
+            made["folders"].pop() if made["folders"] else db.create_folder(f"Bench d{i}", None, u), u),
+        "list_notes": lambda i: db.list_notes(u),
+        "list_note_summaries": lambda i: db.list_note_summaries(u, with_content=True),  # as the note organizer opens
+        "get_note": lambda i: db.get_note(fx["note"], u),
+        "get_note_overlay": lambda i: db.get_note_overlay(fx["note"], u),
+        "create_note": lambda i: db.create_note(f"Bench note {i}", "lorem ipsum " * 50, u, fx["overlay"]),
+        "update_note": lambda i: db.update_note(fx["note"], "Bench note", "lorem ipsum " * 50, fx["overlay"], user_id=u),
+        "update_note_overlay": lambda i: db.update_note_overlay(fx["note"], fx["overlay"], u),
+        "get_notes_tool_prefs": lambda i: db.get_notes_tool_prefs(u),
+        "set_notes_tool_prefs": lambda i: db.set_notes_tool_prefs(u, {"eraser_mode": "normal"}),
+    }
+
+    # in-memory week availability matrix (room_booking_function.availability)
+    from room_booking_function.availability import get_week_availability, recommend
+    week = get_week_availability(loc)
+    today = date.today().isoformat()
+    cases["availability:day"] = lambda i: week.day(today)
+    cases["availability:free_rooms"] = lambda i: week.free_rooms(today, "10:00", "12:00", feat, 1)
+    cases["availability:recommend"] = lambda i: recommend(loc, feat, 4, today, "10:00", "12:00")
+    return cases
+
+
+def _page_cases(fx):
+    """The background loaders the pages use (need PyQt5 importable)."""
+    try:
+        from notes_organizer_function import dashboard
+        from room_booking_function import booking_list_view, timetable, utilization
+    except ImportError as e:
+        return {}, str(e)
+    u = fx["user"]
+    notes_sql = ("SELECT id, title, COALESCE(updated_at, created_at) AS modified_at FROM notes "
+                 "WHERE user_id=? ORDER BY modified_at DESC, LOWER(title)", [u])
+    search_sql = ("SELECT id, title, COALESCE(updated_at, created_at) AS modified_at FROM notes "
+                  "WHERE user_id=? AND LOWER(title) LIKE ? ORDER BY modified_at DESC, LOWER(title)", [u, "%note 1%"])
+    folders_sql = ("SELECT id, name FROM folders WHERE parent_id IS NULL AND user_id=? ORDER BY LOWER(name)", (u,))
+    return {
+        "page:dashboard_center": lambda i: dashboard._load_center(notes_sql, None),
+        "page:dashboard_search": lambda i: dashboard._load_center(search_sql, folders_sql),
+        "page:all_bookings": lambda i: booking_list_view._fetch_page(u, None, None),
+        "page:my_bookings": lambda i: booking_list_view._fetch_page(u, fx["location"], None),
+        "page:timetable": lambda i: timetable._load_timetable(fx["location"], fx["day"]),
+        "page:utilization": lambda i: utilization._load_utilization(fx["location"], 84),
+    }, None
+
+
+def _rows(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def _measure(fn, repeat, min_seconds):
+    rows = _rows(fn(-1))   # warm-up (also primes caches)
+    samples = []
+    t_end = time.perf_counter() + min_seconds
+    i = 0
+    while i < repeat or time.perf_counter() < t_end:
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1e6)
+        i += 1
+        if i >= repeat * 20:
+            break
+    samples.sort()
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))], 2)
+    return {
+        "n": len(samples),
+        "rows": rows,
+        "mean_us": round(statistics.mean(samples), 2),
+        "p50_us": pick(0.50),
+        "p95_us": pick(0.95),
+        "p99_us": pick(0.99),
+        "min_us": round(samples[0], 2),
+        "max_us": round(samples[-1], 2),
+    }
+
+
+def _table_counts(path):
+    conn = sqlite3.connect(path)
+    out = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+           for t in ("users", "rooms", "bookings", "booking_students", "folders", "notes", "gpa_history")}
+    conn.close()
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(path, repeat=200, min_seconds=0.0, only=None, cache=True, log=print):
+    db.configure_connection(db_path=path)
+    db.REFERENCE_CACHE_ENABLED = cache
+    fx = _fixtures(path)
+    cases = _cases(fx)
+    page_cases, page_skip = _page_cases(fx)
+    cases.update(page_cases)
+
+    public = sorted(name for name, fn in vars(db).items()
+                    if inspect.isfunction(fn) and not name.startswith("_")
+                    and fn.__module__ == db.__name__ and name not in NOT_BENCHMARKED)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "reference_cache": cache,
+            "tables": _table_counts(path),
+        },
+        "results": {},
+        "skipped": {},
+        "uncovered": [name for name in public if name not in cases],
+    }
+    if page_skip:
+        report["skipped"]["page:*"] = page_skip
+    for name, fn in cases.items():
+        if only and not any(fnmatch.fnmatch(name, pat) for pat in only):
+            continue
+        try:
+            stats = _measure(fn, repeat, min_seconds)
+        except Exception as e:
+            report["skipped"][name] = f"{type(e).__name__}: {e}"
+            continue
+        report["results"][name] = stats
+        log(f"{name:38} {stats['mean_us']:>12.1f} {stats['p50_us']:>12.1f} {stats['p95_us']:>12.1f} {stats['rows']:>7}")
+    db.close_connection()
+    return report
+
+
+def compare(current, baseline, threshold=1.2):
+    """Print per-case p50 ratios; return names that got slower than threshold."""
+    slower = []
+    print(f"\n{'case':38} {'base p50':>12} {'now p50':>12} {'ratio':>8}")
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = now["p50_us"] / base["p50_us"] if base["p50_us"] else float("inf")
+        flag = "  <-- slower" if ratio > threshold else ""
+        print(f"{name:38} {base['p50_us']:>12.1f} {now['p50_us']:>12.1f} {ratio:>7.2f}x{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--db", help="benchmark database (see benchmarks.generate_dataset)")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small",
+                    help="size of the generated database when --db is not given")
+    ap.add_argument("--in-place", action="store_true", help="use --db directly instead of a copy")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--min-seconds", type=float, default=0.0, help="keep sampling each case at least this long")
+    ap.add_argument("--only", action="append", help="glob of case names to run (repeatable)")
+    ap.add_argument("--no-cache", action="store_true", help="disable the reference data cache")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio that counts as a regression")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        path = os.path.join(tmp, "bench.db")
+        if args.db and args.in_place:
+            path = args.db
+        elif args.db:
+            shutil.copy(args.db, path)
+        else:
+            generate(path, seed=1, **SCALES[args.scale])
+        print(f"{'case':38} {'mean us':>12} {'p50 us':>12} {'p95 us':>12} {'rows':>7}")
+        report = run(path, args.repeat, args.min_seconds, args.only, cache=not args.no_cache)
+        report["meta"]["database"] = args.db or f"generated:{args.scale}"
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.out}")
+        if report["skipped"]:
+            print("skipped: " + ", ".join(f"{k} ({v})" for k, v in report["skipped"].items()))
+        if report["uncovered"]:
+            print("no benchmark case for: " + ", ".join(report["uncovered"]))
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+            if compare(report, baseline, args.threshold):
+                sys.exit(1)
+    finally:
+        db.close_all_connections()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Headless timing of the app's real pages against a generated database.
+
+Builds MainWindow, DashboardWidget, NoteOrganizerWidget, TimetablePage,
+AllBookingsPage and GPAHistory under the offscreen Qt platform and times
+construction, first paint, refreshes and InkTextEdit loads, saves, repaints,
+tile rebuilds, erasing and pen segments with many strokes. Background DB work (see database.db_executor) is waited for, so a
+refresh is timed until its result is on screen.
+
+Run from the project root:
+    python -m benchmarks.bench_ui                       # generates a small DB in a temp dir
+    python -m benchmarks.bench_ui --db /tmp/bench.db --out ui_results.json
+    python -m benchmarks.bench_ui --compare ui_baseline.json
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from PyQt5.QtCore import QT_VERSION_STR, QEvent, QPoint
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QApplication
+
+from database import db_manager as db
+from database.db_executor import get_executor
+from benchmarks.generate_dataset import SCALES, generate
+from benchmarks.bench_suite import _fixtures, _git_commit, _table_counts
+from benchmarks.bench_overlay import _overlay
+
+STROKE_COUNTS = (100, 1000, 5000)
+SEGMENTS_PER_SAMPLE = 50   # pen segments drawn per draw_segment sample
+
+
+def _settle(app):
+    """Run the event loop until every queued background DB call has been delivered."""
+    executor = get_executor()
+    while True:
+        executor.wait()
+        app.processEvents()
+        if executor.pending() == 0:
+            app.processEvents()
+            return
+
+
+def _dispose(app, *widgets):
+    for w in widgets:
+        w.hide()
+        w.deleteLater()
+    _settle(app)
+    # outside a running event loop processEvents() never delivers DeferredDelete,
+    # so without this every repeat would keep the previous pages alive
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+    app.processEvents()
+
+
+class _Timer:
+    """Collects wall-clock samples (ms) and widget counts per step."""
+    def __init__(self, app):
+        self.app = app
+        self.samples = {}
+        self.widgets = {}
+
+    def run(self, name, fn, settle=True, per=1):
+        """Time fn() (and the DB work it queues); per > 1 records the time per unit of work."""
+        t0 = time.perf_counter()
+        result = fn()
+        if settle:
+            _settle(self.app)
+        self.samples.setdefault(name, []).append((time.perf_counter() - t0) * 1000.0 / per)
+        self.widgets[name] = len(self.app.allWidgets())
+        return result
+
+    def report(self):
+        out = {}
+        for name, s in self.samples.items():
+            out[name] = {
+                "n": len(s),
+                "median_ms": round(statistics.median(s), 3),
+                "min_ms": round(min(s), 3),
+                "max_ms": round(max(s), 3),
+                "widgets_alive": self.widgets[name],
+            }
+        return out
+
+
+def _paint(w):
+    """Force a full synchronous paint of w (and its children)."""
+    w.grab()
+
+
+def bench_main_window(t, app, fx):
+    from main import MainWindow
+    w = t.run("MainWindow.construct", MainWindow)
+    w.show()
+    t.run("MainWindow.first_paint", lambda: _paint(w))
+    t.run("MainWindow.login", lambda: w.handle_login_success(fx["user"], fx["user_name"]))
+    t.run("MainWindow.paint_after_login", lambda: _paint(w))
+    _dispose(app, w)
+
+
+def bench_dashboard(t, app, fx):
+    from notes_organizer_function.dashboard import DashboardWidget
+    d = t.run("DashboardWidget.construct", lambda: DashboardWidget(fx["user"]))
+    d.resize(800, 800)
+    d.show()
+    t.run("DashboardWidget.first_paint", lambda: _paint(d))
+    t.run("DashboardWidget._refresh_folders", d._refresh_folders)
+    # expand every folder: worst case for the sidebar
+    d._expanded_folders = {r[0] for r in db.get_connection().execute(
+        "SELECT id FROM folders WHERE user_id=?", (fx["user"],))}
+    t.run("DashboardWidget._refresh_folders(expanded)", d._refresh_folders)
+    t.run("DashboardWidget._refilter_notes", d._refilter_notes)
+
+    def type_search():
+        for ch in "note 1":
+            d.search_bar.setText(d.search_bar.text() + ch)
+            d._refilter_notes()
+    t.run("DashboardWidget.type_search", type_search)
+    d.search_bar.clear()
+    d._set_view_mode("grid")
+    t.run("DashboardWidget._refilter_notes(grid)", d._refilter_notes)
+    t.run("DashboardWidget.paint(grid)", lambda: _paint(d))
+    _dispose(app, d)
+
+
+def bench_note_organizer(t, app, fx):
+    from notes_organizer_function.notes_organizer import NoteOrganizerWidget
+    w = t.run("NoteOrganizerWidget.construct", lambda: NoteOrganizerWidget(user_id=fx["user"]))
+    w.resize(800, 900)
+    w.show()
+    t.run("NoteOrganizerWidget.first_paint", lambda: _paint(w))
+    t.run("NoteOrganizerWidget._save_active", w._save_active)
+    _dispose(app, w)
+
+
+def bench_timetable(t, app, fx):
+    from room_booking_function.timetable import TimetablePage
+    host = SimpleNamespace(location_id=fx["location"], location_name=db.get_location_name(fx["location"]))
+    p = t.run("TimetablePage.construct", lambda: TimetablePage(host))
+    p.resize(800, 800)
+    p.show()
+    t.run("TimetablePage.first_paint", lambda: _paint(p))
+    t.run("TimetablePage.show_timetable", p.show_timetable)
+    t.run("TimetablePage.paint", lambda: _paint(p))
+    t.run("TimetablePage.filter(capacity)", lambda: p.capacity_spin.setValue(p.capacity_spin.value() % 5 + 1))
+    _dispose(app, p)
+
+
+def bench_all_bookings(t, app, fx):
+    from room_booking_function.all_booking import AllBookingsPage
+    host = SimpleNamespace(user_id=fx["user"])
+    p = t.run("AllBookingsPage.construct", lambda: AllBookingsPage(host))
+    p.resize(800, 800)
+    t.run("AllBookingsPage.load_bookings", p.load_bookings)
+    p.show()
+    t.run("AllBookingsPage.first_paint", lambda: _paint(p))
+    t.run("AllBookingsPage.reload", p.load_bookings)
+    # scrolling to the end asks for the next page (keyset pagination)
+    t.run("AllBookingsPage.load_more", p.bookings_list.list.scrollToBottom)
+    # showing again without booking changes must not reload
+    t.run("AllBookingsPage.reshow", lambda: (p.hide(), p.show()))
+    _dispose(app, p)
+
+
+def bench_gpa_history(t, app, fx):
+    from PyQt5.QtWidgets import QPushButton, QStackedWidget, QVBoxLayout, QWidget
+    from gpa_calculator_function.gpaHistory import GPAHistory
+    history = db.get_gpa_history(fx["user"], limit=100)
+    # stand-in for GPACalculatorWidget: the page drives its back button and page stack
+    host = QWidget()
+    host.back_btn = QPushButton("Back")
+    host.pages = QStackedWidget()
+    host.feature_grid_page = QWidget()
+    host.pages.addWidget(host.feature_grid_page)
+    lay = QVBoxLayout(host)
+    lay.addWidget(host.back_btn)
+    lay.addWidget(host.pages)
+    w = t.run("GPAHistory.construct", lambda: GPAHistory(host, history, host.feature_grid_page))
+    host.pages.addWidget(w)
+    host.pages.setCurrentWidget(w)
+    host.resize(800, 800)
+    host.show()
+    t.run("GPAHistory.first_paint", lambda: _paint(host))
+    _dispose(app, host)
+
+
+def bench_ink(t, app, _fx):
+    from notes_organizer_function.notes_organizer import InkTextEdit
+    from notes_organizer_function import overlay_codec
+    for n in STROKE_COUNTS:
+        ed = InkTextEdit()
+        ed.resize(800, 900)
+        ed.setPlainText("\n".join("line %d" % i for i in range(200)))
+        ed.show()
+        t.run(f"InkTextEdit.load({n} strokes)", lambda: ed.dict_to_overlay(_overlay(n)), settle=False)
+        t.run(f"InkTextEdit.save({n} strokes)", lambda: overlay_codec.encode(ed.overlay_to_dict()), settle=False)
+        _paint(ed)  # warm-up
+        t.run(f"InkTextEdit.repaint({n} strokes)", lambda: _paint(ed), settle=False)
+        ed.verticalScrollBar().setValue(ed.verticalScrollBar().maximum() // 2)
+        # every visible tile rendered from the strokes, then the same view from the warm cache
+        t.run(f"InkTextEdit.tile_rebuild({n} strokes)", lambda: (ed._invalidate_ink(), _paint(ed)), settle=False)
+        t.run(f"InkTextEdit.repaint_scrolled({n} strokes)", lambda: _paint(ed), settle=False)
+        ed.ink_tiles = False   # culled stroke painting without the tile cache
+        t.run(f"InkTextEdit.repaint_untiled({n} strokes)", lambda: _paint(ed), settle=False)
+        ed.ink_tiles = True
+        # one eraser swipe across the middle of the note, undone so every run erases the same
+        swipe = [QPoint(100 + 3 * i, 1500 + i) for i in range(150)]
+        t.run(f"InkTextEdit.erase({n} strokes)", lambda: (ed._apply_eraser(swipe), ed.undo()), settle=False)
+        _paint(ed)  # rebuild the tiles the erase dropped; that cost is tile_rebuild's, not the pen's
+        # input-to-ink: pen segments, each painted (only its dirty rect) before the next
+        ed.set_mode("pen")
+        ed._current_pts = [ed._to_doc(QPoint(100, 300))]
+        ed._live_begin()
+        step = iter(range(10 ** 9))
+
+        def draw_segments():
+            for _ in range(SEGMENTS_PER_SAMPLE):
+                ed._live_extend(ed._to_doc(QPoint(100 + next(step) % 600, 300)))
+                app.processEvents()
+        t.run(f"InkTextEdit.draw_segment({n} strokes)", draw_segments, settle=False, per=SEGMENTS_PER_SAMPLE)
+        ed._current_pts, ed._live = [], None
+        _dispose(app, ed)
+
+
+BENCHES = {
+    "main_window": bench_main_window,
+    "dashboard": bench_dashboard,
+    "note_organizer": bench_note_organizer,
+    "timetable": bench_timetable,
+    "all_bookings": bench_all_bookings,
+    "gpa_history": bench_gpa_history,
+    "ink": bench_ink,
+}
+
+
+def run(path, repeat=5, only=None, log=print):
+    from styles.styles import load_stylesheet
+
+    db.configure_connection(db_path=path)
+    fx = _fixtures(path)
+    fx["user_name"] = db.get_student_name(fx["user"]) or "Bench User"
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    app.setStyleSheet(load_stylesheet())
+    app.setFont(QFont("Segoe UI", 10))
+
+    t = _Timer(app)
+    for name, bench in BENCHES.items():
+        if only and name not in only:
+            continue
+        for _ in range(repeat):
+            bench(t, app, fx)
+
+    results = t.report()
+    for name, r in results.items():
+        log(f"{name:48} {r['median_ms']:>10.2f} {r['min_ms']:>10.2f} {r['max_ms']:>10.2f} {r['widgets_alive']:>8}")
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+            "repeat": repeat,
+            "tables": _table_counts(path),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=1.2):
+    """Print median ratios against a baseline; return names slower than threshold."""
+    slower = []
+    print(f"\n{'step':48} {'base ms':>10} {'now ms':>10} {'ratio':>8}")
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["median_ms"]:
+            continue
+        ratio = now["median_ms"] / base["median_ms"]
+        flag = "  <-- slower" if ratio > threshold else ""
+        print(f"{name:48} {base['median_ms']:>10.2f} {now['median_ms']:>10.2f} {ratio:>7.2f}x{flag}")
+        if ratio > threshold:
+            slower.append(name)
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--db", help="benchmark database (see benchmarks.generate_dataset)")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small",
+                    help="size of the generated database when --db is not given")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", action="append", choices=sorted(BENCHES), help="run only these pages (repeatable)")
+    ap.add_argument("--out", default="ui_results.json")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.2)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_ui_")
+    try:
+        path = os.path.join(tmp, "bench.db")
+        if args.db:
+            shutil.copy(args.db, path)
+        else:
+            generate(path, seed=1, **SCALES[args.scale])
+        print(f"{'step':48} {'median ms':>10} {'min ms':>10} {'max ms':>10} {'widgets':>8}")
+        report = run(path, args.repeat, args.only)
+        report["meta"]["database"] = args.db or f"generated:{args.scale}"
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.out}")
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+            if compare(report, baseline, args.threshold):
+                sys.exit(1)
+    finally:
+        db.close_all_connections()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
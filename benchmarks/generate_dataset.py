@@ -0,0 +1,282 @@
+"""
+Build a synthetic student_app database at realistic scale.
+
+The schema, locations and features are copied from the project database;
+everything else is generated deterministically from --seed. Indexes and
+migrations are applied after the bulk load (much faster than inserting into
+indexed tables).
+
+Run from the project root:
+    python -m benchmarks.generate_dataset --scale small --out /tmp/bench.db
+    python -m benchmarks.generate_dataset --scale full --out /tmp/full.db
+    python -m benchmarks.generate_dataset --students 20000 --bookings 1000000 --out /tmp/custom.db
+
+All generated users share the password "password". BENCH_USER is a heavy user
+who takes part in a share of all bookings and owns a large notes tree; the
+benchmark suite uses it for its per-user queries.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from database import db_manager as db
+from database.migrations import migrate
+
+SOURCE_DB = os.path.join("database", "student_app.db")
+BENCH_USER = "24WMD00000"
+PASSWORD = "password"
+
+# Row counts per preset. "full" is the production-sized target.
+SCALES = {
+    "tiny":   dict(students=200,    rooms=60,   bookings=5_000,     notes=2_000,     gpa=1_000),
+    "small":  dict(students=2_000,  rooms=200,  bookings=100_000,   notes=20_000,    gpa=10_000),
+    "medium": dict(students=10_000, rooms=800,  bookings=1_000_000, notes=200_000,   gpa=100_000),
+    "full":   dict(students=50_000, rooms=2_000, bookings=5_000_000, notes=1_000_000, gpa=500_000),
+}
+
+DAY_START, DAY_END, SLOT = 8 * 60, 18 * 60 + 30, 30     # bookable window, minutes
+BATCH = 20_000
+WORDS = ("lecture tutorial exam revision summary chapter lab report project group "
+         "deadline formula theorem proof data model network design review notes").split()
+GRADES = ("A+", "A", "A-", "B+", "B", "B-", "C+", "C", "F")
+COURSES = ("Calculus", "Data Structures", "Databases", "Networks", "Statistics",
+           "Operating Systems", "Algorithms", "Discrete Maths", "Software Engineering")
+
+
+def _hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _create_schema(conn):
+    """Copy table definitions (not data, not indexes) from the project database."""
+    src = sqlite3.connect(SOURCE_DB)
+    tables = src.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    indexes = [r[0] for r in src.execute(
+        "SELECT sql FROM sqlite_master WHERE type='index' AND sql IS NOT NULL")]
+    locations = src.execute("SELECT id, name FROM locations ORDER BY id").fetchall()
+    features = src.execute("SELECT id, name FROM features ORDER BY id").fetchall()
+    src.close()
+    for _name, sql in tables:
+        conn.execute(sql)
+    conn.executemany("INSERT INTO locations (id, name) VALUES (?, ?)", locations)
+    conn.executemany("INSERT INTO features (id, name) VALUES (?, ?)", features)
+    return indexes, [l[0] for l in locations], [f[0] for f in features]
+
+
+def _insert(conn, sql, rows):
+    """executemany in batches from any iterable of tuples; returns the row count."""
+    batch, n = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            n += len(batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+        n += len(batch)
+    return n
+
+
+def _students(rng, n):
+    ids = [BENCH_USER] + [f"{rng.choice((22, 23, 24, 25))}WMD{i:05d}" for i in range(1, n)]
+    names = [f"Student {i}" for i in range(n)]
+    return ids, names
+
+
+def _bookings(rng, n, rooms, students, names, days):
+    """
+    Yield (booking row, [booking_students rows]) with no overlapping bookings
+    per room/day. Dates are centred on today so both expired and upcoming
+    bookings exist.
+    """
+    today = date.today()
+    first = today - timedelta(days=days * 2 // 3)
+    slots = (DAY_END - DAY_START) // SLOT
+    per_room_day = n / (len(rooms) * days)
+    name_of = dict(zip(students, names))
+    booking_id = 0
+    for d in range(days):
+        day = first + timedelta(days=d)
+        past = day < today
+        for room in rooms:
+            # stochastic rounding keeps the total close to n
+            k = int(per_room_day) + (rng.random() < per_room_day % 1)
+            slot = rng.randrange(0, 3)
+            while k > 0 and slot < slots and booking_id < n:
+                length = rng.randint(1, 4)
+                if slot + length > slots:
+                    break
+                booking_id += 1
+                k -= 1
+                creator = BENCH_USER if rng.random() < 0.002 else rng.choice(students)
+                if rng.random() < 0.1:
+                    status = "cancelled"
+                else:
+                    status = "completed" if past and rng.random() < 0.8 else "booked"
+                start, end = DAY_START + slot * SLOT, DAY_START + (slot + length) * SLOT
+                members = {creator}
+                for _ in range(rng.randint(0, 3)):
+                    members.add(rng.choice(students))
+                if rng.random() < 0.002:
+                    members.add(BENCH_USER)
+                yield ((booking_id, room, day.isoformat(), _hhmm(start), _hhmm(end), status, creator),
+                       [(booking_id, s, name_of[s]) for s in members])
+                slot += length + rng.randint(0, 3)
+            if booking_id >= n:
+                return
+
+
+def _overlay(rng):
+    strokes = []
+    for _ in range(rng.randint(1, 6)):
+        x, y = rng.randint(0, 700), rng.randint(0, 900)
+        pts = []
+        for _ in range(rng.randint(10, 80)):
+            x += rng.randint(-6, 6)
+            y += rng.randint(-6, 6)
+            pts.append((x, y))
+        strokes.append({"points": pts, "color": (rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+                        "width": rng.choice((2, 3, 4, 8)), "alpha": rng.choice((255, 120)),
+                        "mode": rng.choice(("pen", "pen", "highlighter"))})
+    return json.dumps({"strokes": strokes, "images": []})
+
+
+def _text(rng, lo, hi):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def generate(out, students=2_000, rooms=200, bookings=100_000, notes=20_000, gpa=10_000,
+             days=180, overlay_ratio=0.3, seed=1, log=print):
+    """Create a database at `out` (must not exist) and return row counts."""
+    if os.path.exists(out):
+        raise FileExistsError(f"{out} already exists")
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(out)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    indexes, location_ids, feature_ids = _create_schema(conn)
+
+    # enough days that each room-day holds at most ~6 bookings
+    days = max(days, math.ceil(bookings / (rooms * 6)))
+    counts = {}
+
+    student_ids, names = _students(rng, students)
+    pw_hash, pw_salt = db.hash_password(PASSWORD, "bench")
+    counts["users"] = _insert(conn, "INSERT INTO users VALUES (?, ?, ?, ?, NULL)",
+                              ((s, n, pw_hash, pw_salt) for s, n in zip(student_ids, names)))
+    log(f"users: {counts['users']}")
+
+    room_ids = [f"R{i:05d}" for i in range(rooms)]
+    counts["rooms"] = _insert(conn, "INSERT INTO rooms (id, location_id, capacity, name, feature_id) VALUES (?, ?, ?, ?, ?)",
+                              ((r, rng.choice(location_ids), rng.randint(2, 10), f"Room {r[1:]}", rng.choice(feature_ids))
+                               for r in room_ids))
+    log(f"rooms: {counts['rooms']}")
+
+    members = []
+    def booking_rows():
+        for row, people in _bookings(rng, bookings, room_ids, student_ids, names, days):
+            members.extend(people)
+            if len(members) >= BATCH:
+                conn.executemany("INSERT INTO booking_students VALUES (?, ?, ?)", members)
+                members.clear()
+            yield row
+    counts["bookings"] = _insert(conn, "INSERT INTO bookings (id, room_id, date, start_time, end_time, status, created_by) "
+                                       "VALUES (?, ?, ?, ?, ?, ?, ?)", booking_rows())
+    conn.executemany("INSERT INTO booking_students VALUES (?, ?, ?)", members)
+    conn.execute("INSERT OR REPLACE INTO sqlite_sequence (name, seq) VALUES ('bookings', ?)", (counts["bookings"],))
+    log(f"bookings: {counts['bookings']}")
+
+    # folders: a few per user who has notes, BENCH_USER gets a deep tree
+    folder_rows, folders_of = [], {}
+    fid = 0
+    for s in [BENCH_USER] + rng.sample(student_ids, min(len(student_ids), max(1, notes // 50))):
+        parents = [None]
+        for i in range(60 if s == BENCH_USER else rng.randint(1, 5)):
+            fid += 1
+            parent = rng.choice(parents)
+            folder_rows.append((fid, f"Folder {i}", parent, s))
+            parents.append(fid)
+        folders_of[s] = parents
+    counts["folders"] = _insert(conn, "INSERT INTO folders (id, name, parent_id, user_id) VALUES (?, ?, ?, ?)", folder_rows)
+    owners = list(folders_of)
+
+    def note_rows():
+        base = datetime.now() - timedelta(days=days)
+        for i in range(notes):
+            owner = BENCH_USER if i % 20 == 0 else rng.choice(owners)
+            ts = (base + timedelta(minutes=rng.randrange(days * 1440))).strftime("%Y-%m-%d %H:%M:%S")
+            overlay = _overlay(rng) if rng.random() < overlay_ratio else None
+            yield (f"Note {i} {rng.choice(WORDS)}", _text(rng, 20, 300), overlay, owner,
+                   rng.choice(folders_of[owner]), ts, ts)
+    counts["notes"] = _insert(conn, "INSERT INTO notes (title, content, overlay, user_id, folder_id, created_at, updated_at) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?)", note_rows())
+    log(f"notes: {counts['notes']}")
+
+    courses = []
+    def gpa_rows():
+        for i in range(1, gpa + 1):
+            owner = BENCH_USER if i % 100 == 0 else rng.choice(student_ids)
+            n_courses = rng.randint(3, 6)
+            credits = 0
+            for _ in range(n_courses):
+                c = rng.choice((2, 3, 4))
+                credits += c
+                courses.append((i, rng.choice(COURSES), c, rng.choice(GRADES)))
+            if len(courses) >= BATCH:
+                conn.executemany("INSERT INTO gpa_courses (gpa_history_id, name, credits, grade) VALUES (?, ?, ?, ?)", courses)
+                courses.clear()
+            g = round(rng.uniform(1.5, 4.0), 2)
+            ts = (date.today() - timedelta(days=rng.randrange(1500))).isoformat() + " 12:00"
+            yield (i, owner, ts, credits, g, credits * 3, g, g, credits * 3)
+    counts["gpa_history"] = _insert(conn, "INSERT INTO gpa_history (id, student_id, timestamp, semester_credits, gpa, "
+                                          "total_credits, cgpa, current_cgpa, completed_credits) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    gpa_rows())
+    conn.executemany("INSERT INTO gpa_courses (gpa_history_id, name, credits, grade) VALUES (?, ?, ?, ?)", courses)
+    log(f"gpa_history: {counts['gpa_history']}")
+    conn.commit()
+
+    log("building indexes...")
+    for sql in indexes:
+        conn.execute(sql.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+    conn.commit()
+    migrate(conn)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    log(f"done in {time.perf_counter() - t0:.1f}s -> {out}")
+    return counts
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--out", required=True, help="path of the database to create")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for key in SCALES["small"]:
+        ap.add_argument(f"--{key}", type=int, help=f"override the preset's {key} count")
+    ap.add_argument("--days", type=int, default=180, help="minimum span of booking dates")
+    ap.add_argument("--overlay-ratio", type=float, default=0.3, help="share of notes with ink overlays")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    sizes = dict(SCALES[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+    try:
+        generate(args.out, days=args.days, overlay_ratio=args.overlay_ratio, seed=args.seed, **sizes)
+    except FileExistsError as e:
+        sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Background sweeper that marks bookings 'completed' once their end time passes.
+
+Instead of running update_expired_bookings() on every page load (a write
+transaction on a read path), one daemon thread keeps a min-heap of today's
+upcoming booking end times and sleeps until the earliest one, then runs the
+batched, index-backed sweep. The heap is reloaded after every sweep, at
+midnight and whenever db_manager reports a booking change for today, so new
+bookings are picked up without polling. Bookings written by other
+connections are not reported, so an idle wait of MAX_SLEEP_SECONDS also
+reloads.
+
+    from database.booking_expiry import start_expiry_scheduler, stop_expiry_scheduler
+    start_expiry_scheduler()     # sweeps anything already expired, then waits
+    ...
+    stop_expiry_scheduler()
+"""
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from database import db_manager
+
+# Upper bound on one sleep, so a changed wall clock (sleep/resume, DST) and
+# bookings added by other connections or processes are noticed.
+MAX_SLEEP_SECONDS = 15 * 60
+
+
+class ExpiryScheduler:
+    def __init__(self, batch_size=500, clock=datetime.now):
+        self.batch_size = batch_size
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._heap = []            # datetimes of upcoming end times (today)
+        self._reload = True
+        self._stopped = False
+        self._thread = None
+        self.swept = 0             # bookings completed since start
+
+    # ---- control
+    def start(self):
+        if self._thread is not None:
+            return
+        db_manager.add_booking_listener(self._on_booking_change)
+        self._thread = threading.Thread(target=self._run, name="booking-expiry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        db_manager.remove_booking_listener(self._on_booking_change)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        """Reload upcoming end times and sweep if anything is due."""
+        with self._cond:
+            self._reload = True
+            self._cond.notify()
+
+    def _on_booking_change(self, room_id, date):
+        if date == self.clock().strftime("%Y-%m-%d"):
+            self.wake()
+
+    # ---- worker
+    def _sweep(self):
+        try:
+            n = db_manager.update_expired_bookings(self.batch_size)
+        except Exception as e:
+            print(f"Booking expiry sweep failed: {e}")
+            return
+        if n:
+            self.swept += n
+            print(f"Updated {n} expired bookings to 'completed' status")
+
+    def _load(self, now):
+        """Heap of today's remaining end times plus next midnight (day rollover)."""
+        today = now.strftime("%Y-%m-%d")
+        try:
+            ends = db_manager.get_upcoming_booking_ends(today, now.strftime("%H:%M"))
+        except Exception as e:
+            print(f"Booking expiry reload failed: {e}")
+            ends = []
+        day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        heap = [day + timedelta(minutes=m) for m in ends]
+        heap.append(day + timedelta(days=1))
+        heapq.heapify(heap)
+        return heap
+
+    def _run(self):
+        try:
+            self._sweep()  # anything that expired while the app was closed
+            while True:
+                with self._cond:
+                    if self._stopped:
+                        return
+                    now = self.clock()
+                    reload_ = self._reload or not self._heap
+                    self._reload = False
+                if reload_:
+                    heap = self._load(now)
+                    with self._cond:
+                        self._heap = heap
+                due = False
+                with self._cond:
+                    while self._heap and self._heap[0] <= now:
+                        heapq.heappop(self._heap)
+                        due = True
+                    if not due and not self._reload and not self._stopped:
+                        wait = (self._heap[0] - now).total_seconds() if self._heap else MAX_SLEEP_SECONDS
+                        timeout = min(max(wait, 0.0), MAX_SLEEP_SECONDS)
+                        if not self._cond.wait(timeout) and timeout == MAX_SLEEP_SECONDS:
+                            self._reload = True   # pick up end times nobody told us about
+                        continue
+                if due:
+                    self._sweep()
+                    with self._cond:
+                        self._reload = True
+        finally:
+            db_manager.close_connection()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_expiry_scheduler(batch_size=500):
+    """Start (once) the shared expiry scheduler and return it."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ExpiryScheduler(batch_size)
+            _scheduler.start()
+        return _scheduler
+
+
+def stop_expiry_scheduler(timeout=5.0):
+    global _scheduler
+    with _scheduler_lock:
+        scheduler, _scheduler = _scheduler, None
+    if scheduler is not None:
+        scheduler.stop(timeout)
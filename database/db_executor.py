@@ -0,0 +1,207 @@
+"""
+Run db_manager calls off the GUI thread.
+
+    from database.db_executor import get_executor
+
+    get_executor().submit(
+        get_bookings_for_timetable, room_id, date,
+        key=(id(self), "timetable"),     # a newer submit with the same key cancels this one
+        owner=self,                      # drop the result if the widget is gone
+        on_done=self._render,            # called on the GUI thread with the return value
+    )
+
+Calls run on a small QThreadPool. Each worker thread gets its own shared
+SQLite connection from db_manager.get_connection(), so the GUI thread's
+connection is never touched from another thread. Results and errors come
+back through Qt signals, which are delivered on the thread that created the
+future (the GUI thread).
+"""
+import threading
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# SQLite serialises writers anyway; two workers let a read overlap a write.
+MAX_DB_THREADS = 2
+
+
+class _TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+
+class DbFuture(QObject):
+    """
+    Handle for one submitted call. `done` is emitted with the return value,
+    `error` with the exception. Neither is emitted once the future has been
+    cancelled (explicitly, or by a newer submit with the same key).
+    """
+    done = pyqtSignal(object)
+    error = pyqtSignal(object)
+
+    PENDING, RUNNING, FINISHED, FAILED, CANCELLED = range(5)
+
+    def __init__(self, executor, key=None, parent=None):
+        super().__init__(parent)
+        self._executor = executor
+        self.key = key
+        self._state = DbFuture.PENDING
+        self._lock = threading.Lock()
+        self._result = None
+        self._exception = None
+
+    def cancel(self):
+        """Cancel the call. Returns False if it has already completed."""
+        with self._lock:
+            if self._state in (DbFuture.FINISHED, DbFuture.FAILED):
+                return False
+            started = self._state == DbFuture.RUNNING
+            self._state = DbFuture.CANCELLED
+        if not started:
+            self._executor._unqueue(self)
+        return True
+
+    def cancelled(self):
+        return self._state == DbFuture.CANCELLED
+
+    def is_done(self):
+        return self._state in (DbFuture.FINISHED, DbFuture.FAILED, DbFuture.CANCELLED)
+
+    def result(self):
+        """The return value (raises the call's exception if it failed)."""
+        if self._state == DbFuture.FAILED:
+            raise self._exception
+        if self._state != DbFuture.FINISHED:
+            raise RuntimeError("DbFuture has no result yet")
+        return self._result
+
+    def exception(self):
+        return self._exception
+
+    # --- called from the worker thread
+    def _start(self):
+        with self._lock:
+            if self._state != DbFuture.PENDING:
+                return False
+            self._state = DbFuture.RUNNING
+            return True
+
+    # --- called on the GUI thread by the executor
+    def _complete(self, ok, value):
+        with self._lock:
+            if self._state != DbFuture.RUNNING:
+                return
+            if ok:
+                self._state, self._result = DbFuture.FINISHED, value
+            else:
+                self._state, self._exception = DbFuture.FAILED, value
+        if ok:
+            self.done.emit(value)
+        else:
+            self.error.emit(value)
+
+
+class _DbTask(QRunnable):
+    def __init__(self, future, fn, args, kwargs):
+        super().__init__()
+        # The executor keeps the Python reference until the task reports back,
+        # so Qt must not delete it under us.
+        self.setAutoDelete(False)
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _TaskSignals()
+
+    def run(self):
+        # Always report back (even when cancelled) so the executor can drop the task.
+        if not self.future._start():
+            self.signals.finished.emit(None)
+            return
+        try:
+            value = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(value)
+
+
+def _print_error(exc):
+    print(f"Database error in background task: {exc}")
+
+
+class DbExecutor(QObject):
+    def __init__(self, max_threads=MAX_DB_THREADS, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        # Keep workers (and their SQLite connections) alive between calls.
+        self._pool.setExpiryTimeout(-1)
+        self._tasks = {}     # DbFuture -> _DbTask (until the task reports back)
+        self._latest = {}    # key -> newest DbFuture for that key
+
+    def submit(self, fn, *args, key=None, owner=None, on_done=None, on_error=_print_error, **kwargs):
+        """
+        Queue fn(*args, **kwargs) on a worker thread and return a DbFuture.
+        A previous call submitted with the same key is cancelled.
+        """
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+        future = DbFuture(self, key, parent=owner)
+        if on_done is not None:
+            future.done.connect(on_done)
+        if on_error is not None:
+            future.error.connect(on_error)
+        task = _DbTask(future, fn, args, kwargs)
+        # The signals object lives on this thread, so these run here (queued).
+        task.signals.finished.connect(lambda value, t=task: self._finish(t, True, value))
+        task.signals.failed.connect(lambda exc, t=task: self._finish(t, False, exc))
+        self._tasks[future] = task
+        if key is not None:
+            self._latest[key] = future
+        self._pool.start(task)
+        return future
+
+    def cancel(self, key):
+        """Cancel the newest call submitted with key (if still pending)."""
+        future = self._latest.get(key)
+        return future.cancel() if future is not None else False
+
+    def pending(self):
+        return len(self._tasks)
+
+    def wait(self, msecs=-1):
+        """Block until all queued calls have run (for scripts and shutdown)."""
+        return self._pool.waitForDone(msecs)
+
+    def _forget(self, future):
+        self._tasks.pop(future, None)
+        if future.key is not None and self._latest.get(future.key) is future:
+            del self._latest[future.key]
+
+    def _unqueue(self, future):
+        """Drop a cancelled call that has not started yet."""
+        task = self._tasks.get(future)
+        if task is not None and self._pool.tryTake(task):
+            self._forget(future)
+        # Otherwise a worker already picked it up; it reports back via _finish.
+
+    def _finish(self, task, ok, value):
+        future = task.future
+        self._forget(future)
+        if sip.isdeleted(future):
+            return  # owner widget went away
+        future._complete(ok, value)
+
+
+_executor = None
+
+
+def get_executor():
+    """The process-wide executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = DbExecutor()
+    return _executor
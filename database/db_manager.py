@@ -2,9 +2,54 @@ import sqlite3
 import hashlib
 import secrets
 import json
+import threading
+import weakref
+import atexit
+import contextlib
+import functools
+import random
+import time
+from datetime import date as _date, datetime, timedelta
 
 DB_PATH = "database/student_app.db"
 
+# Pragmas applied to every connection db_manager opens.
+# cache_size is negative => size in KiB (here ~16 MB of page cache).
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+# Set to False to fall back to one short-lived connection per call (old behaviour).
+PERSISTENT_CONNECTIONS = True
+
+# Bookable day as half-hour slots: slot n covers [08:00 + 30n, 08:30 + 30n).
+# room_day_occupancy stores one bit per slot for each room and day (see migrations).
+OCCUPANCY_DAY_START = 8 * 60
+OCCUPANCY_SLOT_MINUTES = 30
+OCCUPANCY_SLOTS = 21
+
+# bookings.day_number counts days since 1970-01-01 (this Julian day number);
+# start_min / end_min are minutes since midnight (see migration 7).
+EPOCH_JULIAN_DAY = 2440587.5
+
+# Message of the trigger that rejects overlapping 'booked' bookings (migrations 4 and 7).
+BOOKING_OVERLAP_MESSAGE = "booking overlaps an existing booking"
+
+# Write transactions that fail with SQLITE_BUSY (another process held the write
+# lock past the connection timeout) are retried this often, with growing backoff.
+BUSY_RETRIES = 5
+BUSY_BACKOFF_SECONDS = 0.05
+
+# Recurring bookings (series_dates): at most this many occurrences, every one
+# of them inside the booking window validate_booking enforces (up to 1 week ahead).
+SERIES_MAX_OCCURRENCES = 12
+SERIES_MAX_DAYS_AHEAD = 7
+
 # -----------------
 # Password Hashing
 # -----------------
@@ -23,8 +68,477 @@ def verify_password(stored_hash, stored_salt, password):
 # -----------------
 # Connection helper
 # -----------------
+_local = threading.local()
+_open_connections = weakref.WeakSet()
+_config_generation = 0
+
+# Callables run on every newly opened sqlite3 connection (e.g. trace callbacks).
+_connect_hooks = []
+
+
+def _day_number(date):
+    """Days since 1970-01-01 of "YYYY-MM-DD" (bookings.day_number)"""
+    return _date.fromisoformat(date).toordinal() - _EPOCH_ORDINAL
+
+
+def _minutes(hhmm):
+    """Minutes since midnight of "HH:MM" (bookings.start_min / end_min)"""
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def _overlaps(start_a, end_a, start_b, end_b):
+    """Half-open intervals [start_a, end_a) and [start_b, end_b) share a minute"""
+    return start_a < end_b and start_b < end_a
+
+
+def _hhmm(minutes):
+    """"HH:MM" of minutes since midnight"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _register_time_functions(raw):
+    """
+    SQL functions for the integer time columns on every connection:
+    overlaps(a0, a1, b0, b1), hhmm_minutes('HH:MM') and minutes_hhmm(m).
+    Like built-ins, they return NULL when any argument is NULL.
+    """
+    for name, fn in (("overlaps", _overlaps), ("hhmm_minutes", _minutes), ("minutes_hhmm", _hhmm)):
+        raw.create_function(name, fn.__code__.co_argcount,
+                            lambda *args, fn=fn: None if None in args else fn(*args),
+                            deterministic=True)
+
+
+_EPOCH_ORDINAL = _date(1970, 1, 1).toordinal()
+_connect_hooks.append(_register_time_functions)
+
+
+def _open_raw(path):
+    """A new sqlite3 connection with the hooks and CONNECTION_PRAGMAS applied."""
+    raw = sqlite3.connect(path)
+    for hook in _connect_hooks:
+        hook(raw)
+    for name, value in CONNECTION_PRAGMAS.items():
+        raw.execute(f"PRAGMA {name} = {value}")
+    return raw
+
+
+class _ThreadConnection:
+    """Long-lived sqlite3 connection owned by one thread."""
+    def __init__(self, path):
+        self.path = path
+        self.generation = _config_generation
+        self.raw = _open_raw(path)
+        self.users = 0  # number of handles currently checked out
+        self.session_depth = 0
+        self.session_failed = False
+        self.after_commit = []  # callbacks deferred until the outermost session commits
+        _open_connections.add(self)
+
+    def close(self):
+        try:
+            self.raw.close()
+        except sqlite3.Error:
+            pass
+
+
+class _ConnectionHandle:
+    """
+    What get_connection() hands out: behaves like a sqlite3.Connection, but
+    close() only releases the handle. The shared connection stays open; any
+    transaction the caller left uncommitted is rolled back once the last
+    handle is released, just like closing a real connection would.
+    """
+    def __init__(self, owner):
+        self._owner = owner
+        self._released = False
+        owner.users += 1
+
+    def __getattr__(self, name):
+        return getattr(self._owner.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # like sqlite3.Connection: commit on success, roll back on error (both session-aware)
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def commit(self):
+        # Inside session() the outermost block commits once for everyone.
+        if self._owner.session_depth == 0:
+            self._owner.raw.commit()
+
+    def rollback(self):
+        if self._owner.session_depth:
+            self._owner.session_failed = True
+        else:
+            self._owner.raw.rollback()
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        owner = self._owner
+        owner.users -= 1
+        if owner.users == 0 and owner.raw.in_transaction:
+            owner.raw.rollback()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def _thread_connection():
+    """Return (opening if needed) the calling thread's shared connection."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and (conn.path != DB_PATH or conn.generation != _config_generation):
+        if conn.users == 0:
+            conn.close()
+            conn = None
+    if conn is None:
+        conn = _ThreadConnection(DB_PATH)
+        _local.conn = conn
+    return conn
+
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    """Return a connection for the calling thread (reused across calls)."""
+    if not PERSISTENT_CONNECTIONS and not _in_session():
+        return _open_raw(DB_PATH)
+    return _ConnectionHandle(_thread_connection())
+
+
+def _in_session():
+    conn = getattr(_local, "conn", None)
+    return conn is not None and conn.session_depth > 0
+
+
+def data_version():
+    """
+    (connection key, PRAGMA data_version) of the calling thread's connection.
+    The version changes when any other connection (another thread, another
+    app instance, a DB browser) commits, so a cache built from the database
+    compares tokens to notice writes that sent no booking notification.
+    Tokens of different connections are not comparable; treat a new key as
+    a change.
+    """
+    if not PERSISTENT_CONNECTIONS and not _in_session():
+        return None, None   # a fresh connection per call: nothing to compare against
+    conn = _thread_connection()
+    return id(conn), conn.raw.execute("PRAGMA data_version").fetchone()[0]
+
+
+class SessionAborted(sqlite3.Error):
+    """A call inside session() rolled back, so the whole unit of work was undone."""
+
+
+class BookingConflict(sqlite3.IntegrityError):
+    """The requested slot overlaps a booking someone else committed first."""
+
+
+class SeriesConflict(BookingConflict):
+    """Occurrences of a booking series overlap existing bookings."""
+
+    def __init__(self, message, conflicts):
+        super().__init__(message)
+        self.conflicts = conflicts  # {date: [(booking_id, start_time, end_time)]}
+
+
+@contextlib.contextmanager
+def session(write=False):
+    """
+    Unit of work: every db_manager call made inside the block shares this
+    thread's connection and one transaction, committed once on exit and
+    rolled back if the block raises.
+
+        with session(write=True):
+            if get_note(note_id, user_id):
+                update_note(note_id, title, content, overlay, user_id=user_id)
+
+    write=True takes the write lock up front (BEGIN IMMEDIATE) so the block
+    cannot fail half-way because another writer got in first. Sessions nest;
+    only the outermost one commits. A function that rolls back inside a
+    session (e.g. on a constraint error) dooms the whole unit: the outermost
+    block then rolls back and raises SessionAborted.
+    """
+    owner = _thread_connection()
+    handle = _ConnectionHandle(owner)
+    outermost = owner.session_depth == 0
+    if outermost:
+        owner.session_failed = False
+        if not owner.raw.in_transaction:
+            owner.raw.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+    owner.session_depth += 1
+    try:
+        yield handle
+    except BaseException:
+        owner.session_failed = True
+        owner.session_depth -= 1
+        if outermost:
+            owner.raw.rollback()
+            owner.after_commit.clear()
+        handle.close()
+        raise
+    owner.session_depth -= 1
+    try:
+        if outermost:
+            if owner.session_failed:
+                owner.raw.rollback()
+                owner.after_commit.clear()
+                raise SessionAborted("a call inside the session rolled back; nothing was committed")
+            try:
+                owner.raw.commit()
+            except sqlite3.Error:
+                owner.raw.rollback()
+                owner.after_commit.clear()
+                raise
+            callbacks, owner.after_commit = owner.after_commit, []
+            for fn, args in callbacks:
+                fn(*args)
+    finally:
+        handle.close()
+
+
+# -----------------
+# Busy retry
+# -----------------
+_busy_stats = {"retries": 0, "gave_up": 0}
+_busy_lock = threading.Lock()
+
+
+def _is_busy(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def _is_unmigrated(error):
+    """True when SQLite reports a table/column the schema lacks (migrate() has not run)."""
+    message = str(error).lower()
+    return "no such table" in message or "no such column" in message
+
+
+def _retry_on_busy(fn):
+    """
+    Re-run a self-contained write (its own transaction) when SQLite reports the
+    database busy/locked. Nothing is retried inside an enclosing session(),
+    because only the outermost block can redo the whole unit of work.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or _in_session():
+                    raise
+                with _busy_lock:
+                    if attempt >= BUSY_RETRIES:
+                        _busy_stats["gave_up"] += 1
+                        raise
+                    _busy_stats["retries"] += 1
+                attempt += 1
+                time.sleep(BUSY_BACKOFF_SECONDS * 2 ** (attempt - 1) * (0.5 + random.random()))
+    return wrapper
+
+
+def busy_retry_stats(reset=False):
+    """How often writes were retried after SQLITE_BUSY, and how often they gave up."""
+    with _busy_lock:
+        stats = dict(_busy_stats)
+        if reset:
+            _busy_stats.update(retries=0, gave_up=0)
+    return stats
+
+# -----------------
+# Booking change listeners
+# -----------------
+# Called as listener(room_id, date) after a booking write commits; room_id is
+# None when any room on that date may have changed. Used to keep in-memory
+# views (e.g. room_booking_function.availability) current without polling.
+_booking_listeners = []
+
+
+def add_booking_listener(listener):
+    """Register listener(room_id, date) to be told about committed booking changes."""
+    if listener not in _booking_listeners:
+        _booking_listeners.append(listener)
+
+
+def remove_booking_listener(listener):
+    if listener in _booking_listeners:
+        _booking_listeners.remove(listener)
+
+
+def _emit_booking_change(room_id, date):
+    for listener in list(_booking_listeners):
+        try:
+            listener(room_id, date)
+        except Exception as e:
+            print(f"Booking listener error: {e}")
+
+
+def _notify_booking_change(room_id, date):
+    """Tell listeners now, or when the enclosing session commits."""
+    if not _booking_listeners:
+        return
+    if _in_session():
+        _local.conn.after_commit.append((_emit_booking_change, (room_id, date)))
+    else:
+        _emit_booking_change(room_id, date)
+
+
+def configure_connection(db_path=None, **pragmas):
+    """
+    Change the database path and/or connection pragmas, e.g.
+    configure_connection(cache_size=-64000, mmap_size=0).
+    Threads reopen their connection with the new settings on next use.
+    """
+    global DB_PATH, _config_generation
+    if db_path is not None:
+        DB_PATH = db_path
+    CONNECTION_PRAGMAS.update(pragmas)
+    _config_generation += 1
+    if db_path is not None:
+        invalidate_reference_cache()
+
+
+def close_connection():
+    """Close the calling thread's shared connection (if any)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+@atexit.register
+def close_all_connections():
+    """Close every shared connection still open (runs at interpreter exit)."""
+    for conn in list(_open_connections):
+        conn.close()
+    _local.conn = None
+
+# -----------------
+# Reference data cache
+# -----------------
+# Locations, features, rooms and student names almost never change, so the
+# lookups below are served from a process-wide cache. Writes made through this
+# module invalidate the affected entries explicitly. Writes from anywhere else
+# (another thread's connection, another process, a DB browser) are caught by
+# PRAGMA data_version, which changes when some other connection commits; the
+# whole cache is then dropped.
+REFERENCE_CACHE_ENABLED = True
+REFERENCE_CACHE_MAX_ENTRIES = 4096   # per namespace; cleared when exceeded
+
+_MISSING = object()
+
+
+class _ReferenceCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}          # namespace -> {args: value}
+        self.hits = {}
+        self.misses = {}
+        self.invalidations = 0
+        self.stale_drops = 0
+
+    def _is_stale(self):
+        """
+        True when another connection has committed since this thread last looked.
+        data_version is only comparable on one connection, so a connection's first
+        look cannot vouch for entries other threads filled: it counts as stale.
+        """
+        conn = _thread_connection()
+        version = conn.raw.execute("PRAGMA data_version").fetchone()[0]
+        last = getattr(conn, "data_version", None)
+        conn.data_version = version
+        return last != version
+
+    def get_or_load(self, namespace, args, loader):
+        if not (REFERENCE_CACHE_ENABLED and PERSISTENT_CONNECTIONS):
+            return loader(*args)
+        if self._is_stale():
+            with self._lock:
+                self._data.clear()
+                self.stale_drops += 1
+        with self._lock:
+            value = self._data.get(namespace, {}).get(args, _MISSING)
+            if value is not _MISSING:
+                self.hits[namespace] = self.hits.get(namespace, 0) + 1
+                return value
+            self.misses[namespace] = self.misses.get(namespace, 0) + 1
+        value = loader(*args)
+        with self._lock:
+            entries = self._data.setdefault(namespace, {})
+            if len(entries) >= REFERENCE_CACHE_MAX_ENTRIES:
+                entries.clear()
+            entries[args] = value
+        return value
+
+    def invalidate(self, namespace=None, *args):
+        with self._lock:
+            self.invalidations += 1
+            if namespace is None:
+                self._data.clear()
+            elif args:
+                self._data.get(namespace, {}).pop(args, None)
+            else:
+                self._data.pop(namespace, None)
+
+    def stats(self):
+        with self._lock:
+            names = sorted(set(self.hits) | set(self.misses))
+            return {
+                "hits": sum(self.hits.values()),
+                "misses": sum(self.misses.values()),
+                "invalidations": self.invalidations,
+                "stale_drops": self.stale_drops,
+                "by_namespace": {n: {"hits": self.hits.get(n, 0), "misses": self.misses.get(n, 0),
+                                     "entries": len(self._data.get(n, {}))} for n in names},
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+            self.invalidations = 0
+            self.stale_drops = 0
+
+
+_reference_cache = _ReferenceCache()
+
+
+def _reference_cached(namespace):
+    """Serve fn(*args) from the reference cache (exceptions are not cached)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args):
+            return _reference_cache.get_or_load(namespace, args, fn)
+        return wrapper
+    return deco
+
+
+def invalidate_reference_cache(namespace=None, *args):
+    """
+    Drop cached reference data: everything, one namespace ("locations",
+    "location_name", "features", "rooms", "student_name") or one entry,
+    e.g. invalidate_reference_cache("student_name", "24WMD0188").
+    """
+    _reference_cache.invalidate(namespace, *args)
+
+
+def reference_cache_stats(reset=False):
+    """Hit/miss counters for the reference cache."""
+    stats = _reference_cache.stats()
+    if reset:
+        _reference_cache.reset_stats()
+    return stats
 
 # -----------------
 # USERS
@@ -58,6 +572,7 @@ def create_user(student_id, name, password):
             (student_id, name, password_hash, password_salt)
         )
         conn.commit()
+        invalidate_reference_cache("student_name", student_id)
         return True
     except sqlite3.Error:
         conn.rollback()
@@ -80,6 +595,7 @@ def get_profile_picture(student_id):
 # -----------------
 # LOCATIONS
 # -----------------
+@_reference_cached("locations")
 def get_locations():
     conn = get_connection()
     cursor = conn.cursor()
@@ -88,8 +604,9 @@ def get_locations():
     conn.close()
     return result
 
+@_reference_cached("location_name")
 def get_location_name(location_id):
-    """Get location name from database"""
+    """Get location name from database (cached)"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT name FROM locations WHERE id=?", (location_id,))
@@ -97,42 +614,12 @@ def get_location_name(location_id):
     conn.close()
     return result[0] if result else f"Location {location_id}"
 
-# -----------------
-# ROOMS
-# -----------------
-def get_rooms_by_location(location_id):
-    """Get all rooms for a specific location with feature information"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT r.id, r.name, r.capacity, f.id as feature_id, f.name as feature_name
-        FROM rooms r 
-        LEFT JOIN features f ON r.feature_id = f.id
-        WHERE r.location_id = ?
-        ORDER BY r.name
-    ''', (location_id,))
-    result = cursor.fetchall()
-    conn.close()
-    return result
-
-def check_room_availability(room_id, date, start, end):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT id FROM bookings 
-        WHERE room_id = ? AND date = ?
-        AND ((start_time < ? AND end_time > ?) OR 
-             (start_time >= ? AND start_time < ?))
-    ''', (room_id, date, end, start, start, end))
-    result = cursor.fetchone()
-    conn.close()
-    return result is None
-
 # -----------------
 # FEATURES
 # -----------------
+@_reference_cached("features")
 def get_features():
-    """Get all available features"""
+    """Get all available features (cached)"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT id, name FROM features ORDER BY name")
@@ -143,36 +630,163 @@ def get_features():
 # -----------------
 # BOOKINGS
 # -----------------
-def create_booking_with_students(created_by, room_id, date, start, end, student_ids):
-    """Create booking and add students in one transaction"""
+@_retry_on_busy
+def create_booking_with_students(created_by, room_id, date, start, end, student_ids, student_names=None):
+    """
+    Create booking and add students in one write transaction (BEGIN IMMEDIATE).
+    The overlap trigger on bookings re-checks the slot inside that transaction,
+    so two instances racing for the same room cannot both win: the loser gets
+    BookingConflict and nothing is written.
+
+    student_names ({student_id: name}, e.g. from resolve_students) saves the
+    name lookup; students without a name are not added.
+    """
+    try:
+        with session(write=True) as conn:
+            cursor = conn.cursor()
+
+            # Create booking
+            cursor.execute('''
+                INSERT INTO bookings (created_by, room_id, date, start_time, end_time) 
+                VALUES (?, ?, ?, ?, ?)
+            ''', (created_by, room_id, date, start, end))
+            
+            booking_id = cursor.lastrowid
+            
+            # Add students with their actual names (same connection and transaction)
+            if student_names is None:
+                student_names = resolve_students(student_ids)
+            cursor.executemany('''
+                INSERT INTO booking_students (booking_id, student_id, student_name) 
+                VALUES (?, ?, ?)
+            ''', [(booking_id, student_id, student_names[student_id])
+                  for student_id in dict.fromkeys(student_ids) if student_names.get(student_id)])
+            _notify_booking_change(room_id, date)
+    except sqlite3.IntegrityError as e:
+        if BOOKING_OVERLAP_MESSAGE in str(e):
+            raise BookingConflict(f"Room {room_id} is already booked on {date} between {start} and {end}") from e
+        raise
+    return booking_id
+
+def series_dates(first_date, occurrences, interval_days=7, today=None):
+    """
+    Dates ("YYYY-MM-DD") of a series starting on first_date and repeating every
+    interval_days; ValueError if it breaks the SERIES_* rules.
+    """
+    today = today or _date.today()
+    first = _date.fromisoformat(first_date)
+    if interval_days < 1:
+        raise ValueError("A series must repeat at least one day apart.")
+    if not 1 <= occurrences <= SERIES_MAX_OCCURRENCES:
+        raise ValueError(f"A series can have 1 to {SERIES_MAX_OCCURRENCES} occurrences.")
+    if first < today:
+        raise ValueError("A series cannot start in the past.")
+    last = first + timedelta(days=interval_days * (occurrences - 1))
+    if (last - today).days > SERIES_MAX_DAYS_AHEAD:
+        raise ValueError(f"Bookings can only be made up to {SERIES_MAX_DAYS_AHEAD} days in advance.")
+    return [(first + timedelta(days=interval_days * n)).isoformat() for n in range(occurrences)]
+
+def find_series_conflicts(room_id, dates, start, end):
+    """
+    'booked' bookings of room_id overlapping start-end on any of dates, in one
+    query: {date: [(booking_id, start_time, end_time)]}; dates without a clash are left out.
+    """
+    conflicts = {}
+    dates = list(dict.fromkeys(dates))
+    if not dates:
+        return conflicts
     conn = get_connection()
     cursor = conn.cursor()
-    
+    cursor.execute(f'''
+        SELECT date, id, start_time, end_time FROM bookings
+        WHERE room_id = ? AND day_number IN ({', '.join('?' * len(dates))}) AND status = 'booked'
+        AND overlaps(start_min, end_min, ?, ?)
+        ORDER BY day_number, start_min
+    ''', (room_id, *map(_day_number, dates), _minutes(start), _minutes(end)))
+    for date, booking_id, booked_start, booked_end in cursor.fetchall():
+        conflicts.setdefault(date, []).append((booking_id, booked_start, booked_end))
+    conn.close()
+    return conflicts
+
+@_retry_on_busy
+def create_booking_series(created_by, room_id, dates, start, end, student_ids,
+                          interval_days=7, student_names=None, skip_conflicts=False):
+    """
+    Book room_id at start-end on every date (see series_dates) as one series,
+    in one write transaction: one conflict query, then one executemany each for
+    the occurrences and their students. Raises SeriesConflict if any date clashes,
+    unless skip_conflicts, which books the free dates only.
+    Returns (series_id or None, booked dates, conflicts).
+    """
     try:
-        # Create booking
+        with session(write=True) as conn:
+            cursor = conn.cursor()
+            conflicts = find_series_conflicts(room_id, dates, start, end)
+            if conflicts and not skip_conflicts:
+                raise SeriesConflict(f"Room {room_id} is already booked on {', '.join(conflicts)}", conflicts)
+            free = [date for date in dict.fromkeys(dates) if date not in conflicts]
+            if not free:
+                return None, [], conflicts
+
+            cursor.execute('''
+                INSERT INTO booking_series (created_by, room_id, start_time, end_time, interval_days)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (created_by, room_id, start, end, interval_days))
+            series_id = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO bookings (created_by, room_id, date, start_time, end_time, series_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(created_by, room_id, date, start, end, series_id) for date in free])
+
+            # Every student joins every occurrence
+            if student_names is None:
+                student_names = resolve_students(student_ids)
+            cursor.executemany('''
+                INSERT INTO booking_students (booking_id, student_id, student_name)
+                SELECT id, ?, ? FROM bookings WHERE series_id = ?
+            ''', [(student_id, student_names[student_id], series_id)
+                  for student_id in dict.fromkeys(student_ids) if student_names.get(student_id)])
+            for date in free:
+                _notify_booking_change(room_id, date)
+    except sqlite3.IntegrityError as e:
+        if BOOKING_OVERLAP_MESSAGE in str(e):
+            raise BookingConflict(f"Room {room_id} is already booked between {start} and {end}") from e
+        raise
+    return series_id, free, conflicts
+
+@_retry_on_busy
+def cancel_booking_series(series_id, from_date=None):
+    """
+    Cancel every 'booked' occurrence of a series from from_date (default today)
+    on, in one UPDATE. Returns the number of bookings cancelled.
+    """
+    if from_date is None:
+        from_date = _date.today().isoformat()
+    first_day = _day_number(from_date)
+    with session(write=True) as conn:
+        cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO bookings (created_by, room_id, date, start_time, end_time) 
-            VALUES (?, ?, ?, ?, ?)
-        ''', (created_by, room_id, date, start, end))
-        
-        booking_id = cursor.lastrowid
-        
-        # Add students with their actual names
-        for student_id in student_ids:
-            student_name = get_student_name(student_id)
-            if student_name:
-                cursor.execute('''
-                    INSERT INTO booking_students (booking_id, student_id, student_name) 
-                    VALUES (?, ?, ?)
-                ''', (booking_id, student_id, student_name))
-        
-        conn.commit()
-        return booking_id
-    except sqlite3.Error as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+            SELECT DISTINCT room_id, date FROM bookings
+            WHERE series_id = ? AND status = 'booked' AND day_number >= ?
+        ''', (series_id, first_day))
+        changed = cursor.fetchall()
+        cursor.execute('''
+            UPDATE bookings SET status = 'cancelled'
+            WHERE series_id = ? AND status = 'booked' AND day_number >= ?
+        ''', (series_id, first_day))
+        cancelled = cursor.rowcount
+        for room_id, date in changed:
+            _notify_booking_change(room_id, date)
+    return cancelled
+
+def get_booking_series_id(booking_id):
+    """Series a booking belongs to, or None for a one-off booking"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT series_id FROM bookings WHERE id = ?", (booking_id,))
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else None
 
 def get_booking_creator(booking_id):
     """Get the creator (student_id) of a booking"""
@@ -191,11 +805,14 @@ def get_bookings_by_user(student_id, location_id=None):
     if location_id:
         # Filter by specific location - include both created by AND participated in
         cursor.execute('''
-            SELECT DISTINCT b.id, r.name, b.date, b.start_time, b.end_time, b.status
+            SELECT b.id, r.name, b.date, b.start_time, b.end_time, b.status
             FROM bookings b
             JOIN rooms r ON b.room_id = r.id
-            JOIN booking_students bs ON b.id = bs.booking_id
-            WHERE (b.created_by = ? OR bs.student_id = ?) 
+            WHERE b.id IN (
+                SELECT booking_id FROM booking_students WHERE student_id = ?
+                UNION
+                SELECT id FROM bookings WHERE created_by = ?
+            )
             AND r.location_id = ?
             ORDER BY 
                 CASE 
@@ -209,11 +826,14 @@ def get_bookings_by_user(student_id, location_id=None):
     else:
         # Get all bookings (no location filter) - include both created by AND participated in
         cursor.execute('''
-            SELECT DISTINCT b.id, r.name, b.date, b.start_time, b.end_time, b.status
+            SELECT b.id, r.name, b.date, b.start_time, b.end_time, b.status
             FROM bookings b
             JOIN rooms r ON b.room_id = r.id
-            JOIN booking_students bs ON b.id = bs.booking_id
-            WHERE b.created_by = ? OR bs.student_id = ?
+            WHERE b.id IN (
+                SELECT booking_id FROM booking_students WHERE student_id = ?
+                UNION
+                SELECT id FROM bookings WHERE created_by = ?
+            )
             ORDER BY 
                 CASE 
                     WHEN b.status = 'booked' THEN 1
@@ -228,41 +848,83 @@ def get_bookings_by_user(student_id, location_id=None):
     conn.close()
     return result
 
+@_retry_on_busy
 def update_booking_status(booking_id, status):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE bookings SET status = ? WHERE id = ?", (status, booking_id))
-    conn.commit()
-    conn.close()
+    """Set a booking's status in one write transaction (BEGIN IMMEDIATE)."""
+    with session(write=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE bookings SET status = ? WHERE id = ?", (status, booking_id))
+        cursor.execute("SELECT room_id, date FROM bookings WHERE id = ?", (booking_id,))
+        changed = cursor.fetchone()
+        if changed:
+            _notify_booking_change(*changed)
 
+@_retry_on_busy
 def delete_booking(booking_id):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM bookings WHERE id = ?", (booking_id,))
-    conn.commit()
-    conn.close()
+    """Delete a booking and its students in one write transaction (BEGIN IMMEDIATE)."""
+    with session(write=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT room_id, date FROM bookings WHERE id = ?", (booking_id,))
+        changed = cursor.fetchone()
+        # booking_students rows reference the booking (foreign_keys is ON)
+        cursor.execute("DELETE FROM booking_students WHERE booking_id = ?", (booking_id,))
+        cursor.execute("DELETE FROM bookings WHERE id = ?", (booking_id,))
+        if changed:
+            _notify_booking_change(*changed)
 
-def update_expired_bookings():
-    """Update bookings that have passed to 'completed' status"""
+def update_expired_bookings(batch_size=500):
+    """
+    Update bookings that have passed to 'completed' status, batch_size rows per
+    write transaction (idx_bookings_status_day_end finds them). Normally run by
+    database.booking_expiry rather than on page loads.
+    """
+    # Get current date and time
+    now = datetime.now()
+    current_date = now.strftime("%Y-%m-%d")
+    today = _day_number(current_date)
+
+    total = today_changed = 0
+    # Bookings on earlier days, then today's bookings whose end time has passed
+    for where, args in (("day_number < ?", (today,)),
+                        ("day_number = ? AND end_min <= ?", (today, now.hour * 60 + now.minute))):
+        while True:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                UPDATE bookings
+                SET status = 'completed'
+                WHERE id IN (
+                    SELECT id FROM bookings
+                    WHERE status = 'booked' AND {where}
+                    LIMIT ?)
+            ''', args + (batch_size,))
+            conn.commit()
+            conn.close()
+            total += cursor.rowcount
+            if len(args) == 2:
+                today_changed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+    if today_changed:
+        # Earlier days are outside any bookable window; today's rooms may have changed
+        _notify_booking_change(None, current_date)
+    return total  # Return number of updated bookings
+
+def get_upcoming_booking_ends(date, after_time):
+    """
+    Distinct end times (minutes since midnight) after after_time ("HH:MM") on
+    date for bookings that are booked
+    """
     conn = get_connection()
     cursor = conn.cursor()
-    
-    # Get current date and time
-    from datetime import datetime
-    current_date = datetime.now().strftime("%Y-%m-%d")
-    current_time = datetime.now().strftime("%H:%M")
-    
-    # Update bookings where date is in past OR date is today but end_time has passed
     cursor.execute('''
-        UPDATE bookings 
-        SET status = 'completed' 
-        WHERE status = 'booked' 
-        AND (date < ? OR (date = ? AND end_time <= ?))
-    ''', (current_date, current_date, current_time))
-    
-    conn.commit()
+        SELECT DISTINCT end_min FROM bookings
+        WHERE status = 'booked' AND day_number = ? AND end_min > ?
+        ORDER BY end_min
+    ''', (_day_number(date), _minutes(after_time)))
+    result = [row[0] for row in cursor.fetchall()]
     conn.close()
-    return cursor.rowcount  # Return number of updated bookings
+    return result
 
 # -----------------
 # BOOKING STUDENTS
@@ -290,6 +952,70 @@ def get_students_in_booking(booking_id):
     conn.close()
     return result
 
+def get_students_for_bookings(booking_ids):
+    """Students of several bookings in one query: {booking_id: [(student_id, name)]}"""
+    ids = list(dict.fromkeys(booking_ids))
+    students = {booking_id: [] for booking_id in ids}
+    if not ids:
+        return students
+    conn = get_connection()
+    cursor = conn.cursor()
+    for i in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[i:i + _IN_CHUNK]
+        cursor.execute(f'''
+            SELECT bs.booking_id, u.student_id, u.name
+            FROM booking_students bs
+            JOIN users u ON bs.student_id = u.student_id
+            WHERE bs.booking_id IN ({', '.join('?' * len(chunk))})
+        ''', chunk)
+        for booking_id, student_id, name in cursor.fetchall():
+            students[booking_id].append((student_id, name))
+    conn.close()
+    return students
+
+# booked, then completed, then cancelled (as get_bookings_by_user orders them)
+_STATUS_RANK = "CASE {} WHEN 'booked' THEN 1 WHEN 'completed' THEN 2 ELSE 3 END"
+
+def get_bookings_page(user_id, location_id=None, after=None, limit=30):
+    """
+    One page of a user's bookings (created by or participated in), booked ones
+    first and newest first within each status, optionally at one location.
+    Keyset pagination: pass the (status, date, start_time, id) of the last row
+    of the previous page as after.
+    Rows: (id, room_name, location_name, date, start_time, end_time, status, created_by, series_id)
+    """
+    rank = _STATUS_RANK.format("b.status")
+    where, args = "", [user_id, user_id]
+    if location_id:
+        # unary + keeps the user's own bookings (not every room of the location) as the outer loop
+        where += " AND +r.location_id = ?"
+        args.append(location_id)
+    if after is not None:
+        after_rank = _STATUS_RANK.format("?")
+        where += (f" AND ({rank} > {after_rank} OR ({rank} = {after_rank}"
+                  " AND (b.date, b.start_time, b.id) < (?, ?, ?)))")
+        status, *key = after
+        args.extend([status, status, *key])
+    args.append(limit)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT b.id, r.name, l.name, b.date, b.start_time, b.end_time, b.status, b.created_by, b.series_id
+        FROM bookings b
+        JOIN rooms r ON b.room_id = r.id
+        JOIN locations l ON r.location_id = l.id
+        WHERE b.id IN (
+            SELECT booking_id FROM booking_students WHERE student_id = ?
+            UNION
+            SELECT id FROM bookings WHERE created_by = ?
+        ){where}
+        ORDER BY {rank}, b.date DESC, b.start_time DESC, b.id DESC
+        LIMIT ?
+    """, args)
+    result = cursor.fetchall()
+    conn.close()
+    return result
+
 def get_bookings_by_user_all_locations(user_id):
     """Get all bookings for a user across all locations"""
     conn = get_connection()
@@ -322,15 +1048,41 @@ def check_student_exists(student_id):
     conn.close()
     return result is not None
 
+# SQLite's default limit on ? parameters in one statement is 999
+_IN_CHUNK = 900
+
+def resolve_students(student_ids):
+    """
+    Names of the given student IDs as {student_id: name}, in one IN (...) query
+    (per 900 IDs). Unknown IDs are left out; order follows student_ids.
+    """
+    ids = list(dict.fromkeys(student_ids))
+    found = {}
+    if not ids:
+        return found
+    conn = get_connection()
+    cursor = conn.cursor()
+    for i in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[i:i + _IN_CHUNK]
+        cursor.execute(f"SELECT student_id, name FROM users WHERE student_id IN ({', '.join('?' * len(chunk))})",
+                       chunk)
+        found.update(cursor.fetchall())
+    conn.close()
+    return {student_id: found[student_id] for student_id in ids if student_id in found}
+
+@_reference_cached("student_name")
+def _load_student_name(student_id):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM users WHERE student_id = ?", (student_id,))
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else None
+
 def get_student_name(student_id):
-    """Get student name from database"""
+    """Get student name from database (cached)"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM users WHERE student_id = ?", (student_id,))
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else None
+        return _load_student_name(student_id)
     except sqlite3.Error as e:
         print(f"Database error in get_student_name: {e}")
         return None
@@ -338,15 +1090,36 @@ def get_student_name(student_id):
 # -----------------
 # CHECK AVAILABILITY
 # -----------------
+def slot_mask(start, end):
+    """
+    Bitmask of the half-hour slots covered by start-end ("HH:MM"), or None when
+    the range is not on the half-hour grid of the bookable day.
+    """
+    try:
+        s = _minutes(start) - OCCUPANCY_DAY_START
+        e = _minutes(end) - OCCUPANCY_DAY_START
+    except (TypeError, ValueError):
+        return None
+    if s % OCCUPANCY_SLOT_MINUTES or e % OCCUPANCY_SLOT_MINUTES or not 0 <= s < e <= OCCUPANCY_SLOTS * OCCUPANCY_SLOT_MINUTES:
+        return None
+    a, b = s // OCCUPANCY_SLOT_MINUTES, e // OCCUPANCY_SLOT_MINUTES
+    return (1 << b) - (1 << a)
+
 def check_room_availability(room_id, date, start, end):
     conn = get_connection()
     cursor = conn.cursor()
+    mask = slot_mask(start, end)
+    if mask is not None:
+        cursor.execute("SELECT mask FROM room_day_occupancy WHERE room_id = ? AND date = ?", (room_id, date))
+        row = cursor.fetchone()
+        conn.close()
+        return row is None or not (row[0] & mask)
+    # Off-grid times: fall back to the interval test on bookings
     cursor.execute('''
         SELECT id FROM bookings 
-        WHERE room_id = ? AND date = ? AND status = 'booked'
-        AND ((start_time < ? AND end_time > ?) OR 
-             (start_time >= ? AND start_time < ?))
-    ''', (room_id, date, end, start, start, end))
+        WHERE room_id = ? AND day_number = ? AND status = 'booked'
+        AND overlaps(start_min, end_min, ?, ?)
+    ''', (room_id, _day_number(date), _minutes(start), _minutes(end)))
     result = cursor.fetchone()
     conn.close()
     return result is None
@@ -355,22 +1128,69 @@ def find_available_rooms(location_id, feature_id, min_capacity, date, start, end
     """Find all available rooms sorted by smallest sufficient capacity"""
     conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT r.id, r.name, r.capacity 
-        FROM rooms r 
-        WHERE r.location_id = ? AND r.feature_id = ? AND r.capacity >= ?
-        AND r.id NOT IN (
-            SELECT room_id FROM bookings 
-            WHERE date = ? AND status = 'booked'
-            AND ((start_time < ? AND end_time > ?) OR 
-                 (start_time >= ? AND start_time < ?))
-        )
-        ORDER BY r.capacity, r.name
-    ''', (location_id, feature_id, min_capacity, date, end, start, start, end))
+    mask = slot_mask(start, end)
+    if mask is not None:
+        cursor.execute('''
+            SELECT r.id, r.name, r.capacity
+            FROM rooms r
+            LEFT JOIN room_day_occupancy o ON o.room_id = r.id AND o.date = ?
+            WHERE r.location_id = ? AND r.feature_id = ? AND r.capacity >= ?
+            AND (COALESCE(o.mask, 0) & ?) = 0
+            ORDER BY r.capacity, r.name
+        ''', (date, location_id, feature_id, min_capacity, mask))
+    else:
+        cursor.execute('''
+            SELECT r.id, r.name, r.capacity 
+            FROM rooms r 
+            WHERE r.location_id = ? AND r.feature_id = ? AND r.capacity >= ?
+            AND NOT EXISTS (
+                SELECT 1 FROM bookings b
+                WHERE b.room_id = r.id AND b.day_number = ? AND b.status = 'booked'
+                AND overlaps(b.start_min, b.end_min, ?, ?)
+            )
+            ORDER BY r.capacity, r.name
+        ''', (location_id, feature_id, min_capacity, _day_number(date), _minutes(start), _minutes(end)))
     results = cursor.fetchall()
     conn.close()
     return results  # return list of possible rooms
 
+def get_location_occupancy_range(location_id, first_date, last_date):
+    """{(room_id, date): slot bitmask} for booked room-days at a location between two dates"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT o.room_id, o.date, o.mask
+        FROM rooms r
+        JOIN room_day_occupancy o ON o.room_id = r.id AND o.date BETWEEN ? AND ?
+        WHERE r.location_id = ? AND o.mask <> 0
+    ''', (first_date, last_date, location_id))
+    result = {(room_id, date): mask for room_id, date, mask in cursor.fetchall()}
+    conn.close()
+    return result
+
+def get_room_day_mask(room_id, date):
+    """Slot bitmask of one room on one day (0 = free all day)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT mask FROM room_day_occupancy WHERE room_id = ? AND date = ?", (room_id, date))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def get_location_occupancy(location_id, date):
+    """{room_id: slot bitmask} for every room at a location on a date (0 = free all day)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT r.id, COALESCE(o.mask, 0)
+        FROM rooms r
+        LEFT JOIN room_day_occupancy o ON o.room_id = r.id AND o.date = ?
+        WHERE r.location_id = ?
+    ''', (date, location_id))
+    result = dict(cursor.fetchall())
+    conn.close()
+    return result
+
 # -----------------
 # Time Table
 # -----------------
@@ -381,15 +1201,41 @@ def get_bookings_for_timetable(room_id, date):
     cursor.execute('''
         SELECT start_time, end_time, status, created_by 
         FROM bookings 
-        WHERE room_id = ? AND date = ? AND status = 'booked'
-        ORDER BY start_time
-    ''', (room_id, date))
+        WHERE room_id = ? AND day_number = ? AND status = 'booked'
+        ORDER BY start_min
+    ''', (room_id, _day_number(date)))
     result = cursor.fetchall()
     conn.close()
     return result
 
+def get_location_day_schedule(location_id, date):
+    """
+    Every room at a location with its booked slots on date, in one query:
+    [(room_id, room_name, capacity, feature_id, feature_name, [(start, end, status, created_by)])]
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT r.id, r.name, r.capacity, f.id, f.name,
+               b.start_time, b.end_time, b.status, b.created_by
+        FROM rooms r
+        LEFT JOIN features f ON r.feature_id = f.id
+        LEFT JOIN bookings b ON b.room_id = r.id AND b.day_number = ? AND b.status = 'booked'
+        WHERE r.location_id = ?
+        ORDER BY r.name, r.id, b.start_min
+    ''', (_day_number(date), location_id))
+    schedule = []
+    for room_id, name, capacity, feature_id, feature_name, start, end, status, created_by in cursor.fetchall():
+        if not schedule or schedule[-1][0] != room_id:
+            schedule.append((room_id, name, capacity, feature_id, feature_name, []))
+        if start is not None:
+            schedule[-1][5].append((start, end, status, created_by))
+    conn.close()
+    return schedule
+
+@_reference_cached("rooms")
 def get_rooms_by_location(location_id):
-    """Get all rooms for a specific location with feature information"""
+    """Get all rooms for a specific location with feature information (cached)"""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute('''
@@ -403,6 +1249,80 @@ def get_rooms_by_location(location_id):
     conn.close()
     return result
 
+# -----------------
+# ROOM UTILIZATION
+# -----------------
+# Read from the usage_* aggregates that triggers keep up to date (migration 6),
+# so the cost depends on rooms and days, never on the number of bookings.
+def get_location_usage_heatmap(location_id, first_date=None, last_date=None):
+    """
+    Booked minutes at a location per (weekday, hour), summed over its rooms;
+    weekday 0 is Sunday. Without dates: all time.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    if first_date is None:
+        cursor.execute('''
+            SELECT u.weekday, u.hour, SUM(u.booked_minutes)
+            FROM rooms r
+            JOIN usage_room_weekday_hour u ON u.room_id = r.id
+            WHERE r.location_id = ?
+            GROUP BY u.weekday, u.hour
+        ''', (location_id,))
+    else:
+        cursor.execute('''
+            SELECT CAST(strftime('%w', u.date) AS INTEGER) AS weekday, u.hour, SUM(u.booked_minutes)
+            FROM rooms r
+            JOIN usage_room_hour u ON u.room_id = r.id AND u.date BETWEEN ? AND ?
+            WHERE r.location_id = ?
+            GROUP BY weekday, u.hour
+        ''', (first_date, last_date, location_id))
+    result = {(weekday, hour): minutes for weekday, hour, minutes in cursor.fetchall()}
+    conn.close()
+    return result
+
+def get_location_room_usage(location_id, first_date=None, last_date=None):
+    """
+    Usage of every room at a location, in room-name order:
+    [(room_id, room_name, capacity, bookings, cancellations, booked_minutes)].
+    Without dates: all time.
+    """
+    where, args = "", [location_id]
+    if first_date is not None:
+        where = " AND u.date BETWEEN ? AND ?"
+        args = [first_date, last_date, location_id]
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT r.id, r.name, r.capacity, COALESCE(SUM(u.bookings), 0),
+               COALESCE(SUM(u.cancellations), 0), COALESCE(SUM(u.booked_minutes), 0)
+        FROM rooms r
+        LEFT JOIN usage_room_day u ON u.room_id = r.id{where}
+        WHERE r.location_id = ?
+        GROUP BY r.id
+        ORDER BY r.name
+    ''', args)
+    result = cursor.fetchall()
+    conn.close()
+    return result
+
+def get_location_group_sizes(location_id):
+    """All-time number of bookings per group size at a location: [(group_size, bookings)]"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT g.group_size, SUM(g.bookings)
+        FROM rooms r
+        JOIN usage_group_size g ON g.room_id = r.id
+        WHERE r.location_id = ?
+        GROUP BY g.group_size
+        HAVING SUM(g.bookings) > 0
+        ORDER BY g.group_size
+    ''', (location_id,))
+    result = cursor.fetchall()
+    conn.close()
+    return result
+
 # -----------------
 # GPA HISTORY
 # -----------------
@@ -413,7 +1333,6 @@ def save_gpa_calculation(student_id, semester_credits, gpa, total_credits, cgpa,
         conn = get_connection()
         cursor = conn.cursor()
         
-        from datetime import datetime
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M")  # No seconds
         
         cursor.execute('''
@@ -659,10 +1578,11 @@ def list_notes(user_id, order="updated_desc", limit=10):
         order_by = "updated_at DESC" if order == "updated_desc" else "created_at DESC"
         
         cursor.execute(f"""
-            SELECT id, title, content, overlay, created_at, updated_at 
-            FROM notes 
-            WHERE user_id = ?
-            ORDER BY {order_by}
+            SELECT n.id, n.title, n.content, o.overlay, n.created_at, n.updated_at 
+            FROM notes n
+            LEFT JOIN note_overlays o ON o.note_id = n.id
+            WHERE n.user_id = ?
+            ORDER BY n.{order_by}
             LIMIT ?
         """, (user_id, limit))
         
@@ -672,7 +1592,7 @@ def list_notes(user_id, order="updated_desc", limit=10):
                 'id': row[0],
                 'title': row[1],
                 'content': row[2],
-                'overlay': row[3],  # may be None or JSON string
+                'overlay': row[3],  # None, binary overlay (bytes) or legacy JSON string
                 'created_at': row[4],
                 'updated_at': row[5]
             })
@@ -681,19 +1601,66 @@ def list_notes(user_id, order="updated_desc", limit=10):
         return notes
     except sqlite3.Error as e:
         print(f"Database error in list_notes: {e}")
+        if _is_unmigrated(e):
+            raise   # an old schema is not "no notes"
         return []
 
-def get_note(note_id, user_id):
-    """Get a specific note by ID, ensuring it belongs to the user"""
+def list_note_summaries(user_id, order="updated_desc", limit=10, with_content=False):
+    """
+    Id, title, folder and timestamps of a user's notes, never the overlay (for
+    lists and for deciding which notes to open). with_content=True adds
+    'content', so the most recent notes can be opened from this one query.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        order_by = "updated_at DESC" if order == "updated_desc" else "created_at DESC"
+        content = ", content" if with_content else ""
+        cursor.execute(f"""
+            SELECT id, title, folder_id, created_at, updated_at{content}
+            FROM notes
+            WHERE user_id = ?
+            ORDER BY {order_by}
+            LIMIT ?
+        """, (user_id, limit))
+        notes = []
+        for row in cursor.fetchall():
+            note = {'id': row[0], 'title': row[1], 'folder_id': row[2],
+                    'created_at': row[3], 'updated_at': row[4]}
+            if with_content:
+                note['content'] = row[5]
+            notes.append(note)
+        conn.close()
+        return notes
+    except sqlite3.Error as e:
+        print(f"Database error in list_note_summaries: {e}")
+        if _is_unmigrated(e):
+            raise   # an old schema is not "no notes"
+        return []
+
+def get_note(note_id, user_id, with_overlay=True):
+    """
+    Get a specific note by ID, ensuring it belongs to the user.
+    with_overlay=False skips the note_overlays lookup ('overlay' is then None);
+    fetch it later with get_note_overlay.
+    """
     try:
         conn = get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, title, content, overlay, created_at, updated_at 
-            FROM notes 
-            WHERE id = ? AND user_id = ?
-        """, (note_id, user_id))
+        if with_overlay:
+            cursor.execute("""
+                SELECT n.id, n.title, n.content, o.overlay, n.created_at, n.updated_at 
+                FROM notes n
+                LEFT JOIN note_overlays o ON o.note_id = n.id
+                WHERE n.id = ? AND n.user_id = ?
+            """, (note_id, user_id))
+        else:
+            cursor.execute("""
+                SELECT id, title, content, NULL, created_at, updated_at 
+                FROM notes 
+                WHERE id = ? AND user_id = ?
+            """, (note_id, user_id))
         
         row = cursor.fetchone()
         conn.close()
@@ -703,32 +1670,57 @@ def get_note(note_id, user_id):
                 'id': row[0],
                 'title': row[1],
                 'content': row[2],
-                'overlay': row[3],  # JSON string or None
+                'overlay': row[3],  # binary overlay (bytes), legacy JSON string or None
                 'created_at': row[4],
                 'updated_at': row[5]
             }
         return None
     except sqlite3.Error as e:
         print(f"Database error in get_note: {e}")
+        if _is_unmigrated(e):
+            raise   # an old schema is not "no notes"
         return None
+
+def get_note_overlay(note_id, user_id):
+    """The stored overlay of a user's note (bytes or legacy JSON string), or None"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT o.overlay
+            FROM note_overlays o
+            JOIN notes n ON n.id = o.note_id
+            WHERE o.note_id = ? AND n.user_id = ?
+        """, (note_id, user_id))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"Database error in get_note_overlay: {e}")
+        if _is_unmigrated(e):
+            raise   # an old schema is not "no notes"
+        return None
+
+def _store_overlay(cursor, note_id, overlay):
+    """Insert or replace the overlay row of a note (caller checked ownership)."""
+    cursor.execute("""
+        INSERT INTO note_overlays (note_id, overlay) VALUES (?, ?)
+        ON CONFLICT (note_id) DO UPDATE SET overlay = excluded.overlay
+    """, (note_id, overlay))
     
 def create_note(title, content, user_id, overlay=None):
-    """Create a new note for a user (overlay is optional JSON string)"""
+    """Create a new note for a user (overlay is optional: binary overlay bytes or JSON string)"""
     try:
         conn = get_connection()
         cursor = conn.cursor()
-        if overlay is None:
-            cursor.execute("""
-                INSERT INTO notes (title, content, user_id) 
-                VALUES (?, ?, ?)
-            """, (title, content, user_id))
-        else:
-            cursor.execute("""
-                INSERT INTO notes (title, content, overlay, user_id) 
-                VALUES (?, ?, ?, ?)
-            """, (title, content, overlay, user_id))
+        cursor.execute("""
+            INSERT INTO notes (title, content, user_id) 
+            VALUES (?, ?, ?)
+        """, (title, content, user_id))
         
         note_id = cursor.lastrowid
+        if overlay is not None:
+            _store_overlay(cursor, note_id, overlay)
         conn.commit()
         conn.close()
         return note_id
@@ -743,6 +1735,7 @@ def update_note(note_id, title, content, overlay_or_user=None, user_id=None):
     Backward-compatible signatures:
       - update_note(id, title, content, user_id)                      # legacy: 4th arg = user_id
       - update_note(id, title, content, overlay_json, user_id=uid)    # new: overlay passed, user_id keyword
+      - update_note(id, title, content, overlay_blob, user_id=uid)    # binary overlay (overlay_codec.encode)
 
     IMPORTANT FIX:
     Detect overlay JSON **independently** of whether user_id is provided. Previously,
@@ -776,6 +1769,9 @@ def update_note(note_id, title, content, overlay_or_user=None, user_id=None):
         # --- FIXED LOGIC: determine overlay independently of uid presence
         if _looks_like_json(overlay_or_user):
             overlay = overlay_or_user if isinstance(overlay_or_user, str) else overlay_or_user.decode("utf-8", "ignore")
+        elif isinstance(overlay_or_user, (bytes, bytearray, memoryview)):
+            # binary overlay; stored as a BLOB (student ids are never bytes)
+            overlay = bytes(overlay_or_user)
         elif uid is None:
             # legacy path: treat 4th arg as user_id when it's not overlay JSON
             uid = overlay_or_user
@@ -783,21 +1779,16 @@ def update_note(note_id, title, content, overlay_or_user=None, user_id=None):
         if uid is None:
             raise TypeError("update_note requires user_id (either as the legacy 4th argument or as the user_id= keyword).")
 
-        if overlay is None:
-            cursor.execute("""
-                UPDATE notes 
-                SET title = ?, content = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ? AND user_id = ?
-            """, (title, content, note_id, uid))
-        else:
-            cursor.execute("""
-                UPDATE notes 
-                SET title = ?, content = ?, overlay = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ? AND user_id = ?
-            """, (title, content, overlay, note_id, uid))
+        cursor.execute("""
+            UPDATE notes 
+            SET title = ?, content = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND user_id = ?
+        """, (title, content, note_id, uid))
+        changed = cursor.rowcount > 0
+        if changed and overlay is not None:
+            _store_overlay(cursor, note_id, overlay)
 
         conn.commit()
-        changed = cursor.rowcount > 0
         conn.close()
         return changed
     except sqlite3.Error as e:
@@ -806,17 +1797,19 @@ def update_note(note_id, title, content, overlay_or_user=None, user_id=None):
 
 
 def update_note_overlay(note_id, overlay_json, user_id):
-    """Update only the overlay JSON for a note (convenience helper)."""
+    """Update only the overlay (binary bytes or JSON string) for a note (convenience helper)."""
     try:
         conn = get_connection()
         cursor = conn.cursor()
         cursor.execute("""
             UPDATE notes 
-            SET overlay = ?, updated_at = CURRENT_TIMESTAMP
+            SET updated_at = CURRENT_TIMESTAMP
             WHERE id = ? AND user_id = ?
-        """, (overlay_json, note_id, user_id))
-        conn.commit()
+        """, (note_id, user_id))
         ok = cursor.rowcount > 0
+        if ok:
+            _store_overlay(cursor, note_id, overlay_json)
+        conn.commit()
         conn.close()
         return ok
     except sqlite3.Error as e:
@@ -875,3 +1868,19 @@ def set_notes_tool_prefs(user_id, prefs_dict):
     except sqlite3.Error as e:
         print(f"Database error in set_notes_tool_prefs: {e}")
         return False
+
+
+# -----------------
+# Optional profiling (APP_DB_PROFILE=1, see database/instrumentation.py)
+# -----------------
+def _install_profiler():
+    import sys
+    try:
+        from database import instrumentation
+    except ImportError:
+        import instrumentation
+    if instrumentation.enabled():
+        instrumentation.install(sys.modules[__name__])
+
+
+_install_profiler()
@@ -3,6 +3,11 @@ import sqlite3
 import hashlib
 import secrets
 
+try:
+    from database.migrations import migrate
+except ImportError:  # run as a script: python database/init_db.py
+    from migrations import migrate
+
 def hash_password(password, salt=None):
     """Hash password with salt using SHA-256"""
     if salt is None:
@@ -136,7 +141,7 @@ CREATE TABLE IF NOT EXISTS folders (
 )
 """) 
 
-# 10. Notes  (includes overlay column)
+# 10. Notes  (overlay column is legacy: overlays live in note_overlays since migration 8)
 cursor.execute("""
 CREATE TABLE IF NOT EXISTS notes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -252,11 +257,8 @@ for student_id, name, password, profile_picture in users_data:
         (student_id, name, password_hash, password_salt, profile_picture)
     )
 
-# Clear existing bookings and booking_students to avoid conflicts
-cursor.execute("DELETE FROM booking_students")
-cursor.execute("DELETE FROM bookings")
-
-# Insert Bookings and store their real IDs
+# Insert Bookings and store their real IDs (only into an empty table, so
+# re-running this script never wipes real bookings)
 booking_data = [
     ('R111', '2025-08-01', '10:00', '12:00', 'booked', '24WMD0624'),
     ('R112', '2025-08-02', '14:00', '16:00', 'booked', '24WMD0345'),
@@ -264,29 +266,31 @@ booking_data = [
     ('R320', '2025-08-04', '15:00', '17:00', 'booked', '24WMD0199')
 ]
 
-booking_ids = []
-for room_id, date, start_time, end_time, status, created_by in booking_data:
-    cursor.execute(
-        "INSERT INTO bookings (room_id, date, start_time, end_time, status, created_by) VALUES (?, ?, ?, ?, ?, ?)",
-        (room_id, date, start_time, end_time, status, created_by)
-    )
-    booking_ids.append(cursor.lastrowid)  # get actual AUTOINCREMENT ID
+cursor.execute("SELECT COUNT(*) FROM bookings")
+if cursor.fetchone()[0] == 0:
+    booking_ids = []
+    for room_id, date, start_time, end_time, status, created_by in booking_data:
+        cursor.execute(
+            "INSERT INTO bookings (room_id, date, start_time, end_time, status, created_by) VALUES (?, ?, ?, ?, ?, ?)",
+            (room_id, date, start_time, end_time, status, created_by)
+        )
+        booking_ids.append(cursor.lastrowid)  # get actual AUTOINCREMENT ID
 
-# Insert Booking Students using actual booking IDs
-booking_students_data = [
-    (booking_ids[0], '24WMD0624', 'Eun Eun Bond'),
-    (booking_ids[0], '24WMD0345', 'Yu Yu Bond'),
-    (booking_ids[1], '24WMD0345', 'Yu Yu Bond'),
-    (booking_ids[1], '24WMD0222', 'Nur Aisyah'),
-    (booking_ids[2], '24WMD0188', 'Tong Tong Bond'),
-    (booking_ids[3], '24WMD0199', 'John Tan')
-]
+    # Insert Booking Students using actual booking IDs
+    booking_students_data = [
+        (booking_ids[0], '24WMD0624', 'Eun Eun Bond'),
+        (booking_ids[0], '24WMD0345', 'Yu Yu Bond'),
+        (booking_ids[1], '24WMD0345', 'Yu Yu Bond'),
+        (booking_ids[1], '24WMD0222', 'Nur Aisyah'),
+        (booking_ids[2], '24WMD0188', 'Tong Tong Bond'),
+        (booking_ids[3], '24WMD0199', 'John Tan')
+    ]
 
-for booking_id, student_id, student_name in booking_students_data:
-    cursor.execute(
-        "INSERT INTO booking_students (booking_id, student_id, student_name) VALUES (?, ?, ?)",
-        (booking_id, student_id, student_name)
-    )
+    for booking_id, student_id, student_name in booking_students_data:
+        cursor.execute(
+            "INSERT INTO booking_students (booking_id, student_id, student_name) VALUES (?, ?, ?)",
+            (booking_id, student_id, student_name)
+        )
 
 # ---------- Seed a welcome note if notes is empty ----------
 cursor.execute("SELECT COUNT(*) FROM notes")
@@ -299,5 +303,11 @@ if cursor.fetchone()[0] == 0:
         )
 
 conn.commit()
+
+# ---------- Bring the schema up to date (indexes etc.) ----------
+applied = migrate(conn)
+if applied:
+    print(f"Applied schema migrations: {applied}")
+
 conn.close()
 print(f"Database initialized successfully at: {DB_PATH}")
@@ -0,0 +1,326 @@
+"""
+Opt-in SQL instrumentation for db_manager.
+
+Enable by setting APP_DB_PROFILE=1 before starting the app (or any script that
+imports database.db_manager). Every public db_manager function is then wrapped
+and records:
+  - call count, latency percentiles and a latency histogram
+  - rows returned (len() of list/tuple/dict results)
+  - statements executed (via sqlite3 set_trace_callback) and connections opened
+  - EXPLAIN QUERY PLAN for statements slower than APP_DB_SLOW_MS (default 20)
+  - repeated statements / nested calls within one outer call (N+1 candidates)
+
+A JSON report is written on exit to APP_DB_PROFILE_OUT (default
+db_profile.json), or on demand with write_report().
+
+Statement time is measured from one trace callback to the next (or to the end
+of the enclosing call), which is accurate enough to find the slow ones.
+"""
+import atexit
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+ENV_FLAG = "APP_DB_PROFILE"
+ENV_OUT = "APP_DB_PROFILE_OUT"
+ENV_SLOW_MS = "APP_DB_SLOW_MS"
+
+# Histogram bucket upper bounds in milliseconds.
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+MAX_SAMPLES = 20000          # latency samples kept per function (reservoir)
+MAX_SLOW_STATEMENTS = 200
+N_PLUS_ONE_THRESHOLD = 5     # same statement/function this many times in one call
+
+# Functions that are helpers rather than data access.
+_NOT_WRAPPED = {"hash_password", "verify_password", "configure_connection",
+                "invalidate_reference_cache", "reference_cache_stats", "session",
+                "close_connection", "close_all_connections", "slot_mask", "add_booking_listener",
+                "remove_booking_listener", "busy_retry_stats", "series_dates", "data_version"}
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def _normalize(sql):
+    """Collapse whitespace and replace literals with ? so per-id queries group together."""
+    return _LITERALS.sub("?", " ".join(sql.split()))
+
+
+def enabled() -> bool:
+    return os.environ.get(ENV_FLAG, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class _FunctionStats:
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "rows", "statements",
+                 "max_statements_per_call", "samples", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.statements = 0
+        self.max_statements_per_call = 0
+        self.samples = []
+        self.histogram = [0] * len(HISTOGRAM_BOUNDS_MS)
+
+    def add(self, ms, rows, statements):
+        self.calls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.statements += statements
+        self.max_statements_per_call = max(self.max_statements_per_call, statements)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(ms)
+        else:
+            j = random.randrange(self.calls)
+            if j < MAX_SAMPLES:
+                self.samples[j] = ms
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                self.histogram[i] += 1
+                break
+
+    def to_dict(self):
+        s = sorted(self.samples)
+        pct = lambda q: round(s[min(len(s) - 1, int(q * len(s)))], 3) if s else 0.0
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": pct(0.50),
+            "p90_ms": pct(0.90),
+            "p99_ms": pct(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "statements": self.statements,
+            "max_statements_per_call": self.max_statements_per_call,
+            "histogram_ms": {("inf" if b == float("inf") else str(b)): n
+                             for b, n in zip(HISTOGRAM_BOUNDS_MS, self.histogram) if n},
+        }
+
+
+class _Frame:
+    """One active instrumented call on a thread."""
+    __slots__ = ("name", "statements", "sql_counts", "call_counts", "slow")
+
+    def __init__(self, name):
+        self.name = name
+        self.statements = 0
+        self.sql_counts = Counter()
+        self.call_counts = Counter()
+        self.slow = []
+
+
+class Profiler:
+    def __init__(self, slow_ms=20.0):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.functions = defaultdict(_FunctionStats)
+        self.sql = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "functions": set()})
+        self.slow_statements = []
+        self.n_plus_one = {}
+        self.connections_opened = 0
+        self.connection_handles = 0
+        self.started = datetime.now().isoformat(timespec="seconds")
+
+    # ---- per-thread state
+    def _stack(self):
+        st = getattr(self.local, "stack", None)
+        if st is None:
+            st = self.local.stack = []
+        return st
+
+    def _close_pending(self):
+        """Finish timing the statement traced last on this thread."""
+        pending = getattr(self.local, "pending", None)
+        if not pending:
+            return
+        self.local.pending = None
+        sql, t0, conn = pending
+        ms = (time.perf_counter() - t0) * 1000.0
+        stack = self._stack()
+        owner = stack[-1].name if stack else "<unscoped>"
+        with self.lock:
+            entry = self.sql[_normalize(sql)]
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["functions"].add(owner)
+        if ms >= self.slow_ms and stack:
+            stack[-1].slow.append((sql, ms, conn))
+
+    # ---- hooks
+    def on_connect(self, conn):
+        """Called by db_manager for every newly opened sqlite3 connection."""
+        with self.lock:
+            self.connections_opened += 1
+
+        def trace(sql, _conn=conn):
+            if sql.startswith("EXPLAIN QUERY PLAN"):
+                return
+            pending = getattr(self.local, "pending", None)
+            if pending and pending[0] == sql and pending[2] is _conn:
+                return  # trigger programs re-report the statement that fired them
+            self._close_pending()
+            self.local.pending = (sql, time.perf_counter(), _conn)
+            shape = _normalize(sql)
+            for frame in self._stack():
+                frame.statements += 1
+                frame.sql_counts[shape] += 1
+
+        conn.set_trace_callback(trace)
+
+    def on_handle(self):
+        with self.lock:
+            self.connection_handles += 1
+
+    # ---- scopes
+    def enter(self, name):
+        self._close_pending()
+        stack = self._stack()
+        for frame in stack:
+            frame.call_counts[name] += 1
+        frame = _Frame(name)
+        stack.append(frame)
+        return frame
+
+    def leave(self, frame, ms, result, failed=False):
+        self._close_pending()
+        stack = self._stack()
+        if stack and stack[-1] is frame:
+            stack.pop()
+        rows = len(result) if isinstance(result, (list, tuple, dict)) else (0 if result is None else 1)
+        plans = []
+        for sql, sql_ms, conn in frame.slow:
+            plans.append({"function": frame.name, "sql": " ".join(sql.split()), "ms": round(sql_ms, 3),
+                          "plan": self._explain(conn, sql)})
+        with self.lock:
+            stats = self.functions[frame.name]
+            stats.add(ms, rows, frame.statements)
+            if failed:
+                stats.errors += 1
+            room = MAX_SLOW_STATEMENTS - len(self.slow_statements)
+            if room > 0:
+                self.slow_statements.extend(plans[:room])
+            for kind, counts in (("statement", frame.sql_counts), ("call", frame.call_counts)):
+                for what, n in counts.items():
+                    if n >= N_PLUS_ONE_THRESHOLD:
+                        key = (frame.name, kind, what)
+                        self.n_plus_one[key] = max(n, self.n_plus_one.get(key, 0))
+
+    def _explain(self, conn, sql):
+        head = sql.lstrip().split(" ", 1)[0].upper()
+        if head not in ("SELECT", "UPDATE", "DELETE", "WITH", "INSERT"):
+            return []
+        try:
+            return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+        except Exception as e:
+            return [f"<explain failed: {e}>"]
+
+    # ---- report
+    def report(self):
+        with self.lock:
+            return {
+                "started_at": self.started,
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "slow_threshold_ms": self.slow_ms,
+                "connections_opened": self.connections_opened,
+                "connection_handles": self.connection_handles,
+                "functions": {k: v.to_dict() for k, v in
+                              sorted(self.functions.items(), key=lambda kv: -kv[1].total_ms)},
+                "statements": {k: {"count": v["count"], "total_ms": round(v["total_ms"], 3),
+                                   "max_ms": round(v["max_ms"], 3), "functions": sorted(v["functions"])}
+                               for k, v in sorted(self.sql.items(), key=lambda kv: -kv[1]["total_ms"])},
+                "slow_statements": list(self.slow_statements),
+                "n_plus_one": [{"function": f, "kind": kind, "what": what, "max_per_call": n}
+                               for (f, kind, what), n in
+                               sorted(self.n_plus_one.items(), key=lambda kv: -kv[1])],
+            }
+
+
+_profiler = None
+
+
+def get_profiler():
+    return _profiler
+
+
+def profiled(name=None):
+    """
+    Decorator that records a function as an instrumented scope. When profiling
+    is disabled the function is returned unchanged.
+    """
+    def deco(fn):
+        if _profiler is None:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            prof = _profiler
+            frame = prof.enter(label)
+            t0 = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                prof.leave(frame, (time.perf_counter() - t0) * 1000.0, None, failed=True)
+                raise
+            prof.leave(frame, (time.perf_counter() - t0) * 1000.0, result)
+            return result
+        wrapper.__wrapped_for_profile__ = True
+        return wrapper
+    return deco
+
+
+def install(module, slow_ms=None, out_path=None):
+    """Start profiling and wrap every public function of a db_manager-like module."""
+    global _profiler
+    if _profiler is None:
+        if slow_ms is None:
+            slow_ms = float(os.environ.get(ENV_SLOW_MS, "20") or 20)
+        _profiler = Profiler(slow_ms=slow_ms)
+        out = out_path or os.environ.get(ENV_OUT) or "db_profile.json"
+        atexit.register(write_report, out)
+
+    module._connect_hooks.append(_profiler.on_connect)
+    for attr, fn in list(vars(module).items()):
+        if attr.startswith("_") or attr in _NOT_WRAPPED or not callable(fn):
+            continue
+        if getattr(fn, "__module__", None) != module.__name__ or isinstance(fn, type):
+            continue
+        if getattr(fn, "__wrapped_for_profile__", False):
+            continue
+        if attr == "get_connection":
+            setattr(module, attr, _wrap_get_connection(fn))
+        else:
+            setattr(module, attr, profiled(f"db_manager.{attr}")(fn))
+    return _profiler
+
+
+def _wrap_get_connection(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _profiler.on_handle()
+        return fn(*args, **kwargs)
+    wrapper.__wrapped_for_profile__ = True
+    return wrapper
+
+
+def write_report(path="db_profile.json"):
+    """Write the JSON report (no-op when profiling is off). Returns the path."""
+    if _profiler is None:
+        return None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(_profiler.report(), f, indent=2)
+    return path
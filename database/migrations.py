@@ -0,0 +1,443 @@
+"""
+Versioned, non-destructive schema migrations.
+
+The schema version lives in PRAGMA user_version. init_db.py creates the base
+tables (version 0); every entry in MIGRATIONS moves the database one version
+forward. Migrations only ever add things (IF NOT EXISTS everywhere), replace
+triggers or move data into a table they add (copy first, then clear the old
+place, in the same transaction), never delete it, so running migrate() at
+every app start is safe, and two app instances starting at the same time
+cannot both apply the same step.
+
+Run by hand from the project root:
+    python -m database.migrations            # apply pending migrations
+    python -m database.migrations --status   # show current/latest version
+"""
+import sqlite3
+
+from database.db_manager import (BOOKING_OVERLAP_MESSAGE, EPOCH_JULIAN_DAY, OCCUPANCY_DAY_START,
+                                 OCCUPANCY_SLOT_MINUTES, OCCUPANCY_SLOTS)
+
+
+def _hhmm(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _fill_occupancy_slots(cur):
+    """One row per half-hour slot of the bookable day (slot n covers bit 1 << n)."""
+    cur.executemany(
+        "INSERT OR IGNORE INTO occupancy_slots (n, start_time, end_time, bit) VALUES (?, ?, ?, ?)",
+        [(n, _hhmm(OCCUPANCY_DAY_START + n * OCCUPANCY_SLOT_MINUTES),
+          _hhmm(OCCUPANCY_DAY_START + (n + 1) * OCCUPANCY_SLOT_MINUTES), 1 << n)
+         for n in range(OCCUPANCY_SLOTS)])
+
+
+def _recompute_occupancy(row):
+    """Trigger body statement rebuilding the bitmap of `row`'s room and day from its booked bookings."""
+    return f"""
+        INSERT OR REPLACE INTO room_day_occupancy (room_id, date, mask)
+        SELECT {row}.room_id, {row}.date, COALESCE(SUM(s.bit), 0) FROM occupancy_slots s
+        WHERE EXISTS (
+            SELECT 1 FROM bookings b
+            WHERE b.room_id = {row}.room_id AND b.date = {row}.date AND b.status = 'booked'
+            AND b.start_time < s.end_time AND b.end_time > s.start_time);"""
+
+
+def _recompute_occupancy_minutes(row):
+    """
+    _recompute_occupancy on the integer day/minute columns (idx_bookings_room_day_min);
+    slot n spans OCCUPANCY_DAY_START + n * OCCUPANCY_SLOT_MINUTES minutes.
+    """
+    slot_start = f"({OCCUPANCY_DAY_START} + s.n * {OCCUPANCY_SLOT_MINUTES})"
+    return f"""
+        INSERT OR REPLACE INTO room_day_occupancy (room_id, date, mask)
+        SELECT {row}.room_id, {row}.date, COALESCE(SUM(s.bit), 0) FROM occupancy_slots s
+        WHERE EXISTS (
+            SELECT 1 FROM bookings b
+            WHERE b.room_id = {row}.room_id AND b.day_number = {_day_number(f"{row}.date")}
+            AND b.status = 'booked'
+            AND b.start_min < {slot_start} + {OCCUPANCY_SLOT_MINUTES} AND b.end_min > {slot_start});"""
+
+
+def _backfill_occupancy(start_min, end_min):
+    """Statement (re)computing room_day_occupancy from every booked booking."""
+    slot_start = f"({OCCUPANCY_DAY_START} + s.n * {OCCUPANCY_SLOT_MINUTES})"
+    return f"""INSERT OR REPLACE INTO room_day_occupancy (room_id, date, mask)
+            SELECT room_id, date, SUM(bit) FROM (
+                SELECT DISTINCT b.room_id, b.date, s.bit
+                FROM bookings b JOIN occupancy_slots s
+                  ON {start_min} < {slot_start} + {OCCUPANCY_SLOT_MINUTES} AND {end_min} > {slot_start}
+                WHERE b.status = 'booked')
+            GROUP BY room_id, date"""
+
+
+def _reject_overlap(extra=""):
+    """Trigger body aborting the write when NEW overlaps another booked booking."""
+    return f"""
+        SELECT RAISE(ABORT, '{BOOKING_OVERLAP_MESSAGE}')
+        WHERE EXISTS (
+            SELECT 1 FROM bookings b
+            WHERE b.room_id = NEW.room_id AND b.date = NEW.date AND b.status = 'booked'
+            AND b.start_time < NEW.end_time AND b.end_time > NEW.start_time{extra});"""
+
+
+def _minutes(expr):
+    """SQL for minutes since midnight of an "HH:MM" expression."""
+    return f"(CAST(substr({expr}, 1, 2) AS INTEGER) * 60 + CAST(substr({expr}, 4, 2) AS INTEGER))"
+
+
+def _day_number(expr):
+    """SQL for days since 1970-01-01 of a "YYYY-MM-DD" expression."""
+    return f"CAST(julianday({expr}) - {EPOCH_JULIAN_DAY} AS INTEGER)"
+
+
+def _reject_overlap_minutes(extra=""):
+    """
+    _reject_overlap on the integer day/minute columns (idx_bookings_room_day_min).
+    Generated columns of NEW are not reliable in BEFORE triggers, so NEW's side
+    is computed from its text columns.
+    """
+    return f"""
+        SELECT RAISE(ABORT, '{BOOKING_OVERLAP_MESSAGE}')
+        WHERE EXISTS (
+            SELECT 1 FROM bookings b
+            WHERE b.room_id = NEW.room_id AND b.day_number = {_day_number("NEW.date")} AND b.status = 'booked'
+            AND b.start_min < {_minutes("NEW.end_time")} AND b.end_min > {_minutes("NEW.start_time")}{extra});"""
+
+
+def _fill_usage_hours(cur):
+    """One row per hour of the day; usage is aggregated per room, day and hour."""
+    cur.executemany("INSERT OR IGNORE INTO usage_hours (hour, start_min, end_min) VALUES (?, ?, ?)",
+                    [(h, h * 60, (h + 1) * 60) for h in range(24)])
+
+
+def _apply_usage(row, sign):
+    """
+    Trigger body statements adding (sign 1) or removing (sign -1) one booking's
+    contribution to the usage aggregates. Cancelled bookings count as bookings
+    and cancellations but add no booked minutes.
+    """
+    start, end = _minutes(f"{row}.start_time"), _minutes(f"{row}.end_time")
+    booked = f"({row}.status <> 'cancelled')"
+    hours = f"""
+        FROM usage_hours h
+        WHERE {booked} AND h.start_min < {end} AND h.end_min > {start}"""
+    overlap = f"{sign} * (MIN({end}, h.end_min) - MAX({start}, h.start_min))"
+    return f"""
+        INSERT INTO usage_room_day (room_id, date, bookings, cancellations, booked_minutes)
+        VALUES ({row}.room_id, {row}.date, {sign}, {sign} * ({row}.status = 'cancelled'),
+                {sign} * {booked} * ({end} - {start}))
+        ON CONFLICT (room_id, date) DO UPDATE SET
+            bookings = bookings + excluded.bookings,
+            cancellations = cancellations + excluded.cancellations,
+            booked_minutes = booked_minutes + excluded.booked_minutes;
+        INSERT INTO usage_room_hour (room_id, date, hour, booked_minutes)
+        SELECT {row}.room_id, {row}.date, h.hour, {overlap} {hours}
+        ON CONFLICT (room_id, date, hour) DO UPDATE SET
+            booked_minutes = booked_minutes + excluded.booked_minutes;
+        INSERT INTO usage_room_weekday_hour (room_id, weekday, hour, booked_minutes)
+        SELECT {row}.room_id, CAST(strftime('%w', {row}.date) AS INTEGER), h.hour, {overlap} {hours}
+        ON CONFLICT (room_id, weekday, hour) DO UPDATE SET
+            booked_minutes = booked_minutes + excluded.booked_minutes;"""
+
+
+def _move_group_size(row, before, after):
+    """
+    Trigger body statements moving a booking from group size `before` to `after`
+    after a booking_students change (sizes are SQL expressions).
+    """
+    return f"""
+        UPDATE usage_group_size SET bookings = bookings - 1
+        WHERE room_id = (SELECT room_id FROM bookings WHERE id = {row}.booking_id) AND group_size = {before};
+        INSERT INTO usage_group_size (room_id, group_size, bookings)
+        SELECT room_id, {after}, 1 FROM bookings WHERE id = {row}.booking_id AND {after} > 0
+        ON CONFLICT (room_id, group_size) DO UPDATE SET bookings = bookings + 1;"""
+
+
+def _add_column(table, column, declaration):
+    """Step adding a column unless it is already there (ALTER TABLE has no IF NOT EXISTS)."""
+    def step(cur):
+        if column not in {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return step
+
+
+# -----------------
+# Migrations
+# -----------------
+# (version, description, steps). A step is an SQL string or a callable taking
+# the cursor, for migrations that need Python to build their SQL.
+MIGRATIONS = [
+    (1, "Covering indexes for hot booking, notes, folder and GPA queries", [
+        # availability / timetable: room + day, then status and the time window
+        """CREATE INDEX IF NOT EXISTS idx_bookings_room_date
+           ON bookings(room_id, date, status, start_time, end_time, created_by)""",
+        # "my bookings": bookings created by a student
+        "CREATE INDEX IF NOT EXISTS idx_bookings_created_by ON bookings(created_by, date)",
+        # "my bookings": bookings a student takes part in
+        "CREATE INDEX IF NOT EXISTS idx_booking_students_student ON booking_students(student_id, booking_id)",
+        # rooms of a location (timetable, room finder)
+        "CREATE INDEX IF NOT EXISTS idx_rooms_location ON rooms(location_id, feature_id, capacity)",
+        # dashboard folder filter and recent notes list
+        "CREATE INDEX IF NOT EXISTS idx_notes_user_folder_updated ON notes(user_id, folder_id, updated_at)",
+        "CREATE INDEX IF NOT EXISTS idx_notes_user_updated ON notes(user_id, updated_at)",
+        # folder tree
+        "CREATE INDEX IF NOT EXISTS idx_folders_user_parent ON folders(user_id, parent_id)",
+        # GPA history and its courses
+        "CREATE INDEX IF NOT EXISTS idx_gpa_history_student_ts ON gpa_history(student_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_gpa_courses_history ON gpa_courses(gpa_history_id)",
+    ]),
+    (2, "Per-room, per-day half-hour occupancy bitmap kept in sync by triggers", [
+        # one row per bookable half-hour slot; bit = 1 << n
+        """CREATE TABLE IF NOT EXISTS occupancy_slots (
+               n INTEGER PRIMARY KEY,
+               start_time TEXT NOT NULL,
+               end_time TEXT NOT NULL,
+               bit INTEGER NOT NULL)""",
+        _fill_occupancy_slots,
+        """CREATE TABLE IF NOT EXISTS room_day_occupancy (
+               room_id TEXT NOT NULL,
+               date TEXT NOT NULL,
+               mask INTEGER NOT NULL,
+               PRIMARY KEY (room_id, date)) WITHOUT ROWID""",
+        # the integer columns arrive in migration 7; compute the minutes here
+        _backfill_occupancy(_minutes("b.start_time"), _minutes("b.end_time")),
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_occupancy_insert
+            AFTER INSERT ON bookings WHEN NEW.status = 'booked'
+            BEGIN {_recompute_occupancy("NEW")} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_occupancy_delete
+            AFTER DELETE ON bookings WHEN OLD.status = 'booked'
+            BEGIN {_recompute_occupancy("OLD")} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_occupancy_update
+            AFTER UPDATE OF room_id, date, start_time, end_time, status ON bookings
+            WHEN OLD.status = 'booked' OR NEW.status = 'booked'
+            BEGIN {_recompute_occupancy("OLD")} {_recompute_occupancy("NEW")} END""",
+    ]),
+    (3, "Index for the booking expiry sweep", [
+        # booked bookings by day and end time: expiry sweep and next-end lookups
+        "CREATE INDEX IF NOT EXISTS idx_bookings_status_date_end ON bookings(status, date, end_time)",
+    ]),
+    (4, "Reject overlapping bookings inside the writing transaction", [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_no_overlap_insert
+            BEFORE INSERT ON bookings WHEN NEW.status = 'booked'
+            BEGIN {_reject_overlap()} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_no_overlap_update
+            BEFORE UPDATE OF room_id, date, start_time, end_time, status ON bookings
+            WHEN NEW.status = 'booked'
+            BEGIN {_reject_overlap(" AND b.id <> NEW.id")} END""",
+    ]),
+    (5, "Recurring booking series", [
+        """CREATE TABLE IF NOT EXISTS booking_series (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               created_by TEXT NOT NULL,
+               room_id TEXT NOT NULL,
+               start_time TEXT NOT NULL,
+               end_time TEXT NOT NULL,
+               interval_days INTEGER NOT NULL,
+               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+               FOREIGN KEY (created_by) REFERENCES users(student_id),
+               FOREIGN KEY (room_id) REFERENCES rooms(id))""",
+        _add_column("bookings", "series_id", "INTEGER REFERENCES booking_series(id)"),
+        # occurrences of a series (series cancellation, "part of a series" lookups)
+        "CREATE INDEX IF NOT EXISTS idx_bookings_series ON bookings(series_id, status, date)",
+    ]),
+    (6, "Room utilization aggregates kept up to date by triggers", [
+        """CREATE TABLE IF NOT EXISTS usage_hours (
+               hour INTEGER PRIMARY KEY,
+               start_min INTEGER NOT NULL,
+               end_min INTEGER NOT NULL)""",
+        _fill_usage_hours,
+        # bookings, cancellations and booked minutes per room and day
+        """CREATE TABLE IF NOT EXISTS usage_room_day (
+               room_id TEXT NOT NULL,
+               date TEXT NOT NULL,
+               bookings INTEGER NOT NULL DEFAULT 0,
+               cancellations INTEGER NOT NULL DEFAULT 0,
+               booked_minutes INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (room_id, date)) WITHOUT ROWID""",
+        # booked minutes per room, day and hour of the day
+        """CREATE TABLE IF NOT EXISTS usage_room_hour (
+               room_id TEXT NOT NULL,
+               date TEXT NOT NULL,
+               hour INTEGER NOT NULL,
+               booked_minutes INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (room_id, date, hour)) WITHOUT ROWID""",
+        # all-time roll-up of usage_room_hour by weekday (0 = Sunday)
+        """CREATE TABLE IF NOT EXISTS usage_room_weekday_hour (
+               room_id TEXT NOT NULL,
+               weekday INTEGER NOT NULL,
+               hour INTEGER NOT NULL,
+               booked_minutes INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (room_id, weekday, hour)) WITHOUT ROWID""",
+        # bookings per room by number of students
+        """CREATE TABLE IF NOT EXISTS usage_group_size (
+               room_id TEXT NOT NULL,
+               group_size INTEGER NOT NULL,
+               bookings INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (room_id, group_size)) WITHOUT ROWID""",
+        # one-off backfill from the existing bookings
+        f"""INSERT OR REPLACE INTO usage_room_day (room_id, date, bookings, cancellations, booked_minutes)
+            SELECT room_id, date, COUNT(*), SUM(status = 'cancelled'),
+                   SUM((status <> 'cancelled') * ({_minutes("end_time")} - {_minutes("start_time")}))
+            FROM bookings GROUP BY room_id, date""",
+        f"""INSERT OR REPLACE INTO usage_room_hour (room_id, date, hour, booked_minutes)
+            SELECT b.room_id, b.date, h.hour, SUM(MIN(b.e, h.end_min) - MAX(b.s, h.start_min))
+            FROM (SELECT room_id, date, {_minutes("start_time")} AS s, {_minutes("end_time")} AS e
+                  FROM bookings WHERE status <> 'cancelled') b
+            JOIN usage_hours h ON h.start_min < b.e AND h.end_min > b.s
+            GROUP BY b.room_id, b.date, h.hour""",
+        """INSERT OR REPLACE INTO usage_room_weekday_hour (room_id, weekday, hour, booked_minutes)
+            SELECT room_id, CAST(strftime('%w', date) AS INTEGER), hour, SUM(booked_minutes)
+            FROM usage_room_hour GROUP BY 1, 2, 3""",
+        """INSERT OR REPLACE INTO usage_group_size (room_id, group_size, bookings)
+            SELECT b.room_id, n, COUNT(*)
+            FROM (SELECT booking_id, COUNT(*) AS n FROM booking_students GROUP BY booking_id) g
+            JOIN bookings b ON b.id = g.booking_id
+            GROUP BY b.room_id, n""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_usage_insert
+            AFTER INSERT ON bookings
+            BEGIN {_apply_usage("NEW", 1)} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_usage_delete
+            AFTER DELETE ON bookings
+            BEGIN {_apply_usage("OLD", -1)} END""",
+        # booked -> completed changes nothing here, so the expiry sweep skips the trigger
+        f"""CREATE TRIGGER IF NOT EXISTS trg_bookings_usage_update
+            AFTER UPDATE OF room_id, date, start_time, end_time, status ON bookings
+            WHEN OLD.room_id IS NOT NEW.room_id OR OLD.date IS NOT NEW.date
+              OR OLD.start_time IS NOT NEW.start_time OR OLD.end_time IS NOT NEW.end_time
+              OR (OLD.status = 'cancelled') <> (NEW.status = 'cancelled')
+            BEGIN {_apply_usage("OLD", -1)} {_apply_usage("NEW", 1)} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_booking_students_usage_insert
+            AFTER INSERT ON booking_students
+            BEGIN {_move_group_size("NEW", "(SELECT COUNT(*) - 1 FROM booking_students WHERE booking_id = NEW.booking_id)",
+                                    "(SELECT COUNT(*) FROM booking_students WHERE booking_id = NEW.booking_id)")} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_booking_students_usage_delete
+            AFTER DELETE ON booking_students
+            BEGIN {_move_group_size("OLD", "(SELECT COUNT(*) + 1 FROM booking_students WHERE booking_id = OLD.booking_id)",
+                                    "(SELECT COUNT(*) FROM booking_students WHERE booking_id = OLD.booking_id)")} END""",
+    ]),
+    (7, "Integer day and minute columns for booking intervals", [
+        # derived from date/start_time/end_time, so every writer stays unchanged
+        _add_column("bookings", "day_number",
+                    f"INTEGER GENERATED ALWAYS AS ({_day_number('date')}) VIRTUAL"),
+        _add_column("bookings", "start_min",
+                    f"INTEGER GENERATED ALWAYS AS {_minutes('start_time')} VIRTUAL"),
+        _add_column("bookings", "end_min",
+                    f"INTEGER GENERATED ALWAYS AS {_minutes('end_time')} VIRTUAL"),
+        # overlap tests: one room, one day, then a range on the minutes
+        """CREATE INDEX IF NOT EXISTS idx_bookings_room_day_min
+           ON bookings(room_id, day_number, status, start_min, end_min)""",
+        # expiry sweep and next-end lookups
+        "CREATE INDEX IF NOT EXISTS idx_bookings_status_day_end ON bookings(status, day_number, end_min)",
+        "DROP TRIGGER IF EXISTS trg_bookings_no_overlap_insert",
+        "DROP TRIGGER IF EXISTS trg_bookings_no_overlap_update",
+        f"""CREATE TRIGGER trg_bookings_no_overlap_insert
+            BEFORE INSERT ON bookings WHEN NEW.status = 'booked'
+            BEGIN {_reject_overlap_minutes()} END""",
+        f"""CREATE TRIGGER trg_bookings_no_overlap_update
+            BEFORE UPDATE OF room_id, date, start_time, end_time, status ON bookings
+            WHEN NEW.status = 'booked'
+            BEGIN {_reject_overlap_minutes(" AND b.id <> NEW.id")} END""",
+    ]),
+    (8, "Note overlays in their own table", [
+        # ink overlays are large; keep them out of the rows every notes query reads
+        """CREATE TABLE IF NOT EXISTS note_overlays (
+               note_id INTEGER PRIMARY KEY REFERENCES notes(id) ON DELETE CASCADE,
+               overlay BLOB NOT NULL)""",
+        """INSERT OR IGNORE INTO note_overlays (note_id, overlay)
+           SELECT id, overlay FROM notes WHERE overlay IS NOT NULL AND overlay <> ''""",
+        # notes.overlay stays (init_db still creates it) but is no longer used
+        "UPDATE notes SET overlay = NULL WHERE overlay IS NOT NULL",
+    ]),
+    (9, "Occupancy triggers and series lookups on the integer day and minute columns", [
+        # series cancellation: one series, its booked occurrences from a day on
+        "CREATE INDEX IF NOT EXISTS idx_bookings_series_day ON bookings(series_id, status, day_number)",
+        "DROP TRIGGER IF EXISTS trg_bookings_occupancy_insert",
+        "DROP TRIGGER IF EXISTS trg_bookings_occupancy_delete",
+        "DROP TRIGGER IF EXISTS trg_bookings_occupancy_update",
+        f"""CREATE TRIGGER trg_bookings_occupancy_insert
+            AFTER INSERT ON bookings WHEN NEW.status = 'booked'
+            BEGIN {_recompute_occupancy_minutes("NEW")} END""",
+        f"""CREATE TRIGGER trg_bookings_occupancy_delete
+            AFTER DELETE ON bookings WHEN OLD.status = 'booked'
+            BEGIN {_recompute_occupancy_minutes("OLD")} END""",
+        f"""CREATE TRIGGER trg_bookings_occupancy_update
+            AFTER UPDATE OF room_id, date, start_time, end_time, status ON bookings
+            WHEN OLD.status = 'booked' OR NEW.status = 'booked'
+            BEGIN {_recompute_occupancy_minutes("OLD")} {_recompute_occupancy_minutes("NEW")} END""",
+        # re-derive every bitmap from the integer columns the triggers now use
+        _backfill_occupancy("b.start_min", "b.end_min"),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(conn) -> int:
+    """Return the schema version recorded in the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _apply(conn, version, steps):
+    """Apply one migration in its own write transaction (no-op if already applied)."""
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        # Another instance may have migrated while we waited for the lock.
+        if current_version(conn) >= version:
+            conn.rollback()
+            return False
+        for step in steps:
+            if callable(step):
+                step(cur)
+            else:
+                cur.execute(step)
+        cur.execute(f"PRAGMA user_version = {int(version)}")
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def migrate(conn=None, target=None):
+    """
+    Bring the database up to `target` (default: latest) and return the list of
+    versions applied. Uses the shared db_manager connection when none is given.
+    """
+    own = conn is None
+    if own:
+        from database.db_manager import get_connection
+        conn = get_connection()
+    applied = []
+    try:
+        target = LATEST_VERSION if target is None else target
+        if conn.in_transaction:
+            conn.commit()
+        for version, _desc, steps in MIGRATIONS:
+            if version > target or current_version(conn) >= version:
+                continue
+            if _apply(conn, version, steps):
+                applied.append(version)
+    finally:
+        if own:
+            conn.close()
+    return applied
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import db_manager
+
+    ap = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    ap.add_argument("--db", default=db_manager.DB_PATH)
+    ap.add_argument("--status", action="store_true", help="only print the schema version")
+    args = ap.parse_args()
+
+    c = sqlite3.connect(args.db)
+    if args.status:
+        print(f"schema version {current_version(c)} (latest {LATEST_VERSION})")
+    else:
+        done = migrate(c)
+        print(f"Applied migrations: {done or 'none'}; schema version {current_version(c)}")
+    c.close()
@@ -0,0 +1,179 @@
+"""
+EXPLAIN QUERY PLAN checks for the db_manager queries.
+
+Each check calls a real db_manager function against a migrated copy of the
+database, captures the SQL it runs and asserts SQLite answers it with index
+searches rather than full table scans.
+
+Run from the project root:
+    python -m database.query_plans
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db_manager as db
+from database.migrations import migrate
+
+USER = "24WMD0188"
+DAY = "2025-08-01"
+
+# Small reference tables that are legitimately read whole.
+ALLOWED_SCANS = {"locations", "features"}
+
+# (name, call)
+CHECKS = [
+    ("get_user", lambda: db.get_user(USER, "x")),
+    ("get_profile_picture", lambda: db.get_profile_picture(USER)),
+    ("get_location_name", lambda: db.get_location_name(1)),
+    ("get_rooms_by_location", lambda: db.get_rooms_by_location(1)),
+    ("check_room_availability", lambda: db.check_room_availability("R111", DAY, "10:00", "12:00")),
+    ("find_available_rooms", lambda: db.find_available_rooms(1, "F01", 1, DAY, "10:00", "12:00")),
+    ("check_room_availability(off-grid)", lambda: db.check_room_availability("R111", DAY, "10:15", "12:00")),
+    ("find_available_rooms(off-grid)", lambda: db.find_available_rooms(1, "F01", 1, DAY, "10:15", "12:00")),
+    ("get_location_occupancy", lambda: db.get_location_occupancy(1, DAY)),
+    ("get_location_occupancy_range", lambda: db.get_location_occupancy_range(1, DAY, "2025-08-08")),
+    ("get_room_day_mask", lambda: db.get_room_day_mask("R111", DAY)),
+    ("get_bookings_by_user", lambda: db.get_bookings_by_user(USER)),
+    ("get_bookings_by_user(location)", lambda: db.get_bookings_by_user(USER, 1)),
+    ("get_bookings_by_user_all_locations", lambda: db.get_bookings_by_user_all_locations(USER)),
+    ("get_booking_creator", lambda: db.get_booking_creator(1)),
+    ("get_booking_series_id", lambda: db.get_booking_series_id(1)),
+    ("find_series_conflicts", lambda: db.find_series_conflicts("R111", [DAY, "2025-08-08"], "10:00", "12:00")),
+    ("cancel_booking_series", lambda: db.cancel_booking_series(1, DAY)),
+    ("get_students_in_booking", lambda: db.get_students_in_booking(1)),
+    ("get_students_for_bookings", lambda: db.get_students_for_bookings([1, 2, 3])),
+    ("get_bookings_page", lambda: db.get_bookings_page(USER)),
+    ("get_bookings_page(location, after)", lambda: db.get_bookings_page(USER, 1, ("booked", DAY, "10:00", 5))),
+    ("get_bookings_for_timetable", lambda: db.get_bookings_for_timetable("R111", DAY)),
+    ("get_location_day_schedule", lambda: db.get_location_day_schedule(1, DAY)),
+    ("check_student_exists", lambda: db.check_student_exists(USER)),
+    ("get_student_name", lambda: db.get_student_name(USER)),
+    ("resolve_students", lambda: db.resolve_students([USER, "24WMD0001", "24WMD0002"])),
+    ("get_location_usage_heatmap", lambda: db.get_location_usage_heatmap(1)),
+    ("get_location_usage_heatmap(range)", lambda: db.get_location_usage_heatmap(1, DAY, "2025-08-28")),
+    ("get_location_room_usage", lambda: db.get_location_room_usage(1)),
+    ("get_location_room_usage(range)", lambda: db.get_location_room_usage(1, DAY, "2025-08-28")),
+    ("get_location_group_sizes", lambda: db.get_location_group_sizes(1)),
+    ("get_gpa_history", lambda: db.get_gpa_history(USER)),
+    ("get_folder", lambda: db.get_folder(1, USER)),
+    ("list_folders", lambda: db.list_folders(None, USER)),
+    ("list_folders(parent)", lambda: db.list_folders(1, USER)),
+    ("list_notes", lambda: db.list_notes(USER)),
+    ("list_note_summaries", lambda: db.list_note_summaries(USER)),
+    ("list_note_summaries(created)", lambda: db.list_note_summaries(USER, order="created_desc")),
+    ("list_note_summaries(content)", lambda: db.list_note_summaries(USER, with_content=True)),
+    ("get_note", lambda: db.get_note(1, USER)),
+    ("get_note(no overlay)", lambda: db.get_note(1, USER, with_overlay=False)),
+    ("get_note_overlay", lambda: db.get_note_overlay(1, USER)),
+    ("get_notes_tool_prefs", lambda: db.get_notes_tool_prefs(USER)),
+    ("update_expired_bookings", lambda: db.update_expired_bookings()),
+    ("get_upcoming_booking_ends", lambda: db.get_upcoming_booking_ends(DAY, "10:00")),
+]
+
+# Checks that must be answered from a specific index (the integer day/minute paths).
+EXPECTED_INDEXES = {
+    "check_room_availability(off-grid)": "idx_bookings_room_day_min",
+    "find_available_rooms(off-grid)": "idx_bookings_room_day_min",
+    "get_bookings_for_timetable": "idx_bookings_room_day_min",
+    "get_location_day_schedule": "idx_bookings_room_day_min",
+    "cancel_booking_series": "idx_bookings_series_day",
+    "update_expired_bookings": "idx_bookings_status_day_end",
+}
+
+def _traced_sql(call):
+    """
+    Run call() and return the SQL statements it executed.
+
+    The call runs on a thread of its own, so it is traced on that thread's
+    connection and the caller's shared connection (and any trace callback the
+    profiler put on it) is left alone.
+    """
+    seen = []
+    db.invalidate_reference_cache()  # cached lookups must reach SQLite to be checked
+
+    def run():
+        conn = db.get_connection()
+        conn.set_trace_callback(seen.append)
+        try:
+            call()
+        finally:
+            conn.close()
+            db.close_connection()
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(run).result()
+    seen = list(dict.fromkeys(seen))  # trigger programs re-report the statement that fired them
+    return [s for s in seen if s.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH"))]
+
+
+def _plan(sql):
+    conn = db.get_connection()
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    finally:
+        conn.close()
+
+
+def _full_scans(plan):
+    bad = []
+    for detail in plan:
+        if not detail.startswith("SCAN "):
+            continue
+        target = detail.split()[1]
+        if target in ALLOWED_SCANS or target == "CONSTANT":
+            continue
+        bad.append(detail)
+    return bad
+
+
+def collect_plans(checks=CHECKS):
+    """Return {check name: [(sql, plan lines)]}."""
+    out = {}
+    for name, call in checks:
+        out[name] = [(sql, _plan(sql)) for sql in _traced_sql(call)]
+    return out
+
+
+def assert_no_full_scans(checks=CHECKS):
+    """
+    Raise AssertionError listing every check whose plan contains a table scan
+    or does not use the index EXPECTED_INDEXES names for it.
+    """
+    failures = []
+    for name, entries in collect_plans(checks).items():
+        for sql, plan in entries:
+            bad = _full_scans(plan)
+            if bad:
+                failures.append(f"{name}: {', '.join(bad)}\n    {' '.join(sql.split())[:160]}")
+        index = EXPECTED_INDEXES.get(name)
+        if index and not any(f"INDEX {index} " in f"{line} " for _sql, plan in entries for line in plan):
+            failures.append(f"{name}: does not use {index}")
+    assert not failures, "Query plan problems:\n  " + "\n  ".join(failures)
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="query_plans_")
+    path = os.path.join(tmp, "student_app.db")
+    shutil.copy(db.DB_PATH, path)
+    old_path = db.DB_PATH
+    db.configure_connection(db_path=path)
+    try:
+        migrate()
+        for name, entries in collect_plans().items():
+            for sql, plan in entries:
+                print(f"{name}:")
+                for line in plan:
+                    print(f"    {line}")
+        assert_no_full_scans()
+        print("OK: no full table scans in checked queries")
+    finally:
+        db.close_connection()
+        db.configure_connection(db_path=old_path)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,20 +10,13 @@ from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QPoint, QEvent
 from styles.styles import load_stylesheet, get_menu_button_style
 from login import LoginWidget
 from database.db_manager import get_connection
+from database.migrations import migrate
+from database.db_executor import get_executor
+from database.booking_expiry import start_expiry_scheduler, stop_expiry_scheduler
 
-# Room booking features
-from room_booking_function.location_selection import LocationSelectionWidget
-from room_booking_function.room_booking_widget import RoomBookingWidget
-from room_booking_function.feature_button import FeatureButton
-from room_booking_function.guidelines import GuidelinesPage
-from room_booking_function.all_booking import AllBookingsPage
-
-# Academic feature
-from gpa_calculator_function.gpa_calculator_widget import GPACalculatorWidget
-
-# Notes features
-from notes_organizer_function.dashboard import DashboardWidget
-from notes_organizer_function.notes_organizer import NoteOrganizerWidget
+# Feature pages (room booking, GPA calculator, notes) are imported on first use
+# so that only the login page and its dependencies load before the first paint.
+# `python -m benchmarks.bench_startup` reports time-to-login-screen.
 
 
 class SlidingMenu(QWidget):
@@ -148,8 +141,7 @@ class SlidingMenu(QWidget):
         mw = self.parent()
         if isinstance(mw, MainWindow):
             mw.hide_menu()
-            mw.pages.setCurrentWidget(mw.all_bookings_page)
-            mw.all_bookings_page.load_bookings()
+            mw.show_all_bookings()
 
     def load_profile_picture(self, filename):
         if filename:
@@ -226,14 +218,9 @@ class MainWindow(QMainWindow):
         self.login_page.login_successful.connect(self.handle_login_success)
         self.pages.addWidget(self.login_page)
 
-        # Pre-create static pages
-        self.guidelines_page = GuidelinesPage(self)
-        self.pages.addWidget(self.guidelines_page)
-
-        self.all_bookings_page = AllBookingsPage(self)
-        self.pages.addWidget(self.all_bookings_page)
-
         # Lazy pages
+        self._guidelines_page = None
+        self._all_bookings_page = None
         self.feature_grid_page = None
         self.location_selection_page = None
         self.gpa_calculator_widget = None
@@ -263,10 +250,36 @@ class MainWindow(QMainWindow):
             cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
             if cur.fetchone()[0] == 0:
                 QMessageBox.warning(self, "Database", "Database is empty. Please run init_db.py first.")
+                conn.close()
+                return
             conn.close()
+            # Apply any pending (additive) schema migrations
+            applied = migrate()
+            if applied:
+                print(f"Applied schema migrations: {applied}")
+            # Mark finished bookings 'completed' in the background from now on
+            start_expiry_scheduler()
         except Exception as e:
             QMessageBox.critical(self, "Database Error", str(e))
 
+    @property
+    def guidelines_page(self):
+        """Booking guidelines page, created the first time it is needed"""
+        if self._guidelines_page is None:
+            from room_booking_function.guidelines import GuidelinesPage
+            self._guidelines_page = GuidelinesPage(self)
+            self.pages.addWidget(self._guidelines_page)
+        return self._guidelines_page
+
+    @property
+    def all_bookings_page(self):
+        """All-locations bookings page, created the first time it is needed"""
+        if self._all_bookings_page is None:
+            from room_booking_function.all_booking import AllBookingsPage
+            self._all_bookings_page = AllBookingsPage(self)
+            self.pages.addWidget(self._all_bookings_page)
+        return self._all_bookings_page
+
     def handle_login_success(self, student_id, name):
         self.user_id = student_id
         self.user_name = name
@@ -280,13 +293,16 @@ class MainWindow(QMainWindow):
             self.feature_grid_page = self.create_feature_grid()
             self.pages.addWidget(self.feature_grid_page)
         if self.location_selection_page is None:
+            from room_booking_function.location_selection import LocationSelectionWidget
             self.location_selection_page = LocationSelectionWidget(self)
             self.pages.addWidget(self.location_selection_page)
         if self.gpa_calculator_widget is None:
+            from gpa_calculator_function.gpa_calculator_widget import GPACalculatorWidget
             self.gpa_calculator_widget = GPACalculatorWidget(self, self.user_id)
             self.pages.addWidget(self.gpa_calculator_widget)
 
     def create_feature_grid(self):
+        from room_booking_function.feature_button import FeatureButton
         page = QWidget()
         layout = QVBoxLayout(page)
         layout.setContentsMargins(30, 30, 30, 30)
@@ -327,6 +343,7 @@ class MainWindow(QMainWindow):
                     print(f"Error removing old dashboard: {e}")
                 delattr(self, 'dashboard')
 
+            from notes_organizer_function.dashboard import DashboardWidget
             self.dashboard = DashboardWidget(
                 user_id=self.user_id,
                 on_add_note_clicked=self.open_notes_page,
@@ -340,6 +357,7 @@ class MainWindow(QMainWindow):
     # Notes: open editor (optionally a specific note) — user_id is passed through
     def open_notes_page(self, note_id=None):
         if not hasattr(self, 'notes_page'):
+            from notes_organizer_function.notes_organizer import NoteOrganizerWidget
             self.notes_page = NoteOrganizerWidget(
                 on_return_callback=self.back_to_dashboard,
                 user_id=self.user_id
@@ -359,6 +377,7 @@ class MainWindow(QMainWindow):
 
     def back_to_dashboard(self):
         if not hasattr(self, 'dashboard'):
+            from notes_organizer_function.dashboard import DashboardWidget
             self.dashboard = DashboardWidget(
                 user_id=self.user_id,
                 on_add_note_clicked=self.open_notes_page,
@@ -426,10 +445,15 @@ class MainWindow(QMainWindow):
         self.pages.setCurrentWidget(self.guidelines_page)
         self.hide_menu()
 
+    def show_all_bookings(self):
+        # The page reloads on show if any booking changed since it last loaded
+        self.pages.setCurrentWidget(self.all_bookings_page)
+
     def open_room_booking_page(self, location_id):
         if hasattr(self, 'room_booking_widget_by_location'):
             self.pages.removeWidget(self.room_booking_widget_by_location)
             self.room_booking_widget_by_location.deleteLater()
+        from room_booking_function.room_booking_widget import RoomBookingWidget
         self.room_booking_widget_by_location = RoomBookingWidget(self, location_id, self.user_id)
         self.pages.addWidget(self.room_booking_widget_by_location)
         self.pages.setCurrentWidget(self.room_booking_widget_by_location)
@@ -481,4 +505,7 @@ if __name__ == "__main__":
     app.setFont(QFont("Segoe UI", 10))
     w = MainWindow()
     w.show()
+    # Let queued background DB calls finish before the interpreter shuts down.
+    app.aboutToQuit.connect(lambda: get_executor().wait())
+    app.aboutToQuit.connect(stop_expiry_scheduler)
     sys.exit(app.exec_())
@@ -12,7 +12,9 @@ from PyQt5.QtCore import Qt, QSize, QPoint, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 
 from styles.dashboard_styles import get_dashboard_styles
-from database.db_manager import get_connection
+from database.db_manager import get_connection, session
+from database.db_executor import get_executor
+from database.instrumentation import profiled
 
 APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -25,6 +27,23 @@ ACTIONS_W     = 46
 LEVEL_STEP    = 14
 NOTE_EXTRA_INDENT = 12
 
+# ---------- queries run on the DB executor ----------
+def _select_all(sql, args):
+    conn = get_connection()
+    try:
+        return conn.execute(sql, args).fetchall()
+    finally:
+        conn.close()
+
+
+@profiled()
+def _load_center(notes_query, folders_query):
+    """Notes and (for the grid) child folders for the center pane; runs on a DB worker."""
+    rows = _select_all(*notes_query)
+    children = _select_all(*folders_query) if folders_query else []
+    return rows, children
+
+
 # ---------- assets ----------
 ASSET_DIRS = ["Photo", "assets", "icons", "images"]
 def _find_first(cands):
@@ -288,9 +307,10 @@ class DashboardWidget(QWidget):
 
     # ---------- db helpers ----------
     def _db(self):
-        """Open a DB connection."""
+        """Borrow this thread's shared DB connection (close() just releases it)."""
         return get_connection()
 
+    @profiled()
     def _folder_exists(self, folder_id):
         """Check if a folder exists for this user; return (exists, name_or_None)."""
         if folder_id in (None, -1):
@@ -301,18 +321,31 @@ class DashboardWidget(QWidget):
         return (bool(row), row[0] if row else None)
 
     # ---------- sidebar build ----------
+    @profiled()
     def _refresh_folders(self):
         """Rebuild the sidebar: special rows, folders, and expanded notes."""
         self.folder_list.clear()
         self._add_special_item_row("All Notes", "all")
         self._add_special_item_row("Uncategorized", "uncat")
 
-        conn = self._db(); cur = conn.cursor()
-        cur.execute(
-            "SELECT id, name, parent_id FROM folders WHERE user_id=? ORDER BY LOWER(name)",
-            (self.user_id,)
-        )
-        rows = cur.fetchall(); conn.close()
+        # folders plus the notes of every expanded folder, read in one transaction
+        expanded = sorted(self._expanded_folders)
+        notes_in = {}
+        with session() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT id, name, parent_id FROM folders WHERE user_id=? ORDER BY LOWER(name)",
+                (self.user_id,)
+            )
+            rows = cur.fetchall()
+            if expanded:
+                cur.execute(
+                    "SELECT folder_id, id, title FROM notes WHERE user_id=? AND folder_id IN (%s) "
+                    "ORDER BY LOWER(title)" % ",".join("?" * len(expanded)),
+                    [self.user_id, *expanded]
+                )
+                for fid, nid, title in cur.fetchall():
+                    notes_in.setdefault(fid, []).append((nid, title))
 
         tree = {}
         for fid, name, parent in rows:
@@ -324,14 +357,8 @@ class DashboardWidget(QWidget):
 
                 if fid in self._expanded_folders:
                     # inline notes under expanded folder (scoped to user)
-                    conn2 = self._db(); cur2 = conn2.cursor()
-                    cur2.execute(
-                        "SELECT id, title FROM notes WHERE folder_id=? AND user_id=? ORDER BY LOWER(title)",
-                        (fid, self.user_id)
-                    )
-                    for nid, title in cur2.fetchall():
+                    for nid, title in notes_in.get(fid, []):
                         self._add_note_item_row(nid, title or "Untitled", level + 1)
-                    conn2.close()
 
                     # recurse to children
                     add_branch(fid, level + 1)
@@ -430,6 +457,7 @@ class DashboardWidget(QWidget):
             for lbl in w.findChildren(QLabel):
                 lbl.style().unpolish(lbl); lbl.style().polish(lbl); lbl.update()
 
+    @profiled()
     def _rehome_and_delete_folder_tree(self, root_folder_id: int):
         """
         Move all notes that live in root_folder_id or any of its descendant folders
@@ -508,10 +536,9 @@ class DashboardWidget(QWidget):
                 self.folder_list.setCurrentRow(i); return
 
     # ---------- data fetch ----------
-    def _fetch_notes(self):
-        """Query notes for the current folder and search text (scoped to user)."""
+    def _notes_query(self):
+        """(sql, args) for the notes matching the current folder and search text."""
         q = (self.search_bar.text() or "").strip().lower()
-        conn = self._db(); cur = conn.cursor()
 
         sql = "SELECT id, title, COALESCE(updated_at, created_at) AS modified_at FROM notes"
         args, where = [self.user_id], ["user_id=?"]
@@ -530,36 +557,44 @@ class DashboardWidget(QWidget):
 
         sql += " WHERE " + " AND ".join(where)
         sql += " ORDER BY " + ("modified_at DESC, LOWER(title)" if self.sort_mode == 0 else "LOWER(title)")
-
-        cur.execute(sql, args)
-        rows = cur.fetchall()
-        conn.close()
-        return rows
+        return sql, args
 
     def _child_folders(self):
         """Get child folders under the current folder (or root), for this user."""
-        if self.current_folder_id == -1: return []
-        conn = self._db(); cur = conn.cursor()
+        query = self._child_folders_query()
+        return _select_all(*query) if query else []
+
+    def _child_folders_query(self):
+        """(sql, args) for the child folders of the current folder, or None."""
+        if self.current_folder_id == -1: return None
         if self.current_folder_id is None:
-            cur.execute("SELECT id, name FROM folders WHERE parent_id IS NULL AND user_id=? ORDER BY LOWER(name)",
-                        (self.user_id,))
-        else:
-            cur.execute("SELECT id, name FROM folders WHERE parent_id=? AND user_id=? ORDER BY LOWER(name)",
-                        (self.current_folder_id, self.user_id))
-        out = cur.fetchall(); conn.close()
-        return out
+            return ("SELECT id, name FROM folders WHERE parent_id IS NULL AND user_id=? ORDER BY LOWER(name)",
+                    (self.user_id,))
+        return ("SELECT id, name FROM folders WHERE parent_id=? AND user_id=? ORDER BY LOWER(name)",
+                (self.current_folder_id, self.user_id))
 
     # ---------- fill center ----------
     def _refilter_notes(self):
-        """Refresh the list/grid with current filters and update status."""
-        rows = self._fetch_notes()
-        search_text = (self.search_bar.text() or "").strip().lower()
+        """Refresh the list/grid with current filters (queried in the background)."""
+        notes_query = self._notes_query()
+        folders_query = self._child_folders_query() if self.view_mode == "grid" else None
+        state = ((self.search_bar.text() or "").strip().lower(), self.view_mode)
+        # Typing in the search bar supersedes the previous, still-pending query.
+        get_executor().submit(
+            _load_center, notes_query, folders_query,
+            key=(id(self), "center"), owner=self,
+            on_done=lambda result, st=state: self._show_center(result, *st),
+        )
 
-        if self.view_mode == "list":
+    def _show_center(self, result, search_text, view_mode):
+        rows, children = result
+        if view_mode != self.view_mode:
+            return  # view switched while loading; a newer refresh is on its way
+
+        if view_mode == "list":
             self._fill_table(rows)
             has_child = False
         else:
-            children = self._child_folders()
             folders = [(fid, name) for fid, name in children if (not search_text) or (search_text in (name or "").lower())]
             self._fill_grid(rows, folder_rows=folders)
             has_child = len(folders) > 0
@@ -765,19 +800,21 @@ class DashboardWidget(QWidget):
     def _add_note_here(self, folder_id):
         """Create a new note in the current folder (or uncategorized)."""
         target = None if folder_id in (None, -1) else folder_id
-        if target is not None:
-            exists, _ = self._folder_exists(target)
-            if not exists:
-                shown = self.current_folder_name or "Selected folder"
-                QMessageBox.warning(self, "Folder Missing",
-                                    f"You can’t add this to the folder '{shown}' because it no longer exists.")
-                target = None
-        conn = self._db(); cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO notes(folder_id, title, content, user_id) VALUES(?,?,?,?)",
-            (target, "Untitled", "", self.user_id)
-        )
-        nid = cur.lastrowid; conn.commit(); conn.close()
+        missing = False
+        # folder check and insert in one transaction, so the folder cannot vanish in between
+        with session(write=True) as conn:
+            if target is not None and not self._folder_exists(target)[0]:
+                missing, target = True, None
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO notes(folder_id, title, content, user_id) VALUES(?,?,?,?)",
+                (target, "Untitled", "", self.user_id)
+            )
+            nid = cur.lastrowid
+        if missing:
+            shown = self.current_folder_name or "Selected folder"
+            QMessageBox.warning(self, "Folder Missing",
+                                f"You can’t add this to the folder '{shown}' because it no longer exists.")
 
         self._refresh_folders()
         self._refilter_notes()
@@ -798,20 +835,20 @@ class DashboardWidget(QWidget):
             return
 
         target = None if folder_id in (None, -1) else folder_id
-        if target is not None:
-            exists, _ = self._folder_exists(target)
-            if not exists:
-                shown = self.current_folder_name or "Selected folder"
-                QMessageBox.warning(self, "Folder Missing",
-                                    f"You can’t add this to the folder '{shown}' because it no longer exists.")
-                target = None
-
-        conn = self._db(); cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO notes(folder_id, title, content, user_id) VALUES (?,?,?,?)",
-            (target, title, content, self.user_id)
-        )
-        nid = cur.lastrowid; conn.commit(); conn.close()
+        missing = False
+        with session(write=True) as conn:
+            if target is not None and not self._folder_exists(target)[0]:
+                missing, target = True, None
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO notes(folder_id, title, content, user_id) VALUES (?,?,?,?)",
+                (target, title, content, self.user_id)
+            )
+            nid = cur.lastrowid
+        if missing:
+            shown = self.current_folder_name or "Selected folder"
+            QMessageBox.warning(self, "Folder Missing",
+                                f"You can’t add this to the folder '{shown}' because it no longer exists.")
 
         self._refresh_folders()
         self._refilter_notes()
@@ -892,15 +929,15 @@ class DashboardWidget(QWidget):
         if res is None:
             return
         fid, fname = res
-        exists, db_name = self._folder_exists(fid)
+        with session(write=True) as conn:
+            exists, db_name = self._folder_exists(fid)
+            if exists:
+                conn.execute("UPDATE notes SET folder_id=? WHERE id=? AND user_id=?", (fid, note_id, self.user_id))
         if not exists:
             shown = fname or db_name or "Selected folder"
             QMessageBox.warning(self, "Folder Missing",
                                 f"You can’t add this to the folder '{shown}' because it no longer exists.")
             return
-        conn = self._db(); cur = conn.cursor()
-        cur.execute("UPDATE notes SET folder_id=? WHERE id=? AND user_id=?", (fid, note_id, self.user_id))
-        conn.commit(); conn.close()
         self._refresh_folders()
         self._refilter_notes()
 
@@ -0,0 +1,155 @@
+"""
+Uniform grid over document coordinates for InkTextEdit's strokes and images.
+
+Every item is registered with its bounding box (x0, y0, x1, y1), inclusive,
+in document pixels, and listed in each grid cell the box touches. A query only
+visits the cells under the query box, so erasing or hit-testing near the
+cursor touches the handful of items there instead of every stroke or image.
+
+    grid = SpatialGrid()
+    grid.insert(stroke, stroke.bounds())
+    for s in grid.query(x0, y0, x1, y1): ...   # boxes intersecting, oldest first
+    grid.sync(new_strokes, Stroke.bounds)      # after undo/redo swaps the list
+
+PointBuckets does the same for the eraser's own points, so "is this stroke
+point within the eraser radius" checks a 3x3 block of buckets, not every
+eraser point. Plain Python, no Qt: points are (x, y) tuples.
+"""
+
+CELL_SIZE = 128  # document pixels per grid cell
+
+
+def _overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class SpatialGrid:
+    """Items by bounding box; items are tracked by identity (dicts are fine)."""
+
+    def __init__(self, cell=CELL_SIZE):
+        self.cell = int(cell)
+        self._cells = {}     # (cx, cy) -> {id(item): item}
+        self._entries = {}   # id(item) -> [seq, item, bounds, cells]
+        self._seq = 0        # insertion order, so queries return oldest first
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return id(item) in self._entries
+
+    def _cells_of(self, bounds):
+        c = self.cell
+        x0, y0, x1, y1 = bounds
+        return [(cx, cy) for cx in range(x0 // c, x1 // c + 1)
+                for cy in range(y0 // c, y1 // c + 1)]
+
+    def insert(self, item, bounds):
+        """Add item (or move it to bounds if already there, keeping its order)."""
+        entry = self._entries.get(id(item))
+        if entry is not None:
+            self.update(item, bounds)
+            return
+        bounds = tuple(int(v) for v in bounds)
+        cells = self._cells_of(bounds)
+        for key in cells:
+            self._cells.setdefault(key, {})[id(item)] = item
+        self._entries[id(item)] = [self._seq, item, bounds, cells]
+        self._seq += 1
+
+    def update(self, item, bounds):
+        """Item moved or resized."""
+        entry = self._entries.get(id(item))
+        if entry is None:
+            self.insert(item, bounds)
+            return
+        bounds = tuple(int(v) for v in bounds)
+        if bounds == entry[2]:
+            return
+        cells = self._cells_of(bounds)
+        if cells != entry[3]:
+            self._unlink(item, entry[3])
+            for key in cells:
+                self._cells.setdefault(key, {})[id(item)] = item
+        entry[2], entry[3] = bounds, cells
+
+    def remove(self, item):
+        entry = self._entries.pop(id(item), None)
+        if entry is not None:
+            self._unlink(item, entry[3])
+
+    def _unlink(self, item, cells):
+        for key in cells:
+            bucket = self._cells.get(key)
+            if bucket is not None:
+                bucket.pop(id(item), None)
+                if not bucket:
+                    del self._cells[key]
+
+    def clear(self):
+        self._cells.clear()
+        self._entries.clear()
+
+    def sync(self, items, bounds_of):
+        """
+        Make the grid hold exactly items (e.g. after undo swapped the stroke
+        list): drops what is gone, adds what is new, leaves the rest alone.
+        Returns (removed, added).
+        """
+        keep = {id(item): item for item in items}
+        removed, added = [], []
+        for key, entry in list(self._entries.items()):
+            if key not in keep:
+                removed.append(entry[1])
+                self.remove(entry[1])
+        for key, item in keep.items():
+            if key not in self._entries:
+                added.append(item)
+                self.insert(item, bounds_of(item))
+        return removed, added
+
+    def query(self, x0, y0, x1, y1):
+        """Items whose bounding box intersects the box, in insertion order."""
+        box = (x0, y0, x1, y1)
+        found = {}
+        c = self.cell
+        for cx in range(int(x0) // c, int(x1) // c + 1):
+            for cy in range(int(y0) // c, int(y1) // c + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        hits = [self._entries[key] for key in found if _overlap(self._entries[key][2], box)]
+        hits.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in hits]
+
+    def query_point(self, x, y):
+        return self.query(x, y, x, y)
+
+
+class PointBuckets:
+    """A set of points bucketed by radius, answering "is (x, y) within radius of any?"."""
+
+    def __init__(self, points, radius):
+        self.radius = max(1, int(radius))
+        self._r2 = self.radius * self.radius
+        self._buckets = {}
+        r = self.radius
+        for x, y in points:
+            self._buckets.setdefault((x // r, y // r), []).append((x, y))
+
+    def near(self, x, y):
+        r = self.radius
+        bx, by = x // r, y // r
+        for cx in (bx - 1, bx, bx + 1):
+            for cy in (by - 1, by, by + 1):
+                for px, py in self._buckets.get((cx, cy), ()):
+                    dx, dy = px - x, py - y
+                    if dx * dx + dy * dy <= self._r2:
+                        return True
+        return False
+
+    def areas(self):
+        """One box per occupied bucket, grown by the radius: everything near() can hit."""
+        r = self.radius
+        for bx, by in self._buckets:
+            yield (bx * r - r, by * r - r, bx * r + 2 * r - 1, by * r + 2 * r - 1)
@@ -1,12 +1,15 @@
 # notes_organizer.py
 import os
-import json
+from array import array
+from collections import OrderedDict
 from datetime import datetime, timezone
 
 from styles.notes_organizer_styles import get_notes_organizer_styles
 from database import db_manager as db
+from .ink_spatial import SpatialGrid, PointBuckets
+from . import overlay_codec
 
-from PyQt5.QtCore import Qt, QPoint, QRect, QTimer, QSize, pyqtSignal
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QTimer, QSize, pyqtSignal
 from PyQt5.QtGui import (
     QPixmap, QPainter, QImage, QPen, QColor, QFont, QPainterPath, QCursor,
     QTransform, QIcon, QTextListFormat, QTextCharFormat, QBrush
@@ -251,27 +254,68 @@ class CropDialog(QDialog):
         return self._out if isinstance(self._out, QPixmap) else QPixmap()
 
 # ======================= Drawing / overlay =======================
+# Committed ink is cached in full-width tiles of this many document pixels,
+# keeping at most INK_TILE_LIMIT of them (least recently painted dropped first).
+INK_TILE_HEIGHT = 256
+INK_TILE_LIMIT  = 24
+
 class Stroke:
-    """A freehand stroke with color, width and alpha."""
-    __slots__ = ("points", "color", "width", "alpha", "mode")
+    """
+    A freehand stroke with color, width and alpha (immutable once committed).
+    Points are kept as one flat array('i') (x0, y0, x1, y1, ...); QPoints only
+    exist while painting.
+    """
+    __slots__ = ("xy", "color", "width", "alpha", "mode", "_bounds", "_path", "_pen")
     def __init__(self, points, color, width, alpha=255, mode="pen"):
-        self.points = points
+        """points: a flat array('i') (kept as is), or QPoints / (x, y) pairs."""
+        if isinstance(points, array) and points.typecode == "i":
+            self.xy = points
+        else:
+            self.xy = array("i")
+            for p in points:
+                if isinstance(p, QPoint): self.xy.extend((p.x(), p.y()))
+                else:                     self.xy.extend((int(p[0]), int(p[1])))
         self.color  = QColor(color)
         self.width  = int(width)
         self.alpha  = int(alpha)
         self.mode   = mode
+        self._bounds = None
+        self._path   = None
+        self._pen    = None
+    def bounds(self):
+        """(x0, y0, x1, y1) covered when painted (points plus half the pen), document coordinates."""
+        if self._bounds is None:
+            xs = self.xy[0::2] or [0]
+            ys = self.xy[1::2] or [0]
+            m = self.width // 2 + 1
+            self._bounds = (min(xs) - m, min(ys) - m, max(xs) + m, max(ys) + m)
+        return self._bounds
+    def path(self) -> QPainterPath:
+        """The stroke as a path in document coordinates (built once)."""
+        if self._path is None:
+            xy = self.xy
+            path = QPainterPath(QPointF(xy[0], xy[1]))
+            for i in range(2, len(xy) - 1, 2):
+                path.lineTo(xy[i], xy[i+1])
+            self._path = path
+        return self._path
+    def pen(self) -> QPen:
+        if self._pen is None:
+            c = QColor(self.color); c.setAlpha(self.alpha)
+            pen = QPen(c); pen.setWidth(self.width)
+            pen.setCapStyle(Qt.RoundCap); pen.setJoinStyle(Qt.RoundJoin)
+            self._pen = pen
+        return self._pen
     def paint(self, painter: QPainter, y_offset: int):
         """Draw the stroke on the painter (y_offset adjusts for scroll)."""
-        if len(self.points) < 2: return
-        pen = QPen(self.color)
-        c = QColor(self.color); c.setAlpha(self.alpha)
-        pen.setColor(c); pen.setWidth(self.width)
-        pen.setCapStyle(Qt.RoundCap); pen.setJoinStyle(Qt.RoundJoin)
-        painter.setPen(pen)
-        path = QPainterPath(QPoint(self.points[0].x(), self.points[0].y() - y_offset))
-        for pt in self.points[1:]:
-            path.lineTo(pt.x(), pt.y() - y_offset)
-        painter.drawPath(path)
+        if len(self.xy) < 4: return
+        painter.setPen(self.pen())
+        if y_offset:
+            painter.translate(0, -y_offset)
+            painter.drawPath(self.path())
+            painter.translate(0, y_offset)
+        else:
+            painter.drawPath(self.path())
 
 class InkTextEdit(QTextEdit):
     """
@@ -303,9 +347,19 @@ class InkTextEdit(QTextEdit):
 
         self.strokes      = []
         self._current_pts = []
+        self._live        = None    # scratch layer of the stroke being drawn, see _live_begin
         self.undo_stack   = []
         self.redo_stack   = []
 
+        # spatial indexes (document coords) for erasing, hit-testing and culling
+        self._stroke_grid = SpatialGrid()
+        self._image_grid  = SpatialGrid()
+
+        # committed ink rendered into tiles: {tile row: QPixmap or None if empty}
+        self.ink_tiles    = True
+        self._tiles       = OrderedDict()
+        self._tiles_key   = None    # (viewport width, device pixel ratio) the tiles were made for
+
         # images
         self.images         = []
         self.selected_idx   = None
@@ -417,6 +471,34 @@ class InkTextEdit(QTextEdit):
             scaled = scaled.transformed(t, Qt.SmoothTransformation)
         im["pm"] = scaled
 
+    def _index_image(self, im: dict):
+        """(Re)register an image's rect after it was added, moved, resized or cropped."""
+        pos, size = im["pos"], im["pm"].size()
+        self._image_grid.insert(im, (pos.x(), pos.y(),
+                                     pos.x() + max(1, size.width()) - 1, pos.y() + max(1, size.height()) - 1))
+
+    def _set_strokes(self, strokes):
+        """Replace the stroke list, updating the index for what came and went."""
+        self.strokes = strokes
+        removed, added = self._stroke_grid.sync(strokes, Stroke.bounds)
+        for s in removed + added:
+            self._invalidate_ink(s.bounds())
+
+    def _stroke_added(self, stroke):
+        self._stroke_grid.insert(stroke, stroke.bounds())
+        self._invalidate_ink(stroke.bounds())
+
+    def _stroke_removed(self, stroke):
+        self._stroke_grid.remove(stroke)
+        self._invalidate_ink(stroke.bounds())
+
+    def _invalidate_ink(self, bounds=None):
+        """Drop cached ink tiles touching bounds (document coords), or all of them."""
+        if bounds is None:
+            self._tiles.clear(); return
+        for row in range(bounds[1] // INK_TILE_HEIGHT, bounds[3] // INK_TILE_HEIGHT + 1):
+            self._tiles.pop(row, None)
+
     def insert_image(self, path: str):
         """Insert an image near the current viewport."""
         pm = QPixmap(path)
@@ -426,6 +508,7 @@ class InkTextEdit(QTextEdit):
         im = {"orig": pm.copy(),"source": pm.copy(),"pm": pm.copy(),
               "pos": pos_doc,"opacity": 1.0,"angle": 0.0,"scale": 1.0}
         self.images.append(im)
+        self._index_image(im)
         self.undo_stack.append(("add_image", len(self.images)-1))
         self.redo_stack.clear()
         self.selected_idx = len(self.images)-1
@@ -441,15 +524,19 @@ class InkTextEdit(QTextEdit):
         if self.undo_stack:
             kind, payload = self.undo_stack.pop()
             if kind == "stroke" and self.strokes:
-                self.redo_stack.append(("stroke", self.strokes.pop()))
+                stroke = self.strokes.pop()
+                self._stroke_removed(stroke)
+                self.redo_stack.append(("stroke", stroke))
                 changed = True
             elif kind == "add_image" and self.images:
-                self.redo_stack.append(("add_image", self.images.pop()))
+                im = self.images.pop()
+                self._image_grid.remove(im)
+                self.redo_stack.append(("add_image", im))
                 self.imageCountChanged.emit(len(self.images))
                 changed = True
             elif kind == "erase":
                 self.redo_stack.append(("erase", self.strokes[:]))
-                self.strokes = payload
+                self._set_strokes(payload)
                 changed = True
         self.viewport().update()
         if changed:
@@ -461,51 +548,134 @@ class InkTextEdit(QTextEdit):
         kind, payload = self.redo_stack.pop()
         changed = False
         if kind == "stroke":
-            self.strokes.append(payload); self.undo_stack.append(("stroke", None)); changed = True
+            self.strokes.append(payload); self._stroke_added(payload)
+            self.undo_stack.append(("stroke", None)); changed = True
         elif kind == "add_image":
-            self.images.append(payload);  self.undo_stack.append(("add_image", len(self.images)-1))
+            self.images.append(payload);  self._index_image(payload)
+            self.undo_stack.append(("add_image", len(self.images)-1))
             self.imageCountChanged.emit(len(self.images)); changed = True
         elif kind == "erase":
             self.undo_stack.append(("erase", self.strokes[:]))
-            self.strokes = payload; changed = True
+            self._set_strokes(payload); changed = True
         self.viewport().update()
         if changed:
             self.overlayChanged.emit()  
 
     # ---- eraser helpers
-    def _near_any(self, pt: QPoint, pts, radius: int) -> bool:
-        r2 = radius * radius; x, y = pt.x(), pt.y()
-        for p in pts:
-            dx, dy = p.x()-x, p.y()-y
-            if dx*dx + dy*dy <= r2: return True
-        return False
-
-    def _erase_with_radius(self, stroke, eraser_pts, radius):
-        """Return stroke segments after erasing around given points."""
-        segs, cur = [], []
-        for p in stroke.points:
-            if self._near_any(p, eraser_pts, radius):
-                if len(cur) >= 2:
+    def _erase_with_radius(self, stroke, eraser: PointBuckets):
+        """Return stroke segments after erasing around the eraser's points."""
+        segs, cur = [], array("i")
+        xy = stroke.xy
+        for i in range(0, len(xy) - 1, 2):
+            x, y = xy[i], xy[i+1]
+            if eraser.near(x, y):
+                if len(cur) >= 4:
                     segs.append(Stroke(cur, stroke.color, stroke.width, stroke.alpha, stroke.mode))
-                cur = []
+                cur = array("i")
             else:
-                cur.append(p)
-        if len(cur) >= 2:
+                cur.append(x); cur.append(y)
+        if len(cur) >= 4:
             segs.append(Stroke(cur, stroke.color, stroke.width, stroke.alpha, stroke.mode))
         return segs
 
-    def _point_in_poly(self, p: QPoint, poly: list) -> bool:
-        """Point-in-polygon test for lasso eraser."""
-        x, y = p.x(), p.y()
+    def _point_in_poly(self, x: int, y: int, poly: list) -> bool:
+        """Point-in-polygon test for lasso eraser (poly: list of (x, y))."""
         inside = False
         n = len(poly)
         for i in range(n):
-            x1, y1 = poly[i].x(), poly[i].y()
-            x2, y2 = poly[(i+1) % n].x(), poly[(i+1) % n].y()
+            x1, y1 = poly[i]
+            x2, y2 = poly[(i+1) % n]
             if ((y1 > y) != (y2 > y)) and (x < (x2 - x1) * (y - y1) / (y2 - y1 + 1e-9) + x1):
                 inside = not inside
         return inside
 
+    def _apply_eraser(self, pts):
+        """
+        Erase along pts (document coords) with the current eraser mode, as one
+        undo step. Only strokes the spatial index finds near the eraser are tested.
+        """
+        before = self.strokes[:]
+        if self.eraser_mode == "normal":
+            eraser = PointBuckets([(p.x(), p.y()) for p in pts], max(4, self.widths["eraser"]))
+            near = set()
+            for area in eraser.areas():
+                near.update(id(s) for s in self._stroke_grid.query(*area))
+            new_strokes = []
+            for s in self.strokes:
+                if id(s) in near:
+                    new_strokes.extend(self._erase_with_radius(s, eraser))
+                else:
+                    new_strokes.append(s)
+        else:
+            poly = [(p.x(), p.y()) for p in pts]
+            xs = [x for x, _ in poly]; ys = [y for _, y in poly]
+            x0, y0, x1, y1 = min(xs), min(ys), max(xs), max(ys)
+            near = {id(s) for s in self._stroke_grid.query(x0, y0, x1, y1)}
+            def hit(s):
+                xy = s.xy
+                return any(x0 <= xy[i] <= x1 and y0 <= xy[i+1] <= y1
+                           and self._point_in_poly(xy[i], xy[i+1], poly) for i in range(0, len(xy) - 1, 2))
+            new_strokes = [s for s in self.strokes if id(s) not in near or not hit(s)]
+        self._set_strokes(new_strokes)
+        self.undo_stack.append(("erase", before))
+        self.redo_stack.clear()
+
+    # ---- live ink
+    def _live_style(self):
+        """(pen, opacity) for what is drawn while the mouse moves, or None (normal eraser)."""
+        if self.tool in ("pencil", "pen", "marker"):
+            c = QColor(self.colors[self.tool]); c.setAlpha(255)
+            pen = QPen(c); pen.setWidth(self.widths[self.tool])
+            pen.setCapStyle(Qt.RoundCap); pen.setJoinStyle(Qt.RoundJoin)
+            return pen, self.alphas[self.tool] / 255.0
+        if self.tool == "eraser" and self.eraser_mode == "lasso":
+            pen = QPen(QColor(11, 31, 94)); pen.setWidth(1); pen.setStyle(Qt.DashLine)
+            return pen, 170 / 255.0
+        return None
+
+    def _live_begin(self):
+        """
+        Start (or, after a scroll or resize, rebuild) the scratch layer: a
+        viewport-sized pixmap the stroke being drawn is painted onto one segment
+        at a time. Segments are painted opaque and the layer is composited with
+        the tool's alpha, so overlapping segment ends don't darken.
+        """
+        self._live = None
+        style = self._live_style()
+        if style is None: return
+        vp = self.viewport(); dpr = vp.devicePixelRatioF()
+        layer = QPixmap(int(vp.width() * dpr), int(vp.height() * dpr))
+        layer.setDevicePixelRatio(dpr); layer.fill(Qt.transparent)
+        pen, opacity = style
+        self._live = {"layer": layer, "size": vp.size(), "yoff": self._vy(),
+                      "pen": pen, "opacity": opacity, "dash": 0.0}
+        for a, b in zip(self._current_pts, self._current_pts[1:]):
+            self._live_paint_segment(a, b)
+
+    def _live_paint_segment(self, a: QPoint, b: QPoint):
+        live = self._live; yoff = live["yoff"]
+        pen = live["pen"]
+        if pen.style() != Qt.SolidLine:   # continue the dash pattern across segments
+            pen.setDashOffset(live["dash"])
+            live["dash"] += ((b.x()-a.x())**2 + (b.y()-a.y())**2) ** 0.5 / max(1, pen.width())
+        p = QPainter(live["layer"]); p.setRenderHint(QPainter.Antialiasing); p.setPen(pen)
+        p.drawLine(a.x(), a.y() - yoff, b.x(), b.y() - yoff)
+        p.end()
+
+    def _live_extend(self, pt: QPoint):
+        """Add a point to the stroke being drawn; repaint only around the new segment."""
+        prev = self._current_pts[-1]
+        self._current_pts.append(pt)
+        if self._live is None: return
+        live = self._live
+        if live["yoff"] != self._vy() or live["size"] != self.viewport().size():
+            self._live_begin()
+            self.viewport().update(); return
+        self._live_paint_segment(prev, pt)
+        m = live["pen"].width() // 2 + 2
+        self.viewport().update(QRect(QPoint(min(prev.x(), pt.x()) - m, min(prev.y(), pt.y()) - m - live["yoff"]),
+                                     QPoint(max(prev.x(), pt.x()) + m, max(prev.y(), pt.y()) + m - live["yoff"])))
+
     # ---- events
     def mousePressEvent(self, e):
         """Begin draw/erase, or select/drag/resize image, or click crop/delete."""
@@ -536,6 +706,7 @@ class InkTextEdit(QTextEdit):
 
             if self.tool in ("pencil", "pen", "marker", "eraser"):
                 self._current_pts = [self._to_doc(e.pos())]
+                self._live_begin()
                 self._press_pos_view = e.pos()
                 self.redo_stack.clear()
                 return
@@ -552,16 +723,17 @@ class InkTextEdit(QTextEdit):
             factor = max(0.1, 1.0 + (delta.x() + delta.y()) / 240.0)
             im["scale"] = max(0.1, min(8.0, self._start_scale * factor))
             self._compose_pm(im)
+            self._index_image(im)
             self.viewport().update(); return
 
         if self.selected_idx is not None and (e.buttons() & Qt.LeftButton):
             im = self.images[self.selected_idx]
             im["pos"] = self._to_doc(e.pos()) - self._drag_offset
+            self._index_image(im)
             self.viewport().update(); return
 
         if self._current_pts and (e.buttons() & Qt.LeftButton):
-            self._current_pts.append(self._to_doc(e.pos()))
-            self.viewport().update(); return
+            self._live_extend(self._to_doc(e.pos())); return
 
         super().mouseMoveEvent(e)
 
@@ -572,6 +744,7 @@ class InkTextEdit(QTextEdit):
                 if self._press_pos_view is not None:
                     if (e.pos() - self._press_pos_view).manhattanLength() < 6 and len(self._current_pts) <= 1:
                         self._current_pts = []
+                        self._live = None
                         self._press_pos_view = None
                         self.clear_mode_to_text()
                         self.setFocus(Qt.MouseFocusReason)
@@ -602,19 +775,7 @@ class InkTextEdit(QTextEdit):
                 super().mouseReleaseEvent(e); return
 
             if self.tool == "eraser":
-                before = self.strokes[:]
-                if self.eraser_mode == "normal":
-                    radius = max(4, self.widths["eraser"])
-                    new_strokes = []
-                    for s in self.strokes:
-                        new_strokes.extend(self._erase_with_radius(s, self._current_pts, radius))
-                    self.strokes = new_strokes
-                else:
-                    poly = self._current_pts[:]
-                    self.strokes = [s for s in self.strokes
-                                    if not any(self._point_in_poly(pt, poly) for pt in s.points)]
-                self.undo_stack.append(("erase", before))
-                self.redo_stack.clear()
+                self._apply_eraser(self._current_pts)
                 self.overlayChanged.emit()  
             else:
                 pts = self._smooth(self._current_pts)
@@ -624,11 +785,14 @@ class InkTextEdit(QTextEdit):
                     color, width, alpha = self.colors["marker"], self.widths["marker"], self.alphas["marker"]
                 else:
                     color, width, alpha = self.colors["pen"],    self.widths["pen"],    self.alphas["pen"]
-                self.strokes.append(Stroke(pts, color, width, alpha, self.tool))
+                stroke = Stroke(pts, color, width, alpha, self.tool)
+                self.strokes.append(stroke)
+                self._stroke_added(stroke)
                 self.undo_stack.append(("stroke", None))
                 self.overlayChanged.emit()  # <-- NEW
 
             self._current_pts = []
+            self._live = None
             self._update_hover_cursor(e.pos())
             self.viewport().update(); return
         super().mouseReleaseEvent(e)
@@ -649,6 +813,7 @@ class InkTextEdit(QTextEdit):
                 im["pm"] = out.copy()
                 im["scale"] = 1.0
                 im["angle"] = 0.0
+                self._index_image(im)
                 self.viewport().update()
                 self.overlayChanged.emit() 
 
@@ -656,13 +821,18 @@ class InkTextEdit(QTextEdit):
         """Draw images, selection boxes, handles, and strokes on top of text."""
         super().paintEvent(ev)
         p = QPainter(self.viewport()); yoff = self._vy()
+        exposed = ev.rect()
         p.setRenderHint(QPainter.Antialiasing)
 
         self._crop_btn_rect = None
         self._resize_handle_rect= None
         self._btn_delete_rect = None
 
+        ex_doc = (exposed.left(), exposed.top() + yoff, exposed.right(), exposed.bottom() + yoff)
+        visible = {id(im) for im in self._image_grid.query(*ex_doc)}
         for i, im in enumerate(self.images):
+            # the selected image always runs, its chrome rects are rebuilt here
+            if id(im) not in visible and self.selected_idx != i: continue
             p.save(); p.setOpacity(im["opacity"])
             pos_v = self._to_view(im["pos"])
             p.drawPixmap(pos_v, im["pm"])
@@ -703,42 +873,71 @@ class InkTextEdit(QTextEdit):
                 rr = self._resize_handle_rect.adjusted(4, 4, -4, -4)
                 p.drawLine(rr.bottomLeft(), rr.topRight())
 
-        for s in self.strokes: s.paint(p, yoff)
+        self._paint_ink(p, exposed, yoff)
 
-        if self._current_pts and self.tool in ("pencil","pen","marker"):
-            if self.tool == "pencil":
-                color, width, alpha = self.colors["pencil"], self.widths["pencil"], self.alphas["pencil"]
-            elif self.tool == "marker":
-                color, width, alpha = self.colors["marker"], self.widths["marker"], self.alphas["marker"]
-            else:
-                color, width, alpha = self.colors["pen"],    self.widths["pen"],    self.alphas["pen"]
-            pen = QPen(color); c = QColor(color); c.setAlpha(alpha)
-            pen.setColor(c); pen.setWidth(width)
-            pen.setCapStyle(Qt.RoundCap); pen.setJoinStyle(Qt.RoundJoin); p.setPen(pen)
-            path = QPainterPath(self._to_view(self._current_pts[0]))
-            for pt in self._current_pts[1:]: path.lineTo(self._to_view(pt))
-            p.drawPath(path)
-
-        if self.tool == "eraser" and self.eraser_mode == "lasso" and self._current_pts:
-            pts_v = [self._to_view(pt) for pt in self._current_pts]
-            if len(pts_v) >= 2:
-                pen = QPen(QColor(11, 31, 94, 170)); pen.setWidth(1); pen.setStyle(Qt.DashLine)
-                p.setPen(pen)
-                path = QPainterPath(pts_v[0])
-                for pt in pts_v[1:]:
-                    path.lineTo(pt)
-                p.drawPath(path)
+        # stroke being drawn (or lasso): already on the scratch layer
+        if self._live is not None:
+            p.save(); p.setOpacity(self._live["opacity"])
+            p.drawPixmap(0, self._live["yoff"] - yoff, self._live["layer"])
+            p.restore()
         p.end()
 
+    def _paint_ink(self, p: QPainter, exposed: QRect, yoff: int):
+        """Committed strokes under the exposed rect (view coords): cached tiles, or only visible strokes."""
+        if not self.strokes: return
+        if self.ink_tiles:
+            width = self.viewport().width()
+            key = (width, self.devicePixelRatioF())
+            if key != self._tiles_key:
+                self._tiles.clear(); self._tiles_key = key
+            first = (exposed.top() + yoff) // INK_TILE_HEIGHT
+            last  = (exposed.bottom() + yoff) // INK_TILE_HEIGHT
+            for row in range(first, last + 1):
+                tile = self._ink_tile(row, width)
+                if tile is not None:
+                    p.drawPixmap(0, row * INK_TILE_HEIGHT - yoff, tile)
+            return
+        visible = {id(s) for s in self._stroke_grid.query(
+            exposed.left(), exposed.top() + yoff, exposed.right(), exposed.bottom() + yoff)}
+        p.save(); p.translate(0, -yoff)
+        for s in self.strokes:
+            if id(s) in visible: s.paint(p, 0)
+        p.restore()
+
+    def _ink_tile(self, row: int, width: int):
+        """Pixmap of the committed strokes in one tile row (None when it has none)."""
+        if row in self._tiles:
+            self._tiles.move_to_end(row)
+            return self._tiles[row]
+        top = row * INK_TILE_HEIGHT
+        visible = {id(s) for s in self._stroke_grid.query(0, top, width - 1, top + INK_TILE_HEIGHT - 1)}
+        tile = None
+        if visible:
+            dpr = self.devicePixelRatioF()
+            tile = QPixmap(int(width * dpr), int(INK_TILE_HEIGHT * dpr))
+            tile.setDevicePixelRatio(dpr)
+            tile.fill(Qt.transparent)
+            tp = QPainter(tile); tp.setRenderHint(QPainter.Antialiasing)
+            tp.translate(0, -top)
+            for s in self.strokes:   # list order = stacking order
+                if id(s) in visible: s.paint(tp, 0)
+            tp.end()
+        self._tiles[row] = tile
+        while len(self._tiles) > INK_TILE_LIMIT:
+            self._tiles.popitem(last=False)
+        return tile
+
     def _hit_image(self, p_view: QPoint):
         """Hit test UI parts or images; return token or index."""
         if getattr(self, "_crop_btn_rect", None) and self._crop_btn_rect.contains(p_view): return "btn_crop"
         if getattr(self, "_btn_delete_rect", None) and self._btn_delete_rect.contains(p_view): return "btn_delete"
         if getattr(self, "_resize_handle_rect", None) and self._resize_handle_rect.contains(p_view): return "handle_resize"
         p_doc = self._to_doc(p_view)
-        for i in reversed(range(len(self.images))):
-            im = self.images[i]; pm, pos = im["pm"], im["pos"]
-            if QRect(pos, pm.size()).contains(p_doc): return i
+        # grid candidates come oldest first, like self.images: the last one is on top
+        for im in reversed(self._image_grid.query_point(p_doc.x(), p_doc.y())):
+            if QRect(im["pos"], im["pm"].size()).contains(p_doc):
+                for i in reversed(range(len(self.images))):
+                    if self.images[i] is im: return i
         return None
 
     def _confirm_delete_selected_image(self):
@@ -746,7 +945,7 @@ class InkTextEdit(QTextEdit):
         if self.selected_idx is None: return
         if QMessageBox.question(self, "Delete Image", "Delete this image?",
                                 QMessageBox.Yes | QMessageBox.No, QMessageBox.No) == QMessageBox.Yes:
-            self.images.pop(self.selected_idx)
+            self._image_grid.remove(self.images.pop(self.selected_idx))
             self.selected_idx = None
             self.imageCountChanged.emit(len(self.images))
             self.selectionChangedForImage.emit(False)
@@ -767,10 +966,13 @@ class InkTextEdit(QTextEdit):
 
     # ---- persistence
     def overlay_to_dict(self):
-        """Serialize strokes and images (including pos/scale/angle/opacity)."""
+        """
+        Serialize strokes and images (including pos/scale/angle/opacity).
+        Stroke points stay flat arrays ("xy"); store the dict with overlay_codec.encode.
+        """
         return {
             "strokes": [{
-                "points": [(p.x(), p.y()) for p in s.points],
+                "xy":     s.xy,
                 "color":  (s.color.red(), s.color.green(), s.color.blue()),
                 "width":  s.width,
                 "alpha":  s.alpha,
@@ -786,14 +988,17 @@ class InkTextEdit(QTextEdit):
         }
 
     def dict_to_overlay(self, d: dict):
-        """Load strokes and images from a dict."""
-        self.strokes = []
+        """Load strokes and images from a dict (as overlay_codec.decode returns it; legacy "points" work too)."""
+        strokes = []
         for s in d.get("strokes", []):
-            pts = [QPoint(int(x), int(y)) for (x, y) in s.get("points", [])]
             col = s.get("color", (0,0,0)); qc = QColor(col[0], col[1], col[2])
-            self.strokes.append(Stroke(pts, qc, s.get("width", 2), s.get("alpha",255), s.get("mode","pen")))
+            strokes.append(Stroke(overlay_codec.stroke_xy(s), qc, s.get("width", 2), s.get("alpha",255), s.get("mode","pen")))
+        self._stroke_grid.clear()
+        self._invalidate_ink()
+        self._set_strokes(strokes)
 
         self.images = []
+        self._image_grid.clear()
         for imd in d.get("images", []):
             path = imd.get("abspath") or ""
             pm = QPixmap(path) if path and os.path.exists(path) else QPixmap()
@@ -806,6 +1011,7 @@ class InkTextEdit(QTextEdit):
                   "angle": angle, "scale": scale}
             self._compose_pm(im)
             self.images.append(im)
+            self._index_image(im)
 
         self.imageCountChanged.emit(len(self.images))
         self.viewport().update()
@@ -846,11 +1052,16 @@ class _ToolPopup(QWidget):
 
 # ============================ Note tab UI ============================
 class NoteTabWidget(QWidget):
-    """One note tab: title, toolbar, rich editor, overlay tools, autosave."""
+    """
+    One note tab: title, toolbar, rich editor, overlay tools, autosave.
+    Without an overlay argument the ink overlay is read from the database the
+    first time the tab is shown (see ensure_overlay).
+    """
     def __init__(self, note_id, user_id, title="", content="", overlay=None):
         super().__init__()
         self.note_id = note_id
         self.user_id = user_id
+        self.overlay_loaded = overlay is not None
         os.makedirs(MEDIA_DIR, exist_ok=True)
 
         root = QVBoxLayout(self); root.setContentsMargins(10, 8, 10, 10); root.setSpacing(8)
@@ -1307,9 +1518,36 @@ class NoteTabWidget(QWidget):
         pop.move(g)
         pop.show()
 
+    # ---- lazy overlay ----
+    def ensure_overlay(self):
+        """Read and apply the note's ink overlay, once."""
+        if self.overlay_loaded: return
+        self.overlay_loaded = True
+        raw = db.get_note_overlay(self.note_id, self.user_id)
+        try: overlay = overlay_codec.decode(raw)   # binary or legacy JSON
+        except Exception: overlay = None
+        if overlay:
+            self.editor.dict_to_overlay(overlay)
+
+    def showEvent(self, e):
+        self.ensure_overlay()
+        super().showEvent(e)
+
     # ---- save payload / IO ----
     def to_payload(self) -> dict:
-        """Build the content payload for saving to DB (and write image files)."""
+        """
+        Build the content payload for saving to DB (and write image files).
+        "overlay" is None while the overlay was never loaded (keep the stored one).
+        """
+        base = {
+            "title": (self.title_input.text().strip() or "Untitled"),
+            "content": self.editor.toHtml(),
+            "overlay": None,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "user_id": self.user_id
+        }
+        if not self.overlay_loaded:
+            return base
         overlay = self.editor.overlay_to_dict()
         img_out = []
         for i, im in enumerate(self.editor.images):
@@ -1325,13 +1563,8 @@ class NoteTabWidget(QWidget):
                 "angle": im.get("angle", 0.0),
             })
         overlay["images"] = img_out
-        return {
-            "title": (self.title_input.text().strip() or "Untitled"),
-            "content": self.editor.toHtml(),
-            "overlay": overlay,
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-            "user_id": self.user_id
-        }
+        base["overlay"] = overlay
+        return base
 
     def _insert_image(self):
         """Open file picker and insert chosen image."""
@@ -1418,16 +1651,10 @@ class NoteOrganizerWidget(QWidget):
         self.btn_next.clicked.connect(self._go_next)
         self.tabs.currentChanged.connect(lambda _=None: self._update_stepper())
 
-        # open recent or create first
-        rows = None
-        try:
-            rows = db.list_notes(user_id=self.user_id, order="updated_desc", limit=10)
-        except TypeError:
-            rows = db.list_notes(self.user_id, order="updated_desc", limit=10)
-        if rows:
-            for r in rows:
-                self._open_by_id(r["id"])
-        else:
+        # open recent or create first: one query for the notes, tabs built after it
+        for row in db.list_note_summaries(self.user_id, order="updated_desc", limit=10, with_content=True):
+            self._add_tab(row)
+        if self.tabs.count() == 0:
             self._new_note()
         self._update_stepper()
 
@@ -1445,18 +1672,15 @@ class NoteOrganizerWidget(QWidget):
 
     def _gc_deleted_tabs(self):
         removed_any = False
-        for i in reversed(range(self.tabs.count())):
-            w = self.tabs.widget(i)
-            if isinstance(w, NoteTabWidget):
-                nid = getattr(w, "note_id", None)
-                ok = None
-                try:
-                    ok = db.get_note(nid, user_id=self.user_id)
-                except TypeError:
-                    ok = db.get_note(nid, self.user_id)
-                if nid is None or not ok:
-                    self.tabs.removeTab(i)
-                    removed_any = True
+        with db.session():
+            for i in reversed(range(self.tabs.count())):
+                w = self.tabs.widget(i)
+                if isinstance(w, NoteTabWidget):
+                    nid = getattr(w, "note_id", None)
+                    ok = db.get_note(nid, self.user_id, with_overlay=False)
+                    if nid is None or not ok:
+                        self.tabs.removeTab(i)
+                        removed_any = True
         if removed_any:
             if self.tabs.count() == 0:
                 self._new_note()
@@ -1496,20 +1720,13 @@ class NoteOrganizerWidget(QWidget):
             if isinstance(w, NoteTabWidget) and getattr(w, "note_id", None) == nid:
                 self.tabs.setCurrentIndex(i); self._update_stepper(); return
 
-        row = None
-        try:
-            row = db.get_note(nid, user_id=self.user_id)
-        except TypeError:
-            row = db.get_note(nid, self.user_id)
-        if not row: return
-
-        overlay = None
-        raw_overlay = row.get("overlay") if isinstance(row, dict) else None
-        if raw_overlay:
-            try: overlay = json.loads(raw_overlay)
-            except Exception: overlay = None
+        # the overlay is read when the tab is first shown (NoteTabWidget.ensure_overlay)
+        row = db.get_note(nid, self.user_id, with_overlay=False)
+        if row: self._add_tab(row)
 
-        tab = NoteTabWidget(nid, self.user_id, row.get("title","Untitled"), row.get("content",""), overlay=overlay)
+    def _add_tab(self, row: dict):
+        """Open a tab for a note row (from db.get_note) and make it current."""
+        tab = NoteTabWidget(row["id"], self.user_id, row.get("title","Untitled"), row.get("content",""))
         idx = self.tabs.addTab(tab, self._elided(row.get("title","Untitled")))
         self.tabs.setCurrentIndex(idx)
 
@@ -1527,12 +1744,14 @@ class NoteOrganizerWidget(QWidget):
 
     def _new_note(self):
         """Create a new blank note and open it in a tab."""
-        nid = None
-        try:
-            nid = db.create_note("Untitled", "", user_id=self.user_id)
-        except TypeError:
-            nid = db.create_note("Untitled", "", self.user_id)
-        self._open_by_id(nid)
+        with db.session(write=True):
+            try:
+                nid = db.create_note("Untitled", "", user_id=self.user_id)
+            except TypeError:
+                nid = db.create_note("Untitled", "", self.user_id)
+            row = db.get_note(nid, self.user_id, with_overlay=False)
+        if row:
+            self._add_tab(row)
         self._update_stepper()
 
     def _close_tab(self, index: int):
@@ -1540,16 +1759,17 @@ class NoteOrganizerWidget(QWidget):
         w = self.tabs.widget(index)
         if isinstance(w, NoteTabWidget):
             payload = w.to_payload()
+            overlay_blob = overlay_codec.encode(payload["overlay"]) if payload["overlay"] is not None else None
             try:
                 db.update_note(w.note_id, payload["title"], payload["content"],
-                               json.dumps(payload["overlay"]), user_id=self.user_id)
+                               overlay_blob, user_id=self.user_id)
             except TypeError:
                 try:
                     db.update_note(w.note_id, payload["title"], payload["content"],
-                                   json.dumps(payload["overlay"]), self.user_id)
+                                   overlay_blob, self.user_id)
                 except TypeError:
                     db.update_note(w.note_id, payload["title"], payload["content"],
-                                   json.dumps(payload["overlay"]), user_id=self.user_id)
+                                   overlay_blob, user_id=self.user_id)
         self.tabs.removeTab(index)
         if self.tabs.count() > 0 and self.tabs.currentIndex() == -1:
             self.tabs.setCurrentIndex(max(0, index - 1))
@@ -1561,12 +1781,8 @@ class NoteOrganizerWidget(QWidget):
         if not isinstance(w, NoteTabWidget):
             return
 
-        ok = None
-        try:
-            ok = db.get_note(w.note_id, user_id=self.user_id)
-        except TypeError:
-            ok = db.get_note(w.note_id, self.user_id)
-
+        # check before to_payload, which writes the note's image files
+        ok = db.get_note(w.note_id, self.user_id, with_overlay=False)
         if not ok:
             idx = self.tabs.indexOf(w)
             if idx != -1:
@@ -1579,16 +1795,18 @@ class NoteOrganizerWidget(QWidget):
             return
 
         payload = w.to_payload()
+        overlay_blob = overlay_codec.encode(payload["overlay"]) if payload["overlay"] is not None else None
+        # update_note only touches the row if it still exists, so no transaction is held here
         try:
             db.update_note(w.note_id, payload["title"], payload["content"],
-                           json.dumps(payload["overlay"]), user_id=self.user_id)
+                           overlay_blob, user_id=self.user_id)
         except TypeError:
             try:
                 db.update_note(w.note_id, payload["title"], payload["content"],
-                               json.dumps(payload["overlay"]), self.user_id)
+                               overlay_blob, self.user_id)
             except TypeError:
                 db.update_note(w.note_id, payload["title"], payload["content"],
-                               json.dumps(payload["overlay"]), user_id=self.user_id)
+                               overlay_blob, user_id=self.user_id)
         self._update_tab_text_for(w, payload["title"])
         if show_popup:
             QMessageBox.information(self, "Saved", "Your note has been saved.")
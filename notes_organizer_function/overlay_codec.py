@@ -0,0 +1,179 @@
+"""
+Compact binary encoding for a note's ink overlay (notes.overlay).
+
+The overlay used to be stored as JSON: every stroke point as a [x, y] list,
+so a page of handwriting ran to megabytes. The binary form stores points as
+zigzag varint deltas from the previous point (freehand points are a few pixels
+apart, so most coordinates take one byte), optionally zlib-compressed:
+
+    b"OVL" | version | flags | body            flags bit 0: body is zlib data
+
+    body:  varint stroke count, then per stroke
+               r, g, b, alpha (one byte each) | varint width
+               varint len + UTF-8 mode | varint point count
+               zigzag varint x, y of the first point, then dx, dy per point
+           varint len + UTF-8 JSON list of images (few, small, free-form)
+
+    blob = encode(editor.overlay_to_dict())
+    overlay = decode(row["overlay"])     # binary or legacy JSON, str or bytes
+
+decode() returns the same dict shape for both formats, with each stroke's
+points as a flat array('i') under "xy" (x0, y0, x1, y1, ...). Plain Python,
+no Qt.
+"""
+import json
+import zlib
+from array import array
+from itertools import accumulate
+
+MAGIC = b"OVL"
+VERSION = 1
+FLAG_ZLIB = 0x01
+COMPRESS_MIN = 512   # bodies smaller than this are stored uncompressed
+
+
+def _put(out, n):
+    """Append unsigned n as a varint (7 bits per byte, low bits first)."""
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get(buf, i):
+    """(value, next index) of the varint at buf[i]."""
+    b = buf[i]
+    if b < 0x80:
+        return b, i + 1
+    n, shift = b & 0x7F, 7
+    while True:
+        i += 1
+        b = buf[i]
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i + 1
+        shift += 7
+
+
+def stroke_xy(stroke):
+    """Flat array('i') of a stroke dict's points ("xy", or legacy "points" pairs)."""
+    xy = stroke.get("xy")
+    if xy is not None:
+        return xy if isinstance(xy, array) and xy.typecode == "i" else array("i", (int(v) for v in xy))
+    out = array("i")
+    for x, y in stroke.get("points", ()):
+        out.append(int(x))
+        out.append(int(y))
+    return out
+
+
+def encode(overlay, compress=None):
+    """
+    Binary form of an overlay dict ({"strokes": [...], "images": [...]}).
+    compress=None compresses bodies of COMPRESS_MIN bytes or more when that
+    actually makes them smaller; True/False force it on or off.
+    """
+    strokes = overlay.get("strokes", [])
+    body = bytearray()
+    put = _put
+    put(body, len(strokes))
+    for s in strokes:
+        r, g, b = (int(c) & 0xFF for c in s.get("color", (0, 0, 0))[:3])
+        body += bytes((r, g, b, int(s.get("alpha", 255)) & 0xFF))
+        put(body, max(0, int(s.get("width", 2))))
+        mode = str(s.get("mode", "pen")).encode("utf-8")
+        put(body, len(mode))
+        body += mode
+        xy = stroke_xy(s)
+        if len(xy) % 2:
+            xy = xy[:-1]
+        put(body, len(xy) // 2)
+        # each coordinate minus the same coordinate of the previous point
+        zz = [(d << 1) ^ (d >> 63) for d in map(int.__sub__, xy, array("i", (0, 0)) + xy[:-2])]
+        if zz and max(zz) < 0x80:
+            body += bytes(zz)       # the usual case: every delta fits in one byte
+        else:
+            for v in zz:
+                put(body, v)
+    images = json.dumps(overlay.get("images", []), separators=(",", ":")).encode("utf-8")
+    put(body, len(images))
+    body += images
+
+    flags = 0
+    if compress or (compress is None and len(body) >= COMPRESS_MIN):
+        packed = zlib.compress(bytes(body), 6)
+        if compress or len(packed) < len(body):
+            body, flags = packed, FLAG_ZLIB
+    return MAGIC + bytes((VERSION, flags)) + bytes(body)
+
+
+def is_binary(raw):
+    return isinstance(raw, (bytes, bytearray, memoryview)) and bytes(raw[:3]) == MAGIC
+
+
+def decode(raw):
+    """
+    Overlay dict from a stored value: binary (any version this module knows),
+    legacy JSON text or JSON bytes. None/empty gives None. Raises ValueError
+    for anything unreadable.
+    """
+    if raw is None or len(raw) == 0:
+        return None
+    if is_binary(raw):
+        return _decode_binary(bytes(raw))
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        raw = bytes(raw).decode("utf-8")
+    d = json.loads(raw)
+    if not isinstance(d, dict):
+        raise ValueError("overlay JSON is not an object")
+    strokes = []
+    for s in d.get("strokes", []):
+        s = dict(s)
+        s["xy"] = stroke_xy(s)
+        s.pop("points", None)
+        strokes.append(s)
+    d["strokes"] = strokes
+    d.setdefault("images", [])
+    return d
+
+
+def _decode_binary(buf):
+    if len(buf) < 5:
+        raise ValueError("truncated overlay header")
+    version, flags = buf[3], buf[4]
+    if version != VERSION:
+        raise ValueError(f"unsupported overlay version {version}")
+    body = buf[5:]
+    try:
+        if flags & FLAG_ZLIB:
+            body = zlib.decompress(body)
+        get = _get
+        n, i = get(body, 0)
+        strokes = []
+        for _ in range(n):
+            r, g, b, alpha = body[i], body[i + 1], body[i + 2], body[i + 3]
+            width, i = get(body, i + 4)
+            size, i = get(body, i)
+            mode = body[i:i + size].decode("utf-8")
+            i += size
+            count, i = get(body, i)
+            if 2 * count > len(body) - i:   # every point takes at least two bytes
+                raise IndexError("point count past end of data")
+            zz = body[i:i + 2 * count]
+            if not zz or max(zz) < 0x80:
+                i += 2 * count      # one byte per coordinate
+            else:
+                zz = []
+                for _ in range(2 * count):
+                    v, i = get(body, i)
+                    zz.append(v)
+            deltas = [(v >> 1) ^ -(v & 1) for v in zz]
+            xy = array("i", [0]) * (2 * count)
+            xy[0::2] = array("i", accumulate(deltas[0::2]))
+            xy[1::2] = array("i", accumulate(deltas[1::2]))
+            strokes.append({"xy": xy, "color": (r, g, b), "width": width, "alpha": alpha, "mode": mode})
+        size, i = get(body, i)
+        images = json.loads(body[i:i + size].decode("utf-8"))
+    except (zlib.error, IndexError, ValueError) as e:
+        raise ValueError(f"corrupt overlay: {e}") from None
+    return {"strokes": strokes, "images": images}
@@ -0,0 +1,258 @@
+"""
+Week availability matrix per location: rooms x bookable days x half-hour slots.
+
+Bookings can only be made from today up to BOOKING_WINDOW_DAYS ahead, so the
+whole bookable space of a location fits in memory as one slot bitmask per
+room per day (bit n = slot n of database.db_manager's occupancy grid, i.e.
+08:00 + 30n minutes). The matrix is read once from room_day_occupancy and then
+patched from db_manager's booking change notifications: a changed room/day is
+only marked dirty and re-read (one primary-key lookup) the next time the
+matrix is used. Writes that send no notification (another app instance, a
+DB browser) are caught by db_manager.data_version(): when it moved since the
+last read and no booking change was reported here in the meantime, the
+matrix is rebuilt. (The version also moves for this process's commits on
+other threads; those are the reported ones, already marked dirty. An outside
+commit that lands in the same interval as a reported one is not told apart;
+if it took a room, the booking attempt fails with BookingConflict, which
+marks that room-day dirty.) The timetable and the new-booking room finder
+both read from it, so switching days costs no database work. recommend()
+scans the matrices of every location at once to suggest alternatives when
+nothing is free.
+
+    week = get_week_availability(location_id)
+    week.day("2025-08-01")                               # timetable rows
+    week.free_rooms("2025-08-01", "10:00", "12:00", "F01", 4)
+    recommend("L01", "F01", 4, "2025-08-01", "10:00", "12:00")
+"""
+import threading
+from datetime import date as _date, datetime, timedelta
+
+from database import db_manager
+
+# validate_booking allows today .. today + 7
+BOOKING_WINDOW_DAYS = 7
+# validate_booking: bookings end by 18:00
+BOOKING_DAY_END = 18 * 60
+
+_services = {}
+_services_lock = threading.Lock()
+# Booking changes this process reported (see _on_booking_change)
+_local_changes = 0
+
+
+class WeekAvailability:
+    """Availability of every room at one location for the bookable window."""
+
+    def __init__(self, location_id):
+        self.location_id = location_id
+        self._lock = threading.RLock()
+        self._built_for = None    # (first day, database path) the matrix was read for
+        self._dates = []
+        self._rooms = []
+        self._room_ids = set()
+        self._masks = {}          # (room_id, date) -> bitmask, booked room-days only
+        self._dirty = set()       # (room_id or None, date) waiting to be re-read
+        self._versions = {}       # connection key -> (data_version, _local_changes) at the last read
+
+    # ---- reads
+    def day(self, date):
+        """
+        Timetable rows for date:
+        [(room_id, room_name, capacity, feature_id, feature_name, mask)] in room-name order.
+        Dates outside the window are read straight from the database.
+        """
+        with self._lock:
+            self._ensure()
+            if date in self._dates:
+                masks = {room_id: self._masks.get((room_id, date), 0) for room_id in self._room_ids}
+                rooms = self._rooms
+            else:
+                masks = db_manager.get_location_occupancy(self.location_id, date)
+                rooms = db_manager.get_rooms_by_location(self.location_id)
+        return [(room_id, room_name, capacity or 0, feature_id or "unknown",
+                 feature_name or "Unknown Feature", masks.get(room_id, 0))
+                for room_id, room_name, capacity, feature_id, feature_name in rooms]
+
+    def free_rooms(self, date, start, end, feature_id, min_capacity):
+        """
+        Rooms free for start-end on date with the feature and enough seats, smallest
+        sufficient capacity first, as [(room_id, room_name, capacity)]; same result as
+        db_manager.find_available_rooms, which is used for anything off the grid.
+        """
+        wanted = db_manager.slot_mask(start, end)
+        with self._lock:
+            self._ensure()
+            in_window = wanted is not None and date in self._dates
+            if in_window:
+                rooms = [(room_id, name, capacity)
+                         for room_id, name, capacity, feature, _ in self._rooms
+                         if feature == feature_id and (capacity or 0) >= min_capacity
+                         and not self._masks.get((room_id, date), 0) & wanted]
+        if not in_window:
+            return db_manager.find_available_rooms(self.location_id, feature_id, min_capacity, date, start, end)
+        return sorted(rooms, key=lambda r: (r[2], r[1]))
+
+    def room_days(self, feature_id, min_capacity):
+        """
+        The window for rooms with the feature and enough seats, as
+        (dates, [(room_id, room_name, capacity, [mask per date])]) in room-name order.
+        """
+        with self._lock:
+            self._ensure()
+            dates = list(self._dates)
+            rooms = [(room_id, name, capacity, [self._masks.get((room_id, day), 0) for day in dates])
+                     for room_id, name, capacity, feature, _ in self._rooms
+                     if feature == feature_id and (capacity or 0) >= min_capacity]
+        return dates, rooms
+
+    # ---- maintenance
+    def mark_dirty(self, room_id, date):
+        """Booking change notification (room_id None = any room on date)."""
+        with self._lock:
+            if date in self._dates and (room_id is None or room_id in self._room_ids):
+                self._dirty.add((room_id, date))
+
+    def _changed_elsewhere(self):
+        """
+        True when something other than a reported booking change committed
+        since this thread's last read (or this thread has not read before).
+        """
+        key, version = db_manager.data_version()
+        if key is None:
+            return True
+        local = _local_changes
+        seen = self._versions.get(key)
+        self._versions[key] = (version, local)
+        if seen is None:
+            return True
+        return seen[0] != version and seen[1] == local
+
+    def _ensure(self):
+        today = _date.today()
+        changed = self._changed_elsewhere()
+        if changed or self._built_for != (today, db_manager.DB_PATH):
+            self._build(today)
+        elif self._dirty:
+            self._apply_dirty()
+
+    def _build(self, today):
+        self._dates = [(today + timedelta(days=n)).isoformat() for n in range(BOOKING_WINDOW_DAYS + 1)]
+        self._rooms = list(db_manager.get_rooms_by_location(self.location_id))
+        self._room_ids = {room[0] for room in self._rooms}
+        self._masks = db_manager.get_location_occupancy_range(self.location_id, self._dates[0], self._dates[-1])
+        self._dirty.clear()
+        self._built_for = (today, db_manager.DB_PATH)
+
+    def _apply_dirty(self):
+        dirty, self._dirty = self._dirty, set()
+        for room_id, date in dirty:
+            if room_id is None:
+                for rid, mask in db_manager.get_location_occupancy(self.location_id, date).items():
+                    self._set(rid, date, mask)
+            elif (None, date) not in dirty:
+                self._set(room_id, date, db_manager.get_room_day_mask(room_id, date))
+
+    def _set(self, room_id, date, mask):
+        if mask:
+            self._masks[(room_id, date)] = mask
+        else:
+            self._masks.pop((room_id, date), None)
+
+
+def get_week_availability(location_id):
+    """Shared matrix for a location (built lazily on first read)."""
+    with _services_lock:
+        week = _services.get(location_id)
+        if week is None:
+            week = _services[location_id] = WeekAvailability(location_id)
+        return week
+
+
+def recommend(location_id, feature_id, group_size, date, start, end, limit=5, now=None):
+    """
+    Suggestions for a booking request, from one scan of the in-memory week
+    matrices of all locations:
+    {"best": suggestion or None, "other_times": [...], "other_locations": [...]}
+    where a suggestion is
+    (location_id, location_name, room_id, room_name, capacity, date, start, end).
+
+    best            - the free room at location_id wasting the fewest seats
+    other_times     - nearest other start times (same length) at location_id in
+                      the booking window, one best-fit room each; nearest first,
+                      then fewest seats wasted
+    other_locations - best-fit room of each other location free at the requested
+                      time; fewest seats wasted first
+    """
+    result = {"best": None, "other_times": [], "other_locations": []}
+    wanted = db_manager.slot_mask(start, end)
+    if wanted is None:
+        return result
+    slot_minutes = db_manager.OCCUPANCY_SLOT_MINUTES
+    first = (wanted & -wanted).bit_length() - 1
+    length = bin(wanted).count("1")
+    last_start = (BOOKING_DAY_END - db_manager.OCCUPANCY_DAY_START) // slot_minutes - length
+    if last_start < 0:
+        return result
+    now = now or datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    # first start slot not yet in the past today
+    now_slot = max(0, -(-(now.hour * 60 + now.minute - db_manager.OCCUPANCY_DAY_START) // slot_minutes))
+    asked = _date.fromisoformat(date).toordinal()
+    within_day = (1 << (last_start + 1)) - 1
+
+    def hhmm(slot):
+        minutes = db_manager.OCCUPANCY_DAY_START + slot * slot_minutes
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    best = None
+    times = {}        # (date, slot) -> ((distance, waste, room name), suggestion)
+    elsewhere = {}    # location_id -> ((waste, room name), suggestion)
+    for loc_id, loc_name in db_manager.get_locations():
+        here = loc_id == location_id
+        dates, rooms = get_week_availability(loc_id).room_days(feature_id, group_size)
+        offsets = [_date.fromisoformat(day).toordinal() - asked for day in dates]
+        for room_id, room_name, capacity, masks in rooms:
+            waste = capacity - group_size
+            for day, offset, mask in zip(dates, offsets, masks):
+                free = ~mask
+                starts = free & within_day
+                for k in range(1, length):
+                    starts &= free >> k
+                if day == today:
+                    starts &= ~((1 << now_slot) - 1)
+                if not starts:
+                    continue
+                if offset == 0 and starts >> first & 1:
+                    rank = (waste, room_name)
+                    suggestion = (loc_id, loc_name, room_id, room_name, capacity, day, start, end)
+                    if here and (best is None or rank < best[0]):
+                        best = (rank, suggestion)
+                    elif not here and (loc_id not in elsewhere or rank < elsewhere[loc_id][0]):
+                        elsewhere[loc_id] = (rank, suggestion)
+                    starts &= ~(1 << first)
+                if not here:
+                    continue
+                while starts:
+                    slot = (starts & -starts).bit_length() - 1
+                    starts &= starts - 1
+                    rank = (abs(offset * 24 * 60 + (slot - first) * slot_minutes), waste, room_name)
+                    if (day, slot) not in times or rank < times[(day, slot)][0]:
+                        times[(day, slot)] = (rank, (loc_id, loc_name, room_id, room_name, capacity,
+                                                     day, hhmm(slot), hhmm(slot + length)))
+
+    result["best"] = best[1] if best else None
+    result["other_times"] = [s for _, s in sorted(times.values())[:limit]]
+    result["other_locations"] = [s for _, s in sorted(elsewhere.values(), key=lambda e: (e[0], e[1][1]))[:limit]]
+    return result
+
+
+def _on_booking_change(room_id, date):
+    global _local_changes
+    with _services_lock:
+        _local_changes += 1
+        weeks = list(_services.values())
+    for week in weeks:
+        week.mark_dirty(room_id, date)
+
+
+db_manager.add_booking_listener(_on_booking_change)
@@ -0,0 +1,354 @@
+"""
+Paginated, virtualized booking list shared by MyBookingsPage and AllBookingsPage.
+
+Bookings are read a page at a time (keyset pagination on (status, date,
+start_time, id), see db_manager.get_bookings_page) together with the students of only
+that page, in one query. A delegate paints each booking card, so there is no
+widget tree per booking. The next page is requested when the list is
+scrolled to the end (canFetchMore/fetchMore). On show, a list reloads only if
+a booking changed since it was loaded, here or through another connection.
+
+    bookings = BookingListView(user_id, location_id, show_location=False)
+    bookings.cancel_clicked.connect(self.cancel_booking)   # booking id
+    bookings.refresh_if_changed()
+"""
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListView, QStyledItemDelegate,
+                             QAbstractItemView, QFrame)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
+
+from database import db_manager
+from database.db_manager import get_bookings_page, get_students_for_bookings, session
+from database.db_executor import get_executor
+from database.instrumentation import profiled
+
+PAGE_SIZE = 30
+
+# Bumped on every booking change db_manager reports; lists compare it on show.
+_booking_changes = 0
+
+
+def _on_booking_change(room_id, date):
+    global _booking_changes
+    _booking_changes += 1
+
+
+db_manager.add_booking_listener(_on_booking_change)
+
+
+@profiled()
+def _fetch_page(user_id, location_id, after, limit=PAGE_SIZE):
+    """
+    One page of bookings and their students, read in one transaction on a DB
+    worker thread: (rows, {booking_id: [(student_id, name)]}, has_more).
+    """
+    with session():
+        rows = get_bookings_page(user_id, location_id, after, limit + 1)
+        rows, has_more = rows[:limit], len(rows) > limit
+        students = get_students_for_bookings([row[0] for row in rows])
+    return rows, students, has_more
+
+
+class BookingListModel(QAbstractListModel):
+    """Bookings loaded so far; asks for the next page when the view reaches the end."""
+    BookingRole = Qt.UserRole
+    StudentsRole = Qt.UserRole + 1
+
+    more_requested = pyqtSignal(object)   # (status, date, start_time, id) of the last loaded booking
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._students = {}
+        self._has_more = False
+        self.loading = False
+
+    def set_page(self, rows, students, has_more):
+        """Replace everything with a first page."""
+        self.beginResetModel()
+        self._rows, self._students = list(rows), dict(students)
+        self._has_more, self.loading = has_more, False
+        self.endResetModel()
+
+    def append_page(self, rows, students, has_more):
+        self._has_more, self.loading = has_more, False
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self._students.update(students)
+            self.endInsertRows()
+
+    def set_status(self, booking_id, status):
+        """Update one booking in place (e.g. after cancelling it)."""
+        for n, row in enumerate(self._rows):
+            if row[0] == booking_id:
+                self._rows[n] = row[:6] + (status,) + row[7:]
+                index = self.index(n)
+                self.dataChanged.emit(index, index)
+                return
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{row[1]} {row[3]} {row[4]}-{row[5]}"
+        if role == self.BookingRole:
+            return row
+        if role == self.StudentsRole:
+            return self._students.get(row[0], [])
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and not self.loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.loading = True
+            last = self._rows[-1]
+            self.more_requested.emit((last[6], last[3], last[4], last[0]))
+
+
+class BookingCardDelegate(QStyledItemDelegate):
+    """Paints one booking card; clicks on its buttons are emitted as signals."""
+    cancel_clicked = pyqtSignal(int)          # booking id
+    cancel_series_clicked = pyqtSignal(int)   # series id
+
+    MARGIN = 10          # around each card; cards end up MARGIN apart
+    PADDING = 15
+    LINE_SPACING = 4
+    SEPARATOR = 17
+    BUTTON_WIDTH = 130
+    BUTTON_HEIGHT = 34
+    BUTTON_SPACING = 8
+
+    CARD_BG = QColor("#ffffff")
+    BORDER = QColor("#e0e0e0")
+    TEXT = QColor("#333333")
+    MUTED = QColor("#555555")
+    STUDENT = QColor("#666666")
+    YOU = QColor("#283593")
+    DANGER = QColor("#dc3545")
+    PARTICIPANT = QColor("#6c757d")
+    STATUS = {"booked": QColor("#28a745"), "cancelled": QColor("#dc3545"), "completed": QColor("#6c757d")}
+
+    def __init__(self, user_id=None, show_location=False, parent=None):
+        super().__init__(parent)
+        self.user_id = user_id
+        self.show_location = show_location
+        self._title = self._font(16, bold=True)
+        self._text = self._font(14)
+        self._bold = self._font(14, bold=True)
+        self._student = self._font(13)
+        self._you = self._font(13, bold=True)
+        self._italic = self._font(13, italic=True)
+
+    @staticmethod
+    def _font(pixels, bold=False, italic=False):
+        font = QFont()
+        font.setPixelSize(pixels)
+        font.setBold(bold)
+        font.setItalic(italic)
+        return font
+
+    # ---- layout
+    def _details(self, booking):
+        """(text, font, colour) lines of the top-left section"""
+        _, room_name, location_name, date, start_time, end_time, status, _, series_id = booking
+        lines = [(f"Room: {room_name}", self._title, self.TEXT)]
+        if self.show_location:
+            lines.append((f"Location: {location_name}", self._text, self.MUTED))
+        lines.append((f"Date: {date}", self._text, self.TEXT))
+        lines.append((f"Time: {start_time} - {end_time}", self._text, self.TEXT))
+        lines.append((f"Status: {status.capitalize()}", self._bold, self.STATUS.get(status, self.PARTICIPANT)))
+        if series_id:
+            lines.append(("Repeats weekly", self._text, self.MUTED))
+        return lines
+
+    def _students(self, students):
+        lines = [("Students in this booking:", self._bold, self.MUTED)]
+        for student_id, student_name in students:
+            if student_id == self.user_id:
+                lines.append((f"• {student_name} ({student_id}) - You", self._you, self.YOU))
+            else:
+                lines.append((f"• {student_name} ({student_id})", self._student, self.STUDENT))
+        return lines
+
+    def _height(self, lines):
+        return sum(QFontMetrics(font).height() + self.LINE_SPACING for _, font, _ in lines)
+
+    def _card(self, rect):
+        return rect.adjusted(self.MARGIN, self.MARGIN // 2, -self.MARGIN, -self.MARGIN // 2)
+
+    def _buttons(self, card, booking):
+        """[(rect, label, signal, argument)] - only the creator may cancel a booked booking"""
+        booking_id, status, created_by, series_id = booking[0], booking[6], booking[7], booking[8]
+        if status != "booked" or created_by != self.user_id:
+            return []
+        buttons = [("Cancel Booking", self.cancel_clicked, booking_id)]
+        if series_id:
+            buttons.append(("Cancel Series", self.cancel_series_clicked, series_id))
+        total = len(buttons) * self.BUTTON_HEIGHT + (len(buttons) - 1) * self.BUTTON_SPACING
+        top = card.top() + self.PADDING + (self._height(self._details(booking)) - total) // 2
+        left = card.right() - self.PADDING - self.BUTTON_WIDTH
+        return [(QRect(left, top + n * (self.BUTTON_HEIGHT + self.BUTTON_SPACING), self.BUTTON_WIDTH, self.BUTTON_HEIGHT),
+                 label, signal, argument)
+                for n, (label, signal, argument) in enumerate(buttons)]
+
+    def sizeHint(self, option, index):
+        booking = index.data(BookingListModel.BookingRole)
+        students = index.data(BookingListModel.StudentsRole)
+        height = (self.MARGIN + 2 * self.PADDING + self._height(self._details(booking))
+                  + self.SEPARATOR + self._height(self._students(students)))
+        return QSize(2 * self.MARGIN + 2 * self.PADDING + self.BUTTON_WIDTH, height)
+
+    # ---- painting
+    def _draw_lines(self, painter, lines, x, y, width):
+        for text, font, colour in lines:
+            metrics = QFontMetrics(font)
+            painter.setFont(font)
+            painter.setPen(colour)
+            painter.drawText(QRect(x, y, width, metrics.height()), Qt.AlignLeft | Qt.AlignVCenter,
+                             metrics.elidedText(text, Qt.ElideRight, width))
+            y += metrics.height() + self.LINE_SPACING
+        return y
+
+    def paint(self, painter, option, index):
+        booking = index.data(BookingListModel.BookingRole)
+        students = index.data(BookingListModel.StudentsRole)
+        card = self._card(option.rect)
+        inner = card.width() - 2 * self.PADDING
+        x = card.left() + self.PADDING
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(self.BORDER))
+        painter.setBrush(self.CARD_BG)
+        painter.drawRoundedRect(QRectF(card).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+
+        details = self._details(booking)
+        y = self._draw_lines(painter, details, x, card.top() + self.PADDING,
+                             inner - self.BUTTON_WIDTH - self.PADDING)
+        painter.setPen(QPen(self.BORDER))
+        painter.drawLine(x, y + self.SEPARATOR // 2, card.right() - self.PADDING, y + self.SEPARATOR // 2)
+        self._draw_lines(painter, self._students(students), x, y + self.SEPARATOR, inner)
+
+        buttons = self._buttons(card, booking)
+        for rect, label, _, _ in buttons:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.DANGER)
+            painter.drawRoundedRect(QRectF(rect), 6, 6)
+            painter.setPen(QColor("white"))
+            painter.setFont(self._bold)
+            painter.drawText(rect, Qt.AlignCenter, label)
+        if not buttons and booking[6] == "booked":
+            # User is participant but not creator
+            painter.setPen(self.PARTICIPANT)
+            painter.setFont(self._italic)
+            painter.drawText(QRect(card.right() - self.PADDING - self.BUTTON_WIDTH, card.top() + self.PADDING,
+                                   self.BUTTON_WIDTH, self._height(details)), Qt.AlignCenter, "(Participant)")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            booking = index.data(BookingListModel.BookingRole)
+            for rect, _, signal, argument in self._buttons(self._card(option.rect), booking):
+                if rect.contains(event.pos()):
+                    signal.emit(argument)
+                    return True
+        return super().editorEvent(event, model, option, index)
+
+
+class BookingListView(QWidget):
+    """A user's bookings (optionally at one location), newest first, loaded page by page."""
+    cancel_clicked = pyqtSignal(int)
+    cancel_series_clicked = pyqtSignal(int)
+
+    def __init__(self, user_id=None, location_id=None, show_location=False,
+                 empty_text="You don't have any bookings yet.", parent=None):
+        super().__init__(parent)
+        self.user_id = user_id
+        self.location_id = location_id
+        self._loaded_for = None   # (user_id, booking change count, data version) of the rows shown
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.model = BookingListModel(self)
+        self.model.more_requested.connect(self._load_more)
+        self.delegate = BookingCardDelegate(user_id, show_location, self)
+        self.delegate.cancel_clicked.connect(self.cancel_clicked)
+        self.delegate.cancel_series_clicked.connect(self.cancel_series_clicked)
+
+        self.list = QListView()
+        self.list.setObjectName("bookingList")
+        self.list.setModel(self.model)
+        self.list.setItemDelegate(self.delegate)
+        self.list.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.list.setSelectionMode(QAbstractItemView.NoSelection)
+        self.list.setFocusPolicy(Qt.NoFocus)
+        self.list.setResizeMode(QListView.Adjust)
+        self.list.setFrameShape(QFrame.NoFrame)
+        layout.addWidget(self.list)
+
+        self.empty_label = QLabel(empty_text)
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.empty_label.setStyleSheet("font-size: 16px; color: #666; padding: 50px;")
+        self.empty_label.hide()
+        layout.addWidget(self.empty_label)
+
+    def set_user(self, user_id):
+        self.user_id = user_id
+        self.delegate.user_id = user_id
+
+    def reload(self):
+        """Load the first page again (in the background)."""
+        if not self.user_id:
+            return
+        self._loaded_for = self._freshness()
+        self._submit(None)
+
+    def _freshness(self):
+        # local booking changes are reported to the listener; commits by other
+        # connections (worker threads, the expiry scheduler, other processes)
+        # only show up in PRAGMA data_version
+        return self.user_id, _booking_changes, db_manager.data_version()
+
+    def refresh_if_changed(self):
+        """Reload only if a booking changed (or the user did) since the last load."""
+        if self._loaded_for != self._freshness():
+            self.reload()
+
+    def set_status(self, booking_id, status):
+        self.model.set_status(booking_id, status)
+
+    def _load_more(self, after):
+        self._submit(after)
+
+    def _submit(self, after):
+        get_executor().submit(
+            _fetch_page, self.user_id, self.location_id, after,
+            key=(id(self), "page"), owner=self,
+            on_done=lambda page, first=after is None: self._show_page(page, first),
+            on_error=self._load_failed,
+        )
+
+    def _show_page(self, page, first):
+        rows, students, has_more = page
+        if first:
+            self.model.set_page(rows, students, has_more)
+            self.list.scrollToTop()
+        else:
+            self.model.append_page(rows, students, has_more)
+        empty = self.model.rowCount() == 0
+        self.empty_label.setVisible(empty)
+        self.list.setVisible(not empty)
+
+    def _load_failed(self, error):
+        print(f"Error loading bookings: {error}")
+        self.model.loading = False
@@ -5,8 +5,9 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt, QDate, QTime, QTimer
 from PyQt5.QtGui import QFont
 import sqlite3
-from database.db_manager import (get_features,check_student_exists, create_booking_with_students,
-                                get_student_name)
+from database.db_manager import (get_features, resolve_students, create_booking_with_students,
+                                get_student_name, BookingConflict, SERIES_MAX_OCCURRENCES, SERIES_MAX_DAYS_AHEAD,
+                                series_dates, find_series_conflicts, create_booking_series)
 from styles.booking_styles import get_booking_styles
 from room_booking_function.studentInfo import StudentInfoPage
 
@@ -172,6 +173,23 @@ class NewBookingPage(QWidget):
         time_layout.addWidget(self.end_time)
         layout.addLayout(time_layout)
 
+        # ---------- Repeat weekly ----------
+        # every week of the series has to fall inside the booking window
+        max_weeks = min(SERIES_MAX_OCCURRENCES, SERIES_MAX_DAYS_AHEAD // 7 + 1)
+        repeat_label = QLabel(f"Repeat Weekly (number of weeks, max {max_weeks}):")
+        repeat_label.setObjectName("formLabel")
+        self.repeat_spin = QSpinBox()
+        self.repeat_spin.setObjectName("repeatSpin")
+        self.repeat_spin.setMinimum(1)  # 1 = a one-off booking
+        self.repeat_spin.setMaximum(max_weeks)
+        self.repeat_spin.setValue(1)
+
+        repeat_group = QVBoxLayout()
+        repeat_group.setSpacing(0)
+        repeat_group.addWidget(repeat_label)
+        repeat_group.addWidget(self.repeat_spin)
+        layout.addLayout(repeat_group)
+
         # ---------- Student information section ----------
         student_section_layout = QHBoxLayout()
         
@@ -385,28 +403,39 @@ class NewBookingPage(QWidget):
             start_str = self.start_time.time().toString("HH:mm")
             end_str = self.end_time.time().toString("HH:mm")
             
-            # Get all candidate rooms
-            from database.db_manager import find_available_rooms, check_room_availability
-            rooms = find_available_rooms(self.location_id, feature_id, num_students, date, start_str, end_str)
+            # Rooms come back free for the slot, smallest sufficient capacity first
+            from room_booking_function.availability import get_week_availability
+            rooms = get_week_availability(self.location_id).free_rooms(
+                date, start_str, end_str, feature_id, num_students)
             
             self.selected_room_id = None
-            for room_id, room_name, capacity in rooms:
-                if check_room_availability(room_id, date, start_str, end_str):
-                    self.selected_room_id = room_id
-                    self.selected_room_name = room_name
-                    self.selected_room_capacity = capacity
-                    break  # stop at first available (smallest capacity) room
+            if rooms:
+                self.selected_room_id, self.selected_room_name, self.selected_room_capacity = rooms[0]
             
         except sqlite3.Error as e:
             QMessageBox.warning(self, "Error", f"Could not find available room: {str(e)}")
             self.selected_room_id = None
 
+    def room_taken(self, dates):
+        """
+        The database says the selected room is booked on dates although the
+        week matrix offered it: re-read those days and pick another room.
+        """
+        from room_booking_function.availability import get_week_availability
+        week = get_week_availability(self.location_id)
+        for date in dates:
+            week.mark_dirty(self.selected_room_id, date)
+        self.update_room_info()
+
     def validate_students(self):
         """Validate that all student IDs exist in the database and are filled"""
         invalid_students = []
         missing_names = []
         empty_fields = []
         
+        # Validate all entered student IDs with one query
+        known = resolve_students(id_input.text().strip() for id_input, _ in self.student_inputs)
+        
         # Check additional students
         for i, (id_input, name_input) in enumerate(self.student_inputs):
             student_id = id_input.text().strip()
@@ -417,13 +446,40 @@ class NewBookingPage(QWidget):
                 continue
                 
             # Validate student ID exists
-            if not check_student_exists(student_id):
+            if student_id not in known:
                 invalid_students.append(student_id)
             elif not name_input.text().strip():
                 missing_names.append(student_id)
         
         return invalid_students, missing_names, empty_fields
 
+    def no_room_message(self):
+        """'No room' warning text listing the nearest alternatives"""
+        message = "No available room found for the selected criteria."
+        try:
+            from room_booking_function.availability import recommend
+            suggestions = recommend(self.location_id, self.feature_combo.currentData(),
+                                    self.students_spin.value(),
+                                    self.date_edit.date().toString("yyyy-MM-dd"),
+                                    self.start_time.time().toString("HH:mm"),
+                                    self.end_time.time().toString("HH:mm"), limit=3)
+        except sqlite3.Error as e:
+            print(f"Room recommendation error: {e}")
+            return message
+
+        def describe(suggestion):
+            _, _, _, room_name, capacity, date, start, end = suggestion
+            day = QDate.fromString(date, "yyyy-MM-dd").toString("ddd d MMM")
+            return f"  {day} {start}-{end}: {room_name} ({capacity} seats)"
+
+        if suggestions["other_times"]:
+            message += f"\n\nOther free times at {self.location_name}:\n"
+            message += "\n".join(describe(s) for s in suggestions["other_times"])
+        if suggestions["other_locations"]:
+            message += "\n\nFree at the same time elsewhere:\n"
+            message += "\n".join(f"  {s[1]}: {s[3]} ({s[4]} seats)" for s in suggestions["other_locations"])
+        return message
+
     def validate_booking(self):
         """Validate booking details before submission"""
         # Check terms and conditions
@@ -497,8 +553,7 @@ class NewBookingPage(QWidget):
         
         # Check if a room was found
         if not self.selected_room_id:
-            QMessageBox.warning(self, "No Room Available", 
-                            "No available room found for the selected criteria.")
+            QMessageBox.warning(self, "No Room Available", self.no_room_message())
             return False
         
         # Check if room is already booked for the selected time
@@ -512,6 +567,7 @@ class NewBookingPage(QWidget):
         if not is_available:
             QMessageBox.warning(self, "Room Already Booked", 
                             f"Room {self.selected_room_name} is already booked for the selected time slot.")
+            self.room_taken([date])
             return False
         
         # Validate student IDs
@@ -542,16 +598,16 @@ class NewBookingPage(QWidget):
         return True
     
     def get_student_data(self):
-        """Get all student IDs including the booking user"""
+        """Get {student_id: name} for all students including the booking user"""
         student_ids = [self.current_user_id]  # Always include the booking user
         
         # Add additional students
         for id_input, _ in self.student_inputs:
             student_id = id_input.text().strip()
-            if student_id and student_id not in student_ids:
+            if student_id:
                 student_ids.append(student_id)
         
-        return student_ids
+        return resolve_students(student_ids)
     
     def show_student_info_page(self):
         """Switch to student info page via parent stacked layout"""
@@ -566,23 +622,89 @@ class NewBookingPage(QWidget):
         date = self.date_edit.date().toString("yyyy-MM-dd")
         start = self.start_time.time().toString("HH:mm")
         end = self.end_time.time().toString("HH:mm")
-        student_ids = self.get_student_data()
+        if self.repeat_spin.value() > 1:
+            self.submit_series(date, start, end)
+            return
         
         try:
+            students = self.get_student_data()
             # Ensure status is set to 'booked' to avoid database constraint error
             booking_id = create_booking_with_students(
-                self.current_user_id, self.selected_room_id, date, start, end, student_ids
+                self.current_user_id, self.selected_room_id, date, start, end, list(students), students
             )
             QMessageBox.information(self, "Success", 
-                                f"Room {self.selected_room_name} booked successfully for {len(student_ids)} students!")
+                                f"Room {self.selected_room_name} booked successfully for {len(students)} students!")
             # Reset form
             self.students_spin.setValue(1)
             # Now this will call show_feature_grid on RoomBookingWidget
             self.main_window.show_feature_grid()
+        except BookingConflict:
+            # Someone else (possibly another instance) took the slot after validation
+            QMessageBox.warning(self, "Room Already Booked", 
+                            f"Room {self.selected_room_name} was just booked by someone else. "
+                            "Another room will be suggested if one is free.")
+            self.room_taken([date])
         except sqlite3.Error as e:
             error_msg = str(e)
             if "CHECK constraint failed: status IN ('booked', 'cancelled')" in error_msg:
                 QMessageBox.critical(self, "Database Error", 
                                  "There was a database constraint error. Please contact support.")
             else:
-                QMessageBox.critical(self, "Error", f"Database error: {error_msg}")
\ No newline at end of file
+                QMessageBox.critical(self, "Error", f"Database error: {error_msg}")
+
+    def series_report(self, dates, conflicts):
+        """One line per occurrence: booked, or the booking it clashes with"""
+        lines = []
+        for date in dates:
+            if date in conflicts:
+                _, booked_start, booked_end = conflicts[date][0]
+                lines.append(f"  {date}: not available (booked {booked_start}-{booked_end})")
+            else:
+                lines.append(f"  {date}: available")
+        return "\n".join(lines)
+
+    def submit_series(self, date, start, end):
+        """Book the selected room at this time every week, as one series"""
+        try:
+            dates = series_dates(date, self.repeat_spin.value())
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Series", str(e))
+            return
+
+        try:
+            students = self.get_student_data()
+            # All occurrences are checked with one query
+            conflicts = find_series_conflicts(self.selected_room_id, dates, start, end)
+            while True:
+                free = [d for d in dates if d not in conflicts]
+                report = self.series_report(dates, conflicts)
+                if not free:
+                    QMessageBox.warning(self, "Room Already Booked",
+                                    f"Room {self.selected_room_name} is not free on any of the dates:\n{report}")
+                    self.room_taken(list(conflicts))
+                    return
+                if conflicts:
+                    reply = QMessageBox.question(
+                        self, "Some Dates Unavailable",
+                        f"Room {self.selected_room_name} is not free every week:\n{report}\n\n"
+                        f"Book the {len(free)} available date(s)?",
+                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                    if reply != QMessageBox.Yes:
+                        return
+                try:
+                    # Only the dates the user agreed to; any of them taken since is a conflict
+                    create_booking_series(
+                        self.current_user_id, self.selected_room_id, free, start, end,
+                        list(students), student_names=students)
+                    break
+                except BookingConflict:
+                    # Someone booked one of the free dates after the check: ask again
+                    conflicts = find_series_conflicts(self.selected_room_id, dates, start, end)
+            QMessageBox.information(self, "Success",
+                                f"Room {self.selected_room_name} booked on {len(free)} of {len(dates)} dates "
+                                f"for {len(students)} students:\n{report}")
+            self.students_spin.setValue(1)
+            self.repeat_spin.setValue(1)
+            self.main_window.show_feature_grid()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Error", f"Database error: {str(e)}")
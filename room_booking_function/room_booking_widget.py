@@ -10,6 +10,7 @@ from .my_bookings import MyBookingsPage
 from .timetable import TimetablePage
 from .guidelines import GuidelinesPage
 from .studentInfo import StudentInfoPage
+from .utilization import UtilizationPage
 
 class RoomBookingWidget(QWidget):
     def __init__(self, main_window, location_id, user_id):
@@ -63,6 +64,7 @@ class RoomBookingWidget(QWidget):
             ("Photo/room_icon.png", "New Booking", self.show_new_booking),
             ("Photo/timetable.png", "Timetable", self.show_timetable),
             ("Photo/user-guide.png", "Guidelines", self.show_guidelines),
+            ("Photo/calendar.png", "Utilization", self.show_utilization),
         ]
 
         for i, (icon, text, handler) in enumerate(features):
@@ -82,11 +84,13 @@ class RoomBookingWidget(QWidget):
         self.my_bookings_page = MyBookingsPage(self)
         self.timetable_page = TimetablePage(self)
         self.guidelines_page = GuidelinesPage(self)
+        self.utilization_page = UtilizationPage(self)
         
         self.pages.addWidget(self.new_booking_page)
         self.pages.addWidget(self.my_bookings_page)
         self.pages.addWidget(self.timetable_page)
         self.pages.addWidget(self.guidelines_page)
+        self.pages.addWidget(self.utilization_page)
 
     def setup_back_button(self):
         """Back button shown on all pages"""
@@ -121,6 +125,9 @@ class RoomBookingWidget(QWidget):
     def show_guidelines(self):
         self.pages.setCurrentWidget(self.guidelines_page)
         self.guidelines_page.show_guidelines()
+
+    def show_utilization(self):
+        self.pages.setCurrentWidget(self.utilization_page)
         
     def show_feature_grid(self):
         """Public method to show the feature grid page"""
@@ -1,12 +1,102 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QSpinBox, QHBoxLayout,
-    QDateEdit, QTableWidget, QTableWidgetItem, QAbstractItemView, 
-    QAbstractScrollArea, QGridLayout, QToolTip, QComboBox
+    QDateEdit, QTableView, QAbstractItemView, QHeaderView,
+    QToolTip, QComboBox
 )
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QColor
-from database.db_manager import get_rooms_by_location, get_bookings_for_timetable, get_features
+from database.db_manager import get_features
+from database.db_executor import get_executor
 from styles.timetable_styles import get_timetable_styles
+from room_booking_function.availability import get_week_availability
+
+# Half-hour columns shown in the grid: 08:00 ... 18:00
+TIME_SLOTS = [
+    f"{h:02d}:{m:02d}" for h in range(8, 19) for m in (0, 30) if not (h == 18 and m == 30)
+]
+
+
+def _load_timetable(location_id, date):
+    """
+    Day snapshot for a location from its week availability matrix: one entry per
+    room, (room_id, room_name, capacity, feature_id, feature_name, booked) where
+    bit n of booked is set when TIME_SLOTS[n] is taken. Only touches the database
+    to build the matrix or re-read rooms changed since.
+    """
+    return get_week_availability(location_id).day(date)
+
+
+class TimetableModel(QAbstractTableModel):
+    """Rooms x time slots over one day snapshot; filters never touch the database."""
+    BOOKED = QColor("#dc3545")      # Red for booked
+    AVAILABLE = QColor("#28a745")   # Green for available
+    HEADER_BG = QColor("#DBDEF5")
+    HEADER_FG = QColor("#000000")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._snapshot = []
+        self._rows = []
+        self._min_capacity = 1
+        self._feature = "all"
+
+    def set_snapshot(self, snapshot):
+        self.beginResetModel()
+        self._snapshot = snapshot
+        self._rows = self._filtered()
+        self.endResetModel()
+
+    def set_filter(self, min_capacity, feature):
+        self.beginResetModel()
+        self._min_capacity, self._feature = min_capacity, feature
+        self._rows = self._filtered()
+        self.endResetModel()
+
+    def _filtered(self):
+        return [room for room in self._snapshot
+                if room[2] >= self._min_capacity
+                and (self._feature == "all" or room[3] == self._feature)]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(TIME_SLOTS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        room_id, room_name, capacity, feature_id, feature_name, booked = self._rows[index.row()]
+        status = "booked" if booked >> index.column() & 1 else "available"
+        if role == Qt.BackgroundRole:
+            return self.BOOKED if status == "booked" else self.AVAILABLE
+        if role == Qt.UserRole:
+            return status
+        if role == Qt.ToolTipRole:
+            return (
+                f"Room: {room_name}\n"
+                f"Capacity: {capacity}\n"
+                f"Feature: {feature_name}\n"
+                f"Status: {status.capitalize()}"
+            )
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return TIME_SLOTS[section]
+            return self._rows[section][1]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole:
+            return self.HEADER_BG
+        if role == Qt.ForegroundRole:
+            return self.HEADER_FG
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled
+
 
 class TimetablePage(QWidget):
     def __init__(self, main_window):
@@ -94,182 +184,71 @@ class TimetablePage(QWidget):
         legend.setObjectName("legendItem")
         layout.addWidget(legend)
 
-        # Grid layout for frozen headers
-        self.grid_layout = QGridLayout()
-        layout.addLayout(self.grid_layout)
-
-        # Top header (time)
-        self.top_header = QTableWidget()
-        self.top_header.verticalHeader().hide()
-        self.top_header.horizontalHeader().hide()
-        self.top_header.setFixedHeight(40)
-        self.top_header.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.top_header.setShowGrid(False)
-        self.top_header.setFrameShape(QTableWidget.NoFrame)
-
-        # Left header (rooms) - Make it wider to accommodate feature names
-        self.left_header = QTableWidget()
-        self.left_header.verticalHeader().hide()
-        self.left_header.horizontalHeader().hide()
-        self.left_header.setFixedWidth(150)  # Width for room names only
-        self.left_header.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.left_header.setShowGrid(False)
-        self.left_header.setFrameShape(QTableWidget.NoFrame)
-
-        # Main table (internal cells with borders)
-        self.table = QTableWidget()
-        self.table.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContents)
-        self.table.verticalHeader().hide()
-        self.table.horizontalHeader().hide()
+        # Rooms x time grid; the view's own headers stay frozen while scrolling
+        self.model = TimetableModel(self)
+        self.table = QTableView()
+        self.table.setObjectName("timetableView")
+        self.table.setModel(self.model)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.table.setFrameShape(QTableWidget.NoFrame)
-
-        # Add to layout
-        self.grid_layout.addWidget(self.top_header, 0, 1)
-        self.grid_layout.addWidget(self.left_header, 1, 0)
-        self.grid_layout.addWidget(self.table, 1, 1)
-
-        # Sync scrollbars
-        self.table.verticalScrollBar().valueChanged.connect(
-            self.left_header.verticalScrollBar().setValue
-        )
-        self.table.horizontalScrollBar().valueChanged.connect(
-            self.top_header.horizontalScrollBar().setValue
-        )
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.table.setFrameShape(QTableView.NoFrame)
+        self.table.setCornerButtonEnabled(False)
+
+        top_header = self.table.horizontalHeader()
+        top_header.setSectionResizeMode(QHeaderView.Fixed)
+        top_header.setDefaultSectionSize(80)
+        top_header.setFixedHeight(40)
+        top_header.setHighlightSections(False)
+
+        left_header = self.table.verticalHeader()
+        left_header.setSectionResizeMode(QHeaderView.Fixed)
+        left_header.setDefaultSectionSize(40)
+        left_header.setFixedWidth(150)  # Width for room names only
+        left_header.setHighlightSections(False)
+        layout.addWidget(self.table)
+
+        # Shown instead of the grid when the filters leave no rooms
+        self.empty_label = QLabel("No rooms available with the selected filters")
+        self.empty_label.setObjectName("emptyTimetable")
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.empty_label.hide()
+        layout.addWidget(self.empty_label)
 
         # Load timetable
         self.show_timetable()
 
     def on_capacity_changed(self, cap):
         self.user_capacity = cap
-        self.show_timetable()
+        self._apply_filter()
         
     def on_feature_changed(self, index):
         self.selected_feature = self.feature_combo.currentData()
-        self.show_timetable()
+        self._apply_filter()
+
+    def _apply_filter(self):
+        """Capacity/feature filtering over the loaded day, in memory"""
+        self.model.set_filter(self.user_capacity, self.selected_feature)
+        self._update_empty_state()
+
+    def _update_empty_state(self):
+        empty = self.model.rowCount() == 0
+        self.table.setVisible(not empty)
+        self.empty_label.setVisible(empty)
 
     def show_timetable(self):
+        """Load the selected day in the background; a newer request replaces an older one."""
         selected_date = self.date_edit.date().toString("yyyy-MM-dd")
-        rooms = get_rooms_by_location(self.location_id)
-        
-        # Filter rooms by capacity and feature
-        filtered_rooms = []
-        for room_data in rooms:
-            # Handle both old (3 values) and new (5 values) format
-            if len(room_data) == 3:
-                room_id, room_name, capacity = room_data
-                feature_id, feature_name = "unknown", "Unknown Feature"
-            elif len(room_data) >= 5:
-                room_id, room_name, capacity, feature_id, feature_name = room_data[:5]
-            else:
-                continue  # Skip invalid data
-                
-            # Check capacity
-            if capacity < self.user_capacity:
-                continue
-                
-            # Check feature filter
-            if self.selected_feature != "all" and feature_id != self.selected_feature:
-                continue
-                
-            filtered_rooms.append((room_id, room_name, capacity, feature_id, feature_name))
-
-        # Clear previous content
-        self.table.setRowCount(0)
-        self.left_header.setRowCount(0)
-        self.top_header.setColumnCount(0)
-
-        if not filtered_rooms:
-            # Show "No rooms available" message with styling
-            self.table.setRowCount(1)
-            self.table.setColumnCount(1)
-            item = QTableWidgetItem("No rooms available with the selected filters")
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setFlags(Qt.ItemIsEnabled)
-            item.setBackground(QColor("#f8f9fa"))  # Light gray background
-            item.setForeground(QColor("#6c757d"))  # Muted text color
-            self.table.setItem(0, 0, item)
-            
-            # Set column width to span the entire table
-            self.table.setColumnWidth(0, 800)
-            self.table.setRowHeight(0, 60)  # Make the message row taller
-            
-            return
-
-        # Time slots
-        time_slots = [
-            f"{h:02d}:{m:02d}" for h in range(8, 19) for m in (0, 30) if not (h == 18 and m == 30)
-        ]
-        rows, cols = len(filtered_rooms), len(time_slots)
-
-        # Configure tables
-        self.table.setRowCount(rows)
-        self.table.setColumnCount(cols)
-        self.left_header.setRowCount(rows)
-        self.left_header.setColumnCount(1)
-        self.top_header.setRowCount(1)
-        self.top_header.setColumnCount(cols)
-
-        # Fill top header
-        for col, ts in enumerate(time_slots):
-            item = QTableWidgetItem(ts)
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setFlags(Qt.ItemIsEnabled)
-            self.top_header.setItem(0, col, item)
-            self.top_header.item(0, col).setBackground(QColor("#DBDEF5"))
-            self.top_header.item(0, col).setForeground(QColor("#000000"))
-
-        # Fill left header with room names only
-        for row, (room_id, room_name, capacity, feature_id, feature_name) in enumerate(filtered_rooms):
-            item = QTableWidgetItem(room_name)
-            item.setTextAlignment(Qt.AlignCenter)
-            item.setFlags(Qt.ItemIsEnabled)
-            self.left_header.setItem(row, 0, item)
-            self.left_header.item(row, 0).setBackground(QColor("#DBDEF5"))
-            self.left_header.item(row, 0).setForeground(QColor("#000000"))
-
-        # Fill main grid
-        for row, (room_id, room_name, capacity, feature_id, feature_name) in enumerate(filtered_rooms):
-            bookings = get_bookings_for_timetable(room_id, selected_date)
-            for col, ts in enumerate(time_slots):
-                booked = any(
-                    status == "booked" and self.is_time_in_slot(ts, start, end)
-                    for start, end, status, _ in bookings
-                )
-                item = QTableWidgetItem("")  # no text
-                item.setFlags(Qt.ItemIsEnabled)
-                if booked:
-                    item.setBackground(QColor("#dc3545"))  # Red for booked
-                    item.setData(Qt.UserRole, "booked")
-                else:
-                    item.setBackground(QColor("#28a745"))  # Green for available
-                    item.setData(Qt.UserRole, "available")
-                
-                # Enhanced tooltip with feature information
-                tooltip_text = (
-                    f"Room: {room_name}\n"
-                    f"Capacity: {capacity}\n"
-                    f"Feature: {feature_name}\n"
-                    f"Status: {item.data(Qt.UserRole).capitalize()}"
-                )
-                item.setToolTip(tooltip_text)
-                self.table.setItem(row, col, item)
-
-        # Column/row sizes
-        self.left_header.setColumnWidth(0, 150)  # Width for room names only
-        for col in range(cols):
-            self.top_header.setColumnWidth(col, 80)
-            self.table.setColumnWidth(col, 80)
-        for row in range(rows):
-            self.left_header.setRowHeight(row, 40)
-            self.table.setRowHeight(row, 40)
-
-    def is_time_in_slot(self, slot, start, end):
-        def to_min(t):
-            h, m = map(int, t.split(":"))
-            return h * 60 + m
-        return to_min(start) <= to_min(slot) < to_min(end)
+        get_executor().submit(
+            _load_timetable, self.location_id, selected_date,
+            key=(id(self), "timetable"), owner=self,
+            on_done=self._render_timetable,
+        )
+
+    def _render_timetable(self, snapshot):
+        self.model.set_snapshot(snapshot)
+        self._update_empty_state()
 
     def showEvent(self, e):
         super().showEvent(e)
+        # The matrix re-reads what changed since (see availability); date switches are served from memory
         self.show_timetable()
\ No newline at end of file
@@ -0,0 +1,256 @@
+from datetime import date, timedelta
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QTableView,
+    QAbstractItemView, QHeaderView
+)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+from database.db_manager import (get_location_usage_heatmap, get_location_room_usage,
+                                 get_location_group_sizes, session)
+from database.db_executor import get_executor
+from database.instrumentation import profiled
+from styles.timetable_styles import get_timetable_styles
+
+# (label, days back from today); None = all time
+PERIODS = [("Last 4 weeks", 28), ("Last 12 weeks", 84), ("Last 12 months", 365), ("All time", None)]
+HOURS = list(range(8, 18))   # bookable hours 08:00 - 18:00
+WEEKDAYS = [(1, "Mon"), (2, "Tue"), (3, "Wed"), (4, "Thu"), (5, "Fri"), (6, "Sat"), (0, "Sun")]
+BOOKABLE_MINUTES = len(HOURS) * 60
+
+
+@profiled()
+def _load_utilization(location_id, days):
+    """
+    Everything the page shows, read from the usage aggregates in one transaction
+    on a DB worker thread: (first_date, last_date, heatmap, rooms, group_sizes).
+    """
+    first = last = None
+    if days:
+        today = date.today()
+        first, last = (today - timedelta(days=days - 1)).isoformat(), today.isoformat()
+    with session():
+        heatmap = get_location_usage_heatmap(location_id, first, last)
+        rooms = get_location_room_usage(location_id, first, last)
+        sizes = get_location_group_sizes(location_id)
+    return first, last, heatmap, rooms, sizes
+
+
+def _weekday_counts(first, last):
+    """How often each weekday (0 = Sunday) occurs between first and last"""
+    counts = dict.fromkeys(range(7), 0)
+    day, end = date.fromisoformat(first), date.fromisoformat(last)
+    full_weeks, extra = divmod((end - day).days + 1, 7)
+    for weekday in counts:
+        counts[weekday] = full_weeks
+    for n in range(extra):
+        counts[(day + timedelta(days=n)).isoweekday() % 7] += 1
+    return counts
+
+
+class HeatmapModel(QAbstractTableModel):
+    """Weekdays x hours; each cell is the share of room-hours booked (or booked hours, all time)."""
+    LOW = QColor("#f1f3fb")
+    HIGH = QColor("#283593")
+    HEADER_BG = QColor("#DBDEF5")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._minutes = {}
+        self._capacity = None   # bookable room-minutes per weekday-hour cell, None for all time
+        self._max = 0
+
+    def set_data(self, minutes, weekday_counts=None, rooms=0):
+        self.beginResetModel()
+        self._minutes = minutes
+        self._capacity = ({weekday: count * rooms * 60 for weekday, count in weekday_counts.items()}
+                          if weekday_counts is not None else None)
+        self._max = max([self._value(w, h) for w, _ in WEEKDAYS for h in HOURS] or [0])
+        self.endResetModel()
+
+    def _value(self, weekday, hour):
+        minutes = self._minutes.get((weekday, hour), 0)
+        if self._capacity is None:
+            return minutes
+        return minutes / self._capacity[weekday] if self._capacity[weekday] else 0.0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(WEEKDAYS)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HOURS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        weekday, day_name = WEEKDAYS[index.row()]
+        hour = HOURS[index.column()]
+        value = self._value(weekday, hour)
+        share = value / self._max if self._max else 0.0
+        if role == Qt.DisplayRole:
+            return f"{value:.0%}" if self._capacity is not None else f"{value / 60:.0f}h"
+        if role == Qt.BackgroundRole:
+            return QColor(*(round(lo + (hi - lo) * share) for lo, hi in
+                            zip(self.LOW.getRgb()[:3], self.HIGH.getRgb()[:3])))
+        if role == Qt.ForegroundRole:
+            return QColor("white") if share > 0.5 else QColor("#333333")
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.ToolTipRole:
+            hours = self._minutes.get((weekday, hour), 0) / 60
+            text = f"{day_name} {hour:02d}:00-{hour + 1:02d}:00\nBooked: {hours:.1f} room-hours"
+            if self._capacity is not None:
+                text += f"\nUtilization: {value:.1%}"
+            return text
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            if orientation == Qt.Horizontal:
+                return f"{HOURS[section]:02d}:00"
+            return WEEKDAYS[section][1]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole:
+            return self.HEADER_BG
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled
+
+
+class RoomUsageModel(QAbstractTableModel):
+    """One row per room: bookings, cancellations, booked hours and utilization."""
+    COLUMNS = ["Room", "Capacity", "Bookings", "Cancelled", "Booked Hours", "Utilization"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rooms = []
+        self._days = None
+
+    def set_rooms(self, rooms, days=None):
+        self.beginResetModel()
+        self._rooms, self._days = rooms, days
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rooms)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _, room_name, capacity, bookings, cancellations, minutes = self._rooms[index.row()]
+        if role == Qt.DisplayRole:
+            column = index.column()
+            if column == 0:
+                return room_name
+            if column == 1:
+                return str(capacity or 0)
+            if column == 2:
+                return str(bookings)
+            if column == 3:
+                return f"{cancellations} ({cancellations / bookings:.0%})" if bookings else "0"
+            if column == 4:
+                return f"{minutes / 60:.1f}"
+            return f"{minutes / (self._days * BOOKABLE_MINUTES):.0%}" if self._days else "-"
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignLeft | Qt.AlignVCenter if index.column() == 0 else Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled
+
+
+class UtilizationPage(QWidget):
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.location_id = main_window.location_id
+        self.location_name = main_window.location_name
+
+        layout = QVBoxLayout(self)
+
+        title = QLabel(f"Room Utilization: {self.location_name}")
+        title.setObjectName("bookingHeader")
+        layout.addWidget(title)
+
+        period_layout = QHBoxLayout()
+        period_label = QLabel("Period:")
+        period_label.setObjectName("formLabel")
+        self.period_combo = QComboBox()
+        self.period_combo.setObjectName("periodCombo")
+        for label, days in PERIODS:
+            self.period_combo.addItem(label, days)
+        self.period_combo.currentIndexChanged.connect(self.load_utilization)
+        period_layout.addWidget(period_label)
+        period_layout.addWidget(self.period_combo)
+        period_layout.addStretch()
+        layout.addLayout(period_layout)
+
+        # Weekday x hour heatmap
+        self.heatmap_model = HeatmapModel(self)
+        self.heatmap = QTableView()
+        self.heatmap.setObjectName("heatmapView")
+        self.heatmap.setModel(self.heatmap_model)
+        self.heatmap.setSelectionMode(QAbstractItemView.NoSelection)
+        self.heatmap.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.heatmap.setFocusPolicy(Qt.NoFocus)
+        self.heatmap.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.heatmap.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.heatmap.setMinimumHeight(260)
+        layout.addWidget(self.heatmap)
+
+        self.group_sizes_label = QLabel()
+        self.group_sizes_label.setObjectName("legendItem")
+        self.group_sizes_label.setWordWrap(True)
+        layout.addWidget(self.group_sizes_label)
+
+        # Per-room totals
+        self.rooms_model = RoomUsageModel(self)
+        self.rooms_view = QTableView()
+        self.rooms_view.setObjectName("roomUsageView")
+        self.rooms_view.setModel(self.rooms_model)
+        self.rooms_view.setSelectionMode(QAbstractItemView.NoSelection)
+        self.rooms_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.rooms_view.verticalHeader().hide()
+        self.rooms_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.rooms_view, 1)
+
+        self.setStyleSheet(get_timetable_styles())
+
+    def load_utilization(self):
+        """Read the aggregates for the selected period (in the background)"""
+        get_executor().submit(
+            _load_utilization, self.location_id, self.period_combo.currentData(),
+            key=(id(self), "utilization"), owner=self,
+            on_done=self._show_utilization,
+        )
+
+    def _show_utilization(self, result):
+        first, last, heatmap, rooms, sizes = result
+        if first is None:
+            self.heatmap_model.set_data(heatmap)
+            self.rooms_model.set_rooms(rooms)
+        else:
+            self.heatmap_model.set_data(heatmap, _weekday_counts(first, last), len(rooms))
+            self.rooms_model.set_rooms(rooms, (date.fromisoformat(last) - date.fromisoformat(first)).days + 1)
+
+        total = sum(count for _, count in sizes)
+        if total:
+            shares = ", ".join(f"{size}: {count / total:.0%}" for size, count in sizes)
+            self.group_sizes_label.setText(f"Group sizes (students per booking, all time): {shares}")
+        else:
+            self.group_sizes_label.setText("No bookings yet.")
+
+    def showEvent(self, event):
+        """Aggregates are always current, so reload on every show"""
+        super().showEvent(event)
+        self.load_utilization()
@@ -30,7 +30,7 @@ def get_timetable_styles():
     }
 
     /* DateEdit / SpinBox / ComboBox */
-    #dateEdit, #capacitySpin, #featureCombo {
+    #dateEdit, #capacitySpin, #featureCombo, #periodCombo {
         border: 2px solid #ced4da;
         border-radius: 6px;
         padding: 6px 12px;
@@ -42,7 +42,7 @@ def get_timetable_styles():
     }
 
     /* Hover effects for form controls */
-    #dateEdit:hover, #capacitySpin:hover, #featureCombo:hover {
+    #dateEdit:hover, #capacitySpin:hover, #featureCombo:hover, #periodCombo:hover {
         border: 2px solid #283593;
     }
 
@@ -52,7 +52,8 @@ def get_timetable_styles():
     }
 
     /* Dropdown buttons - remove left border to show main control's border */
-    #dateEdit::drop-down, #capacitySpin::up-button, #capacitySpin::down-button, #featureCombo::drop-down {
+    #dateEdit::drop-down, #capacitySpin::up-button, #capacitySpin::down-button, #featureCombo::drop-down,
+    #periodCombo::drop-down {
         background-color: white;
         border: none; /* Remove border to show main control's border */
         border-radius: 0 4px 4px 0;
@@ -93,6 +94,17 @@ def get_timetable_styles():
         width: 12px;
         height: 12px;
     }
+
+    /* Utilization period */
+    #periodCombo {
+        width: 160px;
+    }
+
+    #periodCombo::down-arrow {
+        image: url(Photo/down_arrow.png);
+        width: 12px;
+        height: 12px;
+    }
     
     /* Dropdown list styling */
     QComboBox QAbstractItemView {
@@ -108,6 +120,21 @@ def get_timetable_styles():
         background-color: #e3e8ff;
     }
 
+    /* Timetable grid headers (times across, rooms down) */
+    QTableView#timetableView QHeaderView::section {
+        background-color: #DBDEF5;
+        color: #000000;
+        border: none;
+        padding: 0px;
+    }
+
+    /* Shown when the filters leave no rooms */
+    QLabel#emptyTimetable {
+        background-color: #f8f9fa;
+        color: #6c757d;
+        min-height: 60px;
+    }
+
     /* Tooltips */
     QToolTip {
         background-color: #f5f5f5;